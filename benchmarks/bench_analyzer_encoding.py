@@ -0,0 +1,87 @@
+# benchmarks/bench_analyzer_encoding.py
+#
+# Compares the old per-row df.iterrows() protobuf encoding used by the energy
+# analyzer against the column-wise build_processed_report() path.
+#
+# Usage:
+#   python benchmarks/bench_analyzer_encoding.py
+#   python benchmarks/bench_analyzer_encoding.py --sizes 10000 1000000 --max-loop-rows 1000000
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Make the wp31_services packages importable the same way the containers do
+SERVICES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "wp31_services"))
+sys.path.insert(0, os.path.join(SERVICES_DIR, "generated"))
+sys.path.insert(0, SERVICES_DIR)
+
+from generated import energy_pb2
+from src.common.report_codec import build_processed_report
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """Builds an already-analyzed DataFrame shaped like the analyzer's."""
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'timestamp': pd.date_range("2025-01-01", periods=rows, freq="s").strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'household_id': np.char.add("HH-", (np.arange(rows) % 500).astype(str)),
+        'power_consumption': rng.uniform(50.0, 500.0, rows).round(1),
+    })
+    df['efficiency'] = rng.uniform(0.0, 1.0, rows).round(3)
+    df['anomaly_detected'] = df['efficiency'] < 0.1
+    return df
+
+
+def encode_with_iterrows(df: pd.DataFrame) -> energy_pb2.ProcessedDataReport:
+    # This is the loop the analyzer used before the column-wise encoder
+    report_data = energy_pb2.ProcessedDataReport()
+    for _, row in df.iterrows():
+        processed_item = report_data.processed.add()
+        processed_item.timestamp = row['timestamp']
+        processed_item.household_id = row['household_id']
+        processed_item.power = float(row['power_consumption'])
+        processed_item.efficiency = float(row['efficiency'])
+        processed_item.anomaly_detected = bool(row['anomaly_detected'])
+    return report_data
+
+
+def time_encoder(encoder, df: pd.DataFrame):
+    start = time.perf_counter()
+    payload = encoder(df).SerializeToString()
+    return time.perf_counter() - start, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyzer protobuf encoding")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--max-loop-rows", type=int, default=None,
+                        help="Skip the iterrows() baseline above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'iterrows rec/s':>16} {'column-wise rec/s':>18} {'speedup':>9}")
+    for rows in args.sizes:
+        df = make_frame(rows)
+
+        fast_seconds, fast_payload = time_encoder(build_processed_report, df)
+        fast_rate = rows / fast_seconds
+
+        if args.max_loop_rows is not None and rows > args.max_loop_rows:
+            print(f"{rows:>12} {'skipped':>16} {fast_rate:>18,.0f} {'-':>9}")
+            continue
+
+        loop_seconds, loop_payload = time_encoder(encode_with_iterrows, df)
+        if loop_payload != fast_payload:
+            raise SystemExit(f"Encoders disagree at {rows} rows")
+        loop_rate = rows / loop_seconds
+        print(f"{rows:>12} {loop_rate:>16,.0f} {fast_rate:>18,.0f} {loop_seconds / fast_seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_analyzer_parallel.py
+#
+# Compares the analyzer's serial Execute path against the multi-process
+# AnalysisPool (ANALYZER_WORKERS) on one large CSV input, and checks that both
+# write byte-identical reports. The speedup depends on the CPU cores available.
+#
+# Usage:
+#   python benchmarks/bench_analyzer_parallel.py
+#   python benchmarks/bench_analyzer_parallel.py --rows 5000000 --workers 2 4 8 --report-format columnar
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Make the wp31_services packages importable the same way the containers do
+SERVICES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "wp31_services"))
+sys.path.insert(0, os.path.join(SERVICES_DIR, "generated"))
+sys.path.insert(0, SERVICES_DIR)
+
+from generated import energy_pb2
+from energy_analyzer import parallel
+from energy_analyzer.stage import ContainerExecutorServicer
+from energy_generator.synthetic import iter_csv_chunks, parse_settings
+
+
+def run(servicer, request) -> float:
+    start = time.perf_counter()
+    response = servicer.Execute(request, None)
+    if not response.success:
+        raise SystemExit(response.message)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-process analysis of one large request")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--report-format", choices=("rows", "columnar"), default="rows")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per setting; the best is reported")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="bench_analyzer_parallel_")
+    input_file = os.path.join(data_dir, "energy_data.csv")
+    settings = parse_settings({"rows": str(args.rows), "households": "10000",
+                               "span_seconds": str(30 * 86_400), "seed": "1"})
+    with open(input_file, "wb") as f:
+        for _, data in iter_csv_chunks(settings):
+            f.write(data)
+    print(f"{args.rows:,} rows, {os.path.getsize(input_file) / 1e6:.1f} MB CSV, {os.cpu_count()} CPUs")
+
+    def request(name):
+        return energy_pb2.ExecuteRequest(input_file=input_file, output_file=os.path.join(data_dir, name),
+                                         parameters={"report_format": args.report_format})
+
+    serial = request("serial.pb")
+    serial_seconds = min(run(ContainerExecutorServicer(), serial) for _ in range(args.repeats))
+    with open(serial.output_file, "rb") as f:
+        expected = f.read()
+    print(f"{'workers':>8} {'seconds':>9} {'rec/s':>12} {'speedup':>9}")
+    print(f"{'serial':>8} {serial_seconds:>9.3f} {args.rows / serial_seconds:>12,.0f} {'1.0x':>9}")
+
+    for workers in args.workers:
+        pool = parallel.AnalysisPool(workers)
+        try:
+            split = request(f"workers_{workers}.pb")
+            if not pool.can_split(split):
+                raise SystemExit(f"The input is below PARALLEL_MIN_BYTES ({parallel.PARALLEL_MIN_BYTES} bytes)")
+            seconds = min(run(ContainerExecutorServicer(pool), split) for _ in range(args.repeats))
+        finally:
+            pool.shutdown()
+        with open(split.output_file, "rb") as f:
+            if f.read() != expected:
+                raise SystemExit(f"The report written with {workers} workers differs from the serial one")
+        print(f"{workers:>8} {seconds:>9.3f} {args.rows / seconds:>12,.0f} {serial_seconds / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
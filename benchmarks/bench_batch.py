@@ -0,0 +1,88 @@
+# benchmarks/bench_batch.py
+#
+# Backfill throughput: many small workflow runs (one per "day", each with its
+# own files) through the real services, run one by one with Execute calls and
+# then grouped into ExecuteBatch calls. Checks that both produce the same
+# reports.
+#
+# Usage:
+#   python benchmarks/bench_batch.py
+#   python benchmarks/bench_batch.py --runs 500 --rows 200 --max-jobs 64 --max-parallel 4
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from local_services import local_services, make_pipeline_config
+
+import grpc_executor
+from batch_executor import execute_workflows_batched
+from channel_pool import ChannelPool
+
+
+def make_runs(registry, data_dir: str, runs: int, rows: int, handoff: str):
+    configs = []
+    for day in range(runs):
+        config = make_pipeline_config(registry, os.path.join(data_dir, f"day-{day}"), rows, handoff)
+        config["workflow_name"] = f"day-{day}"
+        config["containers"]["energy-generator"]["parameters"]["seed"] = day
+        configs.append(config)
+    return configs
+
+
+def report_digests(configs):
+    digests = []
+    for config in configs:
+        with open(config["containers"]["report-generator"]["output_file"], "rb") as f:
+            digests.append(hashlib.sha256(f.read()).hexdigest())
+    return digests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched against one-by-one workflow runs")
+    parser.add_argument("--runs", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--handoff", choices=("file", "memory"), default="file")
+    parser.add_argument("--max-jobs", type=int, default=64)
+    parser.add_argument("--max-parallel", type=int, default=0)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="bench_batch_")
+    try:
+        with local_services(log_dir=data_dir) as registry:
+            configs = make_runs(registry, data_dir, args.runs, args.rows, args.handoff)
+            pool = ChannelPool()
+            # Both modes print per node and per run; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for config in configs:
+                    if not grpc_executor.execute_workflow(config, pool):
+                        raise SystemExit(f"Run '{config['workflow_name']}' failed")
+                single = time.perf_counter() - start
+                expected = report_digests(configs)
+
+                start = time.perf_counter()
+                results = execute_workflows_batched(configs, pool, args.max_jobs, args.max_parallel)
+                batched = time.perf_counter() - start
+            pool.close()
+            if not all(results):
+                raise SystemExit(f"{results.count(False)} batched runs failed")
+            if report_digests(configs) != expected:
+                raise SystemExit("Batched runs produced different reports")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"{args.runs} runs of {args.rows} rows, {args.handoff} hand-off, {os.cpu_count()} CPUs\n")
+    print(f"{'mode':<28} {'seconds':>8} {'runs/s':>8}")
+    print(f"{'one by one (Execute)':<28} {single:>8.2f} {args.runs / single:>8.1f}")
+    print(f"{'batched (ExecuteBatch)':<28} {batched:>8.2f} {args.runs / batched:>8.1f}")
+    print(f"\nspeedup {single / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
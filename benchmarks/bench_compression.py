@@ -0,0 +1,208 @@
+# benchmarks/bench_compression.py
+#
+# Throughput / CPU trade-off of the stage output codecs. The generator's CSV
+# and the analyzer's chunked report are produced once by the real services,
+# then compressed and decompressed with each codec and level through the same
+# CompressingWriter / DecompressingReader the stages use. Besides the ratio
+# and MB/s (of uncompressed data) it estimates the time to write an artifact
+# to and read it back from a volume of --bandwidth MB/s, compression and
+# decompression included, which is where compression pays off on NFS.
+# --pipeline also runs the file hand-off pipeline once per codec (point --dir
+# at the shared volume), and --grpc the in-memory pipeline with each gRPC
+# compression setting.
+#
+# Usage:
+#   python benchmarks/bench_compression.py --rows 1000000 --bandwidth 100
+#   python benchmarks/bench_compression.py --dir /data --pipeline --grpc --output results/compression.json
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from local_services import SERVICES_DIR, local_services, make_pipeline_config
+from bench_pipeline import git_revision, run_once
+from channel_pool import GRPC_COMPRESSION_ALGORITHMS, ChannelPool
+
+# The services' compression module; it imports no protobuf code, so it can be
+# loaded next to the orchestrator's
+sys.path.append(SERVICES_DIR)
+from src.common.compression import READ_BYTES, CompressingWriter, DecompressingReader
+
+RESULTS_VERSION = 1
+DEFAULT_ROWS = 1_000_000
+# Roughly a 1 Gbit/s NFS mount
+DEFAULT_BANDWIDTH_MBPS = 100.0
+DEFAULT_CODECS = ["none", "lz4:0", "lz4:9", "zstd:1", "zstd:3", "zstd:9", "gzip:1", "gzip:6"]
+
+# Stages write and read their outputs in pieces of about this size
+WRITE_BYTES = 1 << 20
+
+# Artifact -> (pipeline node writing it, file name in make_pipeline_config)
+ARTIFACTS = {
+    "energy_data.csv": "energy-generator",
+    "analysis_output.pb": "energy-analyzer",
+}
+
+
+def parse_codec(spec: str):
+    codec, _, level = spec.partition(":")
+    return codec, int(level) if level else None
+
+
+def measure(data: bytes, codec: str, level, repeats: int) -> dict:
+    """Median wall and CPU seconds to compress and decompress 'data' the way a stage does."""
+    if codec == "none":
+        return {"compressed_bytes": len(data), "compress_seconds": 0.0, "compress_cpu_seconds": 0.0,
+                "decompress_seconds": 0.0, "decompress_cpu_seconds": 0.0}
+    view = memoryview(data)
+    timings = {"compress_seconds": [], "compress_cpu_seconds": [], "decompress_seconds": [],
+               "decompress_cpu_seconds": []}
+    for _ in range(repeats):
+        target = io.BytesIO()
+        wall, cpu = time.perf_counter(), time.process_time()
+        with CompressingWriter(target, codec, level) as writer:
+            for offset in range(0, len(view), WRITE_BYTES):
+                writer.write(view[offset:offset + WRITE_BYTES])
+        timings["compress_seconds"].append(time.perf_counter() - wall)
+        timings["compress_cpu_seconds"].append(time.process_time() - cpu)
+        compressed = target.getvalue()
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        reader = DecompressingReader(io.BytesIO(compressed), codec)
+        size = 0
+        for block in iter(lambda: reader.read(READ_BYTES), b""):
+            size += len(block)
+        timings["decompress_seconds"].append(time.perf_counter() - wall)
+        timings["decompress_cpu_seconds"].append(time.process_time() - cpu)
+        if size != len(data):
+            raise SystemExit(f"{codec}: decompressed {size} bytes, expected {len(data)}")
+
+    result = {"compressed_bytes": len(compressed)}
+    result.update({metric: statistics.median(values) for metric, values in timings.items()})
+    return result
+
+
+def with_compression(config, codec: str, level):
+    # Every node that writes a file hands its output on compressed
+    if codec == "none":
+        return config
+    for node_id in ARTIFACTS.values():
+        parameters = config["containers"][node_id].setdefault("parameters", {})
+        parameters["compression"] = codec
+        if level is not None:
+            parameters["compression_level"] = level
+    return config
+
+
+def print_codec_case(case: dict):
+    def rate(seconds):
+        return f"{case['bytes'] / seconds / 1e6:.0f}" if seconds else "-"
+
+    print(f"{case['artifact']:<20} {case['codec']:<8} {case['ratio']:>6.2f} {rate(case['compress_seconds']):>9} "
+          f"{rate(case['decompress_seconds']):>11} {case['compress_cpu_seconds']:>8.3f} "
+          f"{case['decompress_cpu_seconds']:>10.3f} {case['volume_seconds']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stage output codecs and gRPC compression")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--codecs", nargs="+", default=DEFAULT_CODECS, metavar="CODEC[:LEVEL]")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per case; medians are reported")
+    parser.add_argument("--bandwidth", type=float, default=DEFAULT_BANDWIDTH_MBPS,
+                        help="Volume bandwidth in MB/s for the write + read estimate")
+    parser.add_argument("--dir", help="Directory for the pipeline's files (default: a temporary one)")
+    parser.add_argument("--pipeline", action="store_true", help="Also run the file hand-off pipeline per codec")
+    parser.add_argument("--grpc", action="store_true",
+                        help="Also run the in-memory pipeline per gRPC compression setting")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    codecs = [parse_codec(spec) for spec in args.codecs]
+
+    commit, dirty = git_revision()
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": commit,
+        "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"rows": args.rows, "repeats": args.repeats, "bandwidth_mbps": args.bandwidth},
+        "codecs": [],
+        "pipeline": [],
+        "grpc": [],
+    }
+
+    data_dir = args.dir or tempfile.mkdtemp()
+    with local_services() as registry:
+        pool = ChannelPool()
+        config = make_pipeline_config(registry, data_dir, args.rows, chunk_rows=100_000)
+        run_once(config, pool)
+        artifacts = {}
+        for name in ARTIFACTS:
+            with open(os.path.join(data_dir, name), "rb") as f:
+                artifacts[name] = f.read()
+
+        print(f"Codecs on {args.rows:,} rows, medians of {args.repeats} runs, {os.cpu_count()} CPUs; "
+              f"volume estimate at {args.bandwidth:.0f} MB/s\n")
+        print(f"{'artifact':<20} {'codec':<8} {'ratio':>6} {'comp MB/s':>9} {'decomp MB/s':>11} "
+              f"{'comp CPU':>8} {'decomp CPU':>10} {'volume s':>9}")
+        for name, data in artifacts.items():
+            for codec, level in codecs:
+                case = {"artifact": name, "codec": codec if level is None else f"{codec}:{level}",
+                        "bytes": len(data)}
+                case.update(measure(data, codec, level, args.repeats))
+                case["ratio"] = len(data) / case["compressed_bytes"]
+                # Written once and read once, one after the other
+                case["volume_seconds"] = (2 * case["compressed_bytes"] / (args.bandwidth * 1e6)
+                                          + case["compress_seconds"] + case["decompress_seconds"])
+                results["codecs"].append(case)
+                print_codec_case(case)
+
+        if args.pipeline:
+            print(f"\nFile hand-off pipeline per codec ({data_dir})")
+            print(f"  {'codec':<8} {'total s':>8} {'CSV MB':>8} {'report MB':>9}")
+            for codec, level in codecs:
+                config = with_compression(make_pipeline_config(registry, data_dir, args.rows, chunk_rows=100_000),
+                                          codec, level)
+                runs = [run_once(config, pool) for _ in range(args.repeats)]
+                sizes = {name: os.path.getsize(os.path.join(data_dir, name)) for name in ARTIFACTS}
+                case = {"codec": codec if level is None else f"{codec}:{level}",
+                        "total_seconds": statistics.median(run["wall_seconds"] for run in runs),
+                        "artifact_bytes": sizes}
+                results["pipeline"].append(case)
+                print(f"  {case['codec']:<8} {case['total_seconds']:>8.3f} {sizes['energy_data.csv'] / 1e6:>8.1f} "
+                      f"{sizes['analysis_output.pb'] / 1e6:>9.1f}")
+        pool.close()
+
+    if args.grpc:
+        # Requests compressed by the channel, responses by the server (GRPC_COMPRESSION)
+        print("\nIn-memory pipeline per gRPC compression")
+        print(f"  {'compression':<12} {'total s':>8}")
+        for name in GRPC_COMPRESSION_ALGORITHMS:
+            with local_services(env={"GRPC_COMPRESSION": name}) as registry:
+                pool = ChannelPool(compression=name)
+                config = make_pipeline_config(registry, data_dir, args.rows, handoff="memory")
+                runs = [run_once(config, pool) for _ in range(args.repeats)]
+                pool.close()
+            case = {"compression": name, "total_seconds": statistics.median(run["wall_seconds"] for run in runs)}
+            results["grpc"].append(case)
+            print(f"  {name:<12} {case['total_seconds']:>8.3f}")
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/bench_daemon.py
+#
+# Workflow runs/sec of the one-shot CLI (a fresh `python grpc_main.py` process
+# per run: interpreter start, imports, config parse and new connections) against
+# the long-running workflow daemon, which takes submissions over gRPC and runs
+# them on warm channels. Both drive local stand-in services that sleep per node.
+#
+# Usage:
+#   python benchmarks/bench_daemon.py
+#   python benchmarks/bench_daemon.py --cli-runs 10 --daemon-runs 2000 --workers 32 --delay-ms 20
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent import futures
+
+import grpc
+
+from standin_services import ROOT_DIR, make_linear_config, start_standin_services
+
+from channel_pool import LimitedChannelPool
+from proto import workflow_scheduler_pb2, workflow_scheduler_pb2_grpc
+from workflow_daemon import FINISHED_STATES, WorkflowScheduler, build_server
+
+GRPC_MAIN = os.path.join(ROOT_DIR, "src", "orchestrator", "grpc_main.py")
+
+
+def bench_cli(config, runs: int) -> float:
+    # grpc_main.py reads config/energy-pipeline.json relative to its working directory
+    work_dir = tempfile.mkdtemp(prefix="bench_daemon_")
+    try:
+        os.makedirs(os.path.join(work_dir, "config"))
+        with open(os.path.join(work_dir, "config", "energy-pipeline.json"), "w") as f:
+            json.dump(config, f)
+        env = dict(os.environ, LOG_DIR=os.path.join(work_dir, "logs"))
+        start = time.perf_counter()
+        for _ in range(runs):
+            subprocess.run([sys.executable, GRPC_MAIN], cwd=work_dir, env=env, check=True,
+                           stdout=subprocess.DEVNULL)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_daemon(config, runs: int, workers: int, submitters: int):
+    """Returns (seconds until every run finished, submissions/sec, submit-to-finish latencies)."""
+    pool = LimitedChannelPool()
+    scheduler = WorkflowScheduler(pool, workers)
+    server, port = build_server(scheduler, 0)
+    # The daemon runs one run per workflow at a time, so the runs are spread
+    # over one workflow name per worker, like that many independent workflows
+    requests = [workflow_scheduler_pb2.SubmitRunRequest(
+        config_json=json.dumps(dict(config, workflow_name=f"{config['workflow_name']}-{i}")))
+        for i in range(workers)]
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = workflow_scheduler_pb2_grpc.WorkflowSchedulerStub(channel)
+            start = time.perf_counter()
+            with futures.ThreadPoolExecutor(max_workers=submitters) as executor:
+                run_ids = [response.run_id for response in executor.map(
+                    lambda i: stub.SubmitRun(requests[i % workers]), range(runs))]
+            submitted = time.perf_counter() - start
+
+            statuses = {}
+            while len(statuses) < runs:
+                for run_id in run_ids:
+                    if run_id not in statuses:
+                        status = stub.GetRun(workflow_scheduler_pb2.RunRequest(run_id=run_id))
+                        if status.state in FINISHED_STATES:
+                            statuses[run_id] = status
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.stop(None)
+        scheduler.stop()
+        pool.close()
+
+    failed = [s for s in statuses.values() if s.state != workflow_scheduler_pb2.RunStatus.SUCCEEDED]
+    if failed:
+        raise SystemExit(f"{len(failed)} daemon runs failed: {failed[0].message}")
+    latencies = sorted(s.finished_at - s.submitted_at for s in statuses.values())
+    # Polling adds up to its interval to the measured end
+    last_finish = max(s.finished_at for s in statuses.values()) - min(s.submitted_at for s in statuses.values())
+    return min(elapsed, last_finish), runs / submitted, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the one-shot CLI against the workflow daemon")
+    parser.add_argument("--cli-runs", type=int, default=10)
+    parser.add_argument("--daemon-runs", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--submitters", type=int, default=8, help="Client threads submitting runs")
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    servers, registry = start_standin_services(args.delay_ms / 1000)
+    config = make_linear_config(registry)
+    config["workflow_name"] = "bench-daemon"
+    try:
+        cli_seconds = bench_cli(config, args.cli_runs)
+        daemon_seconds, submit_rate, latencies = bench_daemon(config, args.daemon_runs, args.workers,
+                                                              args.submitters)
+    finally:
+        for server in servers:
+            server.stop(None)
+
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"3-node workflow, stand-in services sleeping {args.delay_ms:g} ms per node, {os.cpu_count()} CPUs\n")
+    print(f"{'mode':<34} {'runs':>6} {'seconds':>8} {'runs/s':>8}")
+    print(f"{'one-shot CLI (grpc_main.py)':<34} {args.cli_runs:>6} {cli_seconds:>8.2f} "
+          f"{args.cli_runs / cli_seconds:>8.1f}")
+    print(f"{f'daemon ({args.workers} workers)':<34} {args.daemon_runs:>6} {daemon_seconds:>8.2f} "
+          f"{args.daemon_runs / daemon_seconds:>8.1f}")
+    print(f"\ndaemon submissions/s: {submit_rate:,.0f}")
+    print(f"daemon submit-to-finish latency: p50 {cuts[49] * 1000:.0f} ms, p99 {cuts[98] * 1000:.0f} ms "
+          f"(queueing included)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_hedging.py
+#
+# Workflow latency percentiles with and without hedged requests. The analyzer
+# is served by two stand-in replicas whose calls usually take --delay-ms but
+# now and then (--slow-fraction) take --slow-ms, like a GC pause or a noisy
+# neighbour; the hedged runs send a second copy of a slow call to the other
+# replica after --hedge-delay-ms.
+#
+# Usage:
+#   python benchmarks/bench_hedging.py
+#   python benchmarks/bench_hedging.py --workflows 500 --slow-fraction 0.1 --hedge-delay-ms 30
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+from concurrent import futures
+
+import grpc
+
+from standin_services import StandInServicer, make_linear_config, start_standin_services
+
+import grpc_executor
+from channel_pool import ChannelPool
+from proto import energy_pipeline_pb2_grpc
+
+
+class SlowTailServicer(StandInServicer):
+    def __init__(self, name: str, delay_seconds: float, slow_seconds: float, slow_fraction: float, seed: int):
+        super().__init__(name, delay_seconds)
+        self.slow_seconds = slow_seconds
+        self.slow_fraction = slow_fraction
+        self._random = random.Random(seed)
+
+    def Execute(self, request, context):
+        if self._random.random() < self.slow_fraction:
+            time.sleep(self.slow_seconds)
+        return super().Execute(request, context)
+
+
+def start_replica(servicer):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=16))
+    energy_pipeline_pb2_grpc.add_ContainerExecutorServicer_to_server(servicer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, f"127.0.0.1:{port}"
+
+
+def run(config, workflows: int):
+    pool = ChannelPool()
+    latencies = []
+    # execute_workflow prints a line per node; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(workflows):
+            start = time.perf_counter()
+            if not grpc_executor.execute_workflow(config, pool):
+                raise SystemExit("A workflow failed")
+            latencies.append(time.perf_counter() - start)
+    pool.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hedged requests against a slow tail")
+    parser.add_argument("--workflows", type=int, default=300)
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    parser.add_argument("--slow-ms", type=float, default=250.0)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--hedge-delay-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    servers, registry = start_standin_services(args.delay_ms / 1000)
+    replicas = [start_replica(SlowTailServicer("energy-analyzer", args.delay_ms / 1000, args.slow_ms / 1000,
+                                               args.slow_fraction, seed)) for seed in (1, 2)]
+    servers += [server for server, _ in replicas]
+    registry["energy-analyzer"] = replicas[0][1]
+
+    plain = make_linear_config(registry)
+    hedged = make_linear_config(registry)
+    hedged["containers"]["energy-analyzer"]["hedging"] = {"address": replicas[1][1],
+                                                          "delay_seconds": args.hedge_delay_ms / 1000}
+
+    print(f"{args.workflows} workflows, analyzer {args.delay_ms:g} ms with {args.slow_fraction:.0%} "
+          f"of calls at {args.slow_ms:g} ms, hedge after {args.hedge_delay_ms:g} ms\n")
+    print(f"{'mode':<10} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, config in (("plain", plain), ("hedged", hedged)):
+        latencies = sorted(run(config, args.workflows))
+        cuts = statistics.quantiles(latencies, n=100)
+        print(f"{name:<10} {cuts[49] * 1000:>8.1f} {cuts[89] * 1000:>8.1f} {cuts[98] * 1000:>8.1f} "
+              f"{latencies[-1] * 1000:>8.1f}")
+
+    for server in servers:
+        server.stop(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_orchestrator_backends.py
+#
+# Workflows/sec of the blocking grpc_executor against the asyncio backend in
+# aio_executor, both driving local stand-in services that sleep per node.
+#
+# Usage:
+#   python benchmarks/bench_orchestrator_backends.py
+#   python benchmarks/bench_orchestrator_backends.py --workflows 500 --concurrency 50 200 --delay-ms 20
+
+import argparse
+import contextlib
+import io
+import logging
+import time
+
+from standin_services import make_linear_config, start_standin_services
+
+import aio_executor
+import grpc_executor
+from channel_pool import ChannelPool
+
+
+def bench_sync(config, workflows: int) -> float:
+    pool = ChannelPool()
+    start = time.perf_counter()
+    # execute_workflow prints a line per node; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(workflows):
+            grpc_executor.execute_workflow(config, pool)
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+
+def bench_aio(config, workflows: int, concurrency: int) -> float:
+    start = time.perf_counter()
+    results = aio_executor.execute_workflows([config] * workflows, max_concurrent=concurrency)
+    elapsed = time.perf_counter() - start
+    if not all(results):
+        raise SystemExit(f"{results.count(False)} asyncio workflows failed")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark orchestrator execution backends")
+    parser.add_argument("--workflows", type=int, default=300)
+    parser.add_argument("--sync-workflows", type=int, default=30,
+                        help="The blocking executor is slow; run fewer workflows for it")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--delay-ms", type=float, default=10.0, help="Simulated work per node")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    servers, registry = start_standin_services(delay_seconds=args.delay_ms / 1000)
+    config = make_linear_config(registry)
+    try:
+        print(f"{'backend':>22} {'workflows':>10} {'seconds':>9} {'workflows/s':>12}")
+        elapsed = bench_sync(config, args.sync_workflows)
+        print(f"{'grpc_executor (sync)':>22} {args.sync_workflows:>10} {elapsed:>9.2f} "
+              f"{args.sync_workflows / elapsed:>12.1f}")
+        for concurrency in args.concurrency:
+            elapsed = bench_aio(config, args.workflows, concurrency)
+            label = f"aio x{concurrency}"
+            print(f"{label:>22} {args.workflows:>10} {elapsed:>9.2f} {args.workflows / elapsed:>12.1f}")
+    finally:
+        for server in servers:
+            server.stop(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# benchmarks/bench_pipeline.py
+#
+# End-to-end pipeline benchmark: runs the real generator, analyzer and
+# reporter as local subprocesses, drives grpc_executor.execute_workflow over
+# synthetic datasets of increasing size, and records total and per-stage
+# latency, rows/s and peak RSS (from the services' metrics metadata).
+# Results are saved as JSON so runs from different commits can be compared.
+#
+# Usage:
+#   python benchmarks/bench_pipeline.py --output results/main.json
+#   python benchmarks/bench_pipeline.py --sizes 100000 1000000 --handoff memory --output new.json \
+#       --compare results/main.json --fail-on-regression
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from local_services import ROOT_DIR, local_services, make_pipeline_config
+
+import grpc_executor
+from channel_pool import ChannelPool
+from run_metrics import RunTimings
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# Relative slowdown (or memory growth) reported as a regression by --compare
+DEFAULT_THRESHOLD = 0.10
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+
+    try:
+        return git("rev-parse", "HEAD") or None, bool(git("status", "--porcelain", "--untracked-files=no"))
+    except OSError:
+        return None, False
+
+
+def run_once(config, pool: ChannelPool) -> dict:
+    timings = RunTimings(config["workflow_name"])
+    # execute_workflow prints a line per node and the timing table; keep the output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        succeeded = grpc_executor.execute_workflow(config, pool, timings)
+    run = timings.as_dict()
+    if not succeeded:
+        raise SystemExit(f"Workflow {config['workflow_name']} failed; see the service logs")
+    return run
+
+
+def summarize(rows: int, runs) -> dict:
+    """Reduces repeated runs of one dataset size to medians (peak RSS: maximum)."""
+    totals = [run["wall_seconds"] for run in runs]
+    stages = {}
+    for node_id in [call["node"] for call in runs[0]["nodes"]]:
+        calls = [call for run in runs for call in run["nodes"] if call["node"] == node_id]
+        server_seconds = statistics.median(call.get("server_ms", 0.0) / 1000 for call in calls)
+        stage_rows = calls[0].get("rows", 0)
+        stages[node_id] = {
+            "wall_seconds": statistics.median(call["wall_seconds"] for call in calls),
+            "server_seconds": server_seconds,
+            "rows": stage_rows,
+            "rows_per_second": stage_rows / server_seconds if server_seconds else None,
+            "bytes_read": calls[0].get("bytes_read", 0),
+            "bytes_written": calls[0].get("bytes_written", 0),
+            "peak_rss_mb": max(call.get("peak_rss_bytes", 0) for call in calls) / 1e6,
+        }
+    total_seconds = statistics.median(totals)
+    return {
+        "rows": rows,
+        "total_seconds": total_seconds,
+        "total_seconds_runs": totals,
+        "rows_per_second": rows / total_seconds,
+        "stages": stages,
+    }
+
+
+def print_case(case: dict):
+    print(f"\n{case['rows']:,} rows: {case['total_seconds']:.3f}s total, {case['rows_per_second']:,.0f} rows/s")
+    print(f"  {'stage':<20} {'wall s':>8} {'server s':>9} {'rows/s':>12} {'peak RSS MB':>11}")
+    for node_id, stage in case["stages"].items():
+        rate = f"{stage['rows_per_second']:,.0f}" if stage["rows_per_second"] else "-"
+        print(f"  {node_id:<20} {stage['wall_seconds']:>8.3f} {stage['server_seconds']:>9.3f} "
+              f"{rate:>12} {stage['peak_rss_mb']:>11.1f}")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Prints the change against 'baseline' per dataset size and stage; returns the number of regressions."""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    if baseline.get("settings") != results["settings"]:
+        print(f"  note: the baseline ran with different settings: {baseline.get('settings')}")
+    print(f"  {'rows':>10} {'stage':<20} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}")
+    baseline_cases = {case["rows"]: case for case in baseline["cases"]}
+    regressions = 0
+
+    def row(rows, stage, metric, old, new):
+        nonlocal regressions
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {rows:>10,} {stage:<20} {metric:<15} {old:>10.3f} {new:>10.3f} {change:>+8.1%}{flag}")
+
+    for case in results["cases"]:
+        old_case = baseline_cases.get(case["rows"])
+        if old_case is None:
+            continue
+        row(case["rows"], "total", "seconds", old_case["total_seconds"], case["total_seconds"])
+        for node_id, stage in case["stages"].items():
+            old_stage = old_case["stages"].get(node_id)
+            if old_stage is None:
+                continue
+            row(case["rows"], node_id, "server seconds", old_stage["server_seconds"], stage["server_seconds"])
+            row(case["rows"], node_id, "peak RSS MB", old_stage["peak_rss_mb"], stage["peak_rss_mb"])
+    print(f"  {regressions} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generator -> analyzer -> reporter pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Rows per dataset")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per size; medians are reported")
+    parser.add_argument("--warmup", type=int, default=1, help="Unrecorded runs at the smallest size")
+    parser.add_argument("--handoff", choices=grpc_executor.HANDOFF_MODES, default="file")
+    parser.add_argument("--streaming", action="store_true", help="Use the ExecuteStream RPC")
+    parser.add_argument("--chunk-rows", type=int, help="Run the analyzer in chunked mode")
+    parser.add_argument("--data-dir", help="Directory for the pipeline's files (default: a temporary one)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when --compare finds a regression")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.makedirs(data_dir, exist_ok=True)
+    commit, dirty = git_revision()
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": commit,
+        "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"handoff": args.handoff, "streaming": args.streaming, "chunk_rows": args.chunk_rows,
+                     "repeats": args.repeats},
+        "cases": [],
+    }
+
+    pool = ChannelPool()
+    with local_services(log_dir=data_dir) as registry:
+        print(f"Services: {registry} (logs in {data_dir})")
+        make = lambda rows: make_pipeline_config(registry, data_dir, rows, args.handoff,
+                                                 args.streaming, args.chunk_rows)
+        for _ in range(args.warmup):
+            run_once(make(min(args.sizes)), pool)
+        for rows in args.sizes:
+            runs = [run_once(make(rows), pool) for _ in range(args.repeats)]
+            case = summarize(rows, runs)
+            reported = case["stages"].get("report-generator", {}).get("rows")
+            if reported != rows:
+                raise SystemExit(f"The report has {reported} rows, expected {rows}")
+            results["cases"].append(case)
+            print_case(case)
+    pool.close()
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
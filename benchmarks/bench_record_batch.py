@@ -0,0 +1,147 @@
+# benchmarks/bench_record_batch.py
+#
+# Measures what one analyzed record costs in each form the pipeline can hold
+# it in: parsed protobuf message objects, per-row dicts, the reporter's
+# DataFrame, a RecordBatch and the two wire layouts. Also times the bulk
+# RecordBatch conversions against the message-object path (one add() or
+# attribute read per field and record) and checks that both produce the same
+# bytes and records.
+#
+# Message memory is measured as RSS growth, as protobuf allocates outside the
+# Python heap, so it needs Linux (/proc/self/statm); it is skipped elsewhere.
+#
+# Usage:
+#   python benchmarks/bench_record_batch.py
+#   python benchmarks/bench_record_batch.py --rows 2000000
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from bench_analyzer_encoding import make_frame
+from generated import energy_pb2
+from src.common.record_batch import RecordBatch
+from src.common.report_codec import iter_row_record_batches, timestamp_strings
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def rss_growth(build):
+    """Returns (result of build(), bytes the process grew by while building it)."""
+    gc.collect()
+    before = current_rss()
+    result = build()
+    after = current_rss()
+    return result, (after - before if before is not None else None)
+
+
+def python_heap_growth(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def encode_with_messages(df) -> bytes:
+    # One ProcessedEnergyReport per record, filled from column lists
+    report_data = energy_pb2.ProcessedDataReport()
+    add_item = report_data.processed.add
+    for timestamp, household_id, power, efficiency, anomaly_detected in zip(
+            timestamp_strings(df['timestamp']).tolist(), df['household_id'].astype(str).tolist(),
+            df['power_consumption'].tolist(), df['efficiency'].tolist(), df['anomaly_detected'].tolist()):
+        add_item(timestamp=timestamp, household_id=household_id, power=power, efficiency=efficiency,
+                 anomaly_detected=anomaly_detected)
+    return report_data.SerializeToString()
+
+
+def decode_with_messages(payload: bytes) -> pd.DataFrame:
+    # Parse into message objects, then read every field of every record
+    items = energy_pb2.ProcessedDataReport.FromString(payload).processed
+    return pd.DataFrame({
+        'timestamp': [item.timestamp for item in items],
+        'household_id': [item.household_id for item in items],
+        'power': [item.power for item in items],
+        'efficiency': [item.efficiency for item in items],
+        'anomaly_detected': [item.anomaly_detected for item in items],
+    })
+
+
+def decode_with_batches(payload: bytes) -> pd.DataFrame:
+    frames = [batch.to_frame() for batch in iter_row_record_batches(payload, 0, len(payload))]
+    return pd.concat(frames, ignore_index=True)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RecordBatch in-memory record form")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    rows = args.rows
+
+    df = make_frame(rows)
+    batch = RecordBatch.from_frame(df)
+    payload = batch.processed_report_bytes()
+
+    def parse_messages():
+        items = energy_pb2.ProcessedDataReport.FromString(payload).processed
+        # Touch every record, as reading its fields does
+        return items, list(items)
+
+    messages, message_bytes = rss_growth(parse_messages)
+    del messages
+    frame = batch.to_frame()
+    dicts, dict_bytes = python_heap_growth(lambda: frame.to_dict('records'))
+    del dicts
+
+    print(f"{rows:,} records, {len(batch.households):,} households, {os.cpu_count()} CPUs\n")
+    print(f"{'form':<32} {'bytes/record':>13}")
+    sizes = [
+        ("protobuf message objects", message_bytes),
+        ("per-row dicts", dict_bytes),
+        ("reporter DataFrame", int(frame.memory_usage(deep=True).sum())),
+        ("RecordBatch", batch.nbytes),
+        ("wire: ProcessedDataReport", len(payload)),
+        ("wire: ColumnarDataReport", len(batch.columnar_report_bytes())),
+    ]
+    for name, size in sizes:
+        print(f"{name:<32} {size / rows if size is not None else float('nan'):>13.1f}")
+
+    message_payload, message_encode = timed(encode_with_messages, df)
+    (batch, batch_payload), batch_encode = timed(lambda: (lambda b: (b, b.processed_report_bytes()))(
+        RecordBatch.from_frame(df)))
+    if batch_payload != message_payload:
+        raise SystemExit("RecordBatch.processed_report_bytes() differs from the protobuf encoding")
+    message_frame, message_decode = timed(decode_with_messages, payload)
+    batch_frame, batch_decode = timed(decode_with_batches, payload)
+    if not (np.array_equal(message_frame['power'].to_numpy(np.float32), batch_frame['power'].to_numpy())
+            and message_frame['household_id'].tolist() == batch_frame['household_id'].tolist()
+            and message_frame['anomaly_detected'].tolist() == batch_frame['anomaly_detected'].tolist()):
+        raise SystemExit("Decoded records differ")
+
+    print(f"\n{'ProcessedDataReport':<32} {'messages rec/s':>15} {'RecordBatch rec/s':>18} {'speedup':>8}")
+    for name, old, new in (("encode (DataFrame -> bytes)", message_encode, batch_encode),
+                           ("decode (bytes -> DataFrame)", message_decode, batch_decode)):
+        print(f"{name:<32} {rows / old:>15,.0f} {rows / new:>18,.0f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# benchmarks/bench_report_formats.py
+#
+# Compares the row-oriented ProcessedDataReport with the columnar
+# ColumnarDataReport: serialized size, encode time and parse time (bytes ->
+# reporter DataFrame).
+#
+# Usage:
+#   python benchmarks/bench_report_formats.py
+#   python benchmarks/bench_report_formats.py --sizes 10000 100000
+
+import argparse
+import time
+
+from bench_analyzer_encoding import make_frame
+from src.common.report_codec import REPORT_FORMATS, parse_report, serialize_report
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyzer report wire formats")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'format':>9} {'bytes/row':>10} {'encode s':>9} {'parse s':>9} {'parse rec/s':>13}")
+    for rows in args.sizes:
+        df = make_frame(rows)
+        for report_format in REPORT_FORMATS:
+            start = time.perf_counter()
+            payload = serialize_report(df, report_format)
+            encode_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            parsed = parse_report(payload)
+            parse_seconds = time.perf_counter() - start
+
+            if len(parsed) != rows:
+                raise SystemExit(f"{report_format} round trip lost rows at {rows}")
+            print(f"{rows:>10} {report_format:>9} {len(payload) / rows:>10.1f} "
+                  f"{encode_seconds:>9.3f} {parse_seconds:>9.3f} {rows / parse_seconds:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
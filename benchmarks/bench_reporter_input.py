@@ -0,0 +1,87 @@
+# benchmarks/bench_reporter_input.py
+#
+# Compares the reporter's old way of reading analysis_output.pb (f.read(),
+# ParseFromString() on the whole message, one DataFrame of every row) with
+# the memory-mapped reader that decodes records in batches. The input is
+# written and each mode is run in its own process, so the peak RSS figures
+# (which Linux carries across exec) do not mix.
+#
+# Usage:
+#   python benchmarks/bench_reporter_input.py
+#   python benchmarks/bench_reporter_input.py --rows 5000000 --format columnar
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Make the wp31_services packages importable the same way the containers do
+SERVICES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "wp31_services"))
+sys.path.insert(0, os.path.join(SERVICES_DIR, "generated"))
+sys.path.insert(0, SERVICES_DIR)
+
+from src.common.report_codec import REPORT_FORMATS, ROW_FORMAT, iter_report_file, parse_report, serialize_report
+
+DEFAULT_ROWS = 2_000_000
+MODES = ("read", "mmap")
+
+
+def write_input(path: str, rows: int, report_format: str):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_analyzer_encoding import make_frame
+
+    with open(path, "wb") as f:
+        f.write(serialize_report(make_frame(rows), report_format))
+
+
+def run_mode(mode: str, path: str):
+    # Decodes the report into the reporter's DataFrame(s)
+    start = time.perf_counter()
+    rows = 0
+    if mode == "read":
+        with open(path, "rb") as f:
+            rows = len(parse_report(f.read()))
+    else:
+        for df in iter_report_file(path):
+            rows += len(df)
+    seconds = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode} {rows} {seconds} {peak_mb}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reporter's protobuf input reading")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--format", choices=REPORT_FORMATS, default=ROW_FORMAT)
+    parser.add_argument("--mode", choices=MODES + ("write",), help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode == "write":
+        write_input(args.path, args.rows, args.format)
+        return
+    if args.mode:
+        run_mode(args.mode, args.path)
+        return
+
+    path = os.path.join(tempfile.mkdtemp(), "analysis_output.pb")
+    subprocess.run([sys.executable, __file__, "--mode", "write", "--path", path,
+                    "--rows", str(args.rows), "--format", args.format], check=True)
+    print(f"{args.rows:,} rows, {args.format} layout, {os.path.getsize(path) / 1e6:,.1f} MB")
+
+    print(f"{'mode':>6} {'seconds':>8} {'rows/s':>12} {'peak MB':>9}")
+    for mode in MODES:
+        output = subprocess.run([sys.executable, __file__, "--mode", mode, "--path", path],
+                                check=True, capture_output=True, text=True).stdout.split()
+        rows, seconds, peak_mb = int(output[1]), float(output[2]), float(output[3])
+        if rows != args.rows:
+            raise SystemExit(f"{mode} decoded {rows} rows, expected {args.rows}")
+        print(f"{mode:>6} {seconds:>8.2f} {rows / seconds:>12,.0f} {peak_mb:>9.0f}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_stage_formats.py
+#
+# Compares the generator -> analyzer hand-off formats: CSV parsed with
+# pd.read_csv against memory-mapped Arrow IPC and Parquet read with the
+# analyzer's column projection. Reports file size and the time to get the
+# analyzer's input DataFrame.
+#
+# Usage:
+#   python benchmarks/bench_stage_formats.py
+#   python benchmarks/bench_stage_formats.py --rows 10000000 --dir /data
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Make the wp31_services packages importable the same way the containers do
+SERVICES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "wp31_services"))
+sys.path.insert(0, os.path.join(SERVICES_DIR, "generated"))
+sys.path.insert(0, SERVICES_DIR)
+
+from energy_analyzer.stage import INPUT_COLUMNS
+from energy_generator.synthetic import iter_chunk_columns, iter_csv_chunks, parse_settings, to_record_batch
+from src.common.table_io import ARROW_FORMAT, PARQUET_FORMAT, TableWriter, iter_input_frames
+
+DEFAULT_ROWS = 3_000_000
+
+
+def write_inputs(settings, directory: str):
+    paths = {"csv": os.path.join(directory, "energy_data.csv")}
+    with open(paths["csv"], "wb") as f:
+        for _, data in iter_csv_chunks(settings):
+            f.write(data)
+    for fmt in (ARROW_FORMAT, PARQUET_FORMAT):
+        paths[fmt] = os.path.join(directory, f"energy_data.{fmt}")
+        with open(paths[fmt], "wb") as f:
+            writer = TableWriter(f, fmt)
+            for columns in iter_chunk_columns(settings):
+                writer.write(to_record_batch(settings, columns))
+            writer.close()
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV, Arrow IPC and Parquet stage inputs")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--dir", help="Directory for the test files (default: a temporary one)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp()
+    settings = parse_settings({"rows": str(args.rows), "households": "10000",
+                               "span_seconds": str(30 * 86_400), "seed": "1"})
+    paths = write_inputs(settings, directory)
+
+    print(f"{'format':>8} {'MB':>8} {'read s':>8} {'rows/s':>14}")
+    for fmt, path in paths.items():
+        start = time.perf_counter()
+        with open(path, "rb") as source:
+            df = pd.concat(list(iter_input_frames(source, INPUT_COLUMNS)), ignore_index=True)
+        seconds = time.perf_counter() - start
+        if len(df) != args.rows:
+            raise SystemExit(f"{fmt} read {len(df)} rows, expected {args.rows}")
+        print(f"{fmt:>8} {os.path.getsize(path) / 1e6:>8.1f} {seconds:>8.3f} {args.rows / seconds:>14,.0f}")
+
+    if not args.dir:
+        for path in paths.values():
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# benchmarks/bench_startup.py
+#
+# Cold start of each WP 3.1 service: a fresh process per run, measured from
+# spawn until it listens, until its gRPC health check reports SERVING, and the
+# latency of a tiny first request after that. Also records the time to import
+# the server module alone and the process RSS once it serves. Runs every
+# service in each start-up mode (STARTUP_MODE eager / lazy, with and without
+# WARMUP_REQUEST). Results are saved as JSON so runs from different commits can
+# be compared, like bench_pipeline.py.
+#
+# Usage:
+#   python benchmarks/bench_startup.py --output results/startup.json
+#   python benchmarks/bench_startup.py --repeats 10 --output new.json --compare results/startup.json \
+#       --fail-on-regression
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import grpc
+
+from local_services import SERVICE_MODULES, SERVICES_DIR, start_service, stop_services
+from bench_pipeline import git_revision
+
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+from proto import energy_pipeline_pb2, energy_pipeline_pb2_grpc
+
+RESULTS_VERSION = 1
+# Start-up timings are noisier than the pipeline's; smaller changes are not flagged
+DEFAULT_THRESHOLD = 0.25
+
+# Between health checks while a service starts; faster polling competes with
+# the stage import for the CPU
+HEALTH_POLL_SECONDS = 0.05
+
+# Mode name -> service environment
+MODES = {
+    "eager": {"STARTUP_MODE": "eager"},
+    "lazy": {"STARTUP_MODE": "lazy"},
+    "lazy+warmup": {"STARTUP_MODE": "lazy", "WARMUP_REQUEST": "1"},
+}
+
+METRICS = ("import_seconds", "listen_seconds", "serving_seconds", "first_call_seconds", "rss_mb")
+
+
+# A one-record analyzer report for the reporter's first request. It is encoded
+# with the services' own protobuf module, which cannot be loaded next to the
+# orchestrator's (both define the same message names).
+_REPORT_CODE = (
+    "import sys\n"
+    "from generated import energy_pb2\n"
+    "record = energy_pb2.ProcessedEnergyReport(timestamp='2025-01-01T00:00:00Z', household_id='H1',\n"
+    "                                          power=120.5, efficiency=0.437)\n"
+    "sys.stdout.buffer.write(energy_pb2.ProcessedDataReport(processed=[record]).SerializeToString())\n"
+)
+
+
+def run_in_services(code: str) -> bytes:
+    # Runs 'code' in a fresh interpreter set up like a service process
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SERVICES_DIR, os.path.join(SERVICES_DIR, "generated")]))
+    return subprocess.run([sys.executable, "-c", code], cwd=SERVICES_DIR, env=env, check=True,
+                          capture_output=True).stdout
+
+
+def first_requests():
+    # The smallest request each stage handles entirely in memory
+    csv = (b"timestamp,household_id,power_consumption,voltage,current\n"
+           b"2025-01-01T00:00:00Z,H1,120.5,230.0,1.2\n")
+    return {
+        "energy-generator": energy_pipeline_pb2.ExecuteRequest(parameters={"rows": "10"}, return_payload=True),
+        "energy-analyzer": energy_pipeline_pb2.ExecuteRequest(input_payload=csv, return_payload=True),
+        "report-generator": energy_pipeline_pb2.ExecuteRequest(input_payload=run_in_services(_REPORT_CODE),
+                                                               return_payload=True),
+    }
+
+
+def import_seconds(module: str) -> float:
+    # The server module alone, in a fresh interpreter
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    return float(run_in_services(code).split()[-1])
+
+
+def process_rss_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def start_once(node_id: str, env, request) -> dict:
+    started = time.perf_counter()
+    process, port = start_service(SERVICE_MODULES[node_id], env=env)
+    try:
+        listening = time.perf_counter() - started
+        with grpc.insecure_channel(f"localhost:{port}") as channel:
+            health = health_pb2_grpc.HealthStub(channel)
+            while health.Check(health_pb2.HealthCheckRequest()).status != health_pb2.HealthCheckResponse.SERVING:
+                time.sleep(HEALTH_POLL_SECONDS)
+            serving = time.perf_counter() - started
+
+            call_started = time.perf_counter()
+            response = energy_pipeline_pb2_grpc.ContainerExecutorStub(channel).Execute(request, timeout=60)
+            first_call = time.perf_counter() - call_started
+            if not response.success:
+                raise SystemExit(f"{node_id}: first request failed: {response.message}")
+        return {"listen_seconds": listening, "serving_seconds": serving, "first_call_seconds": first_call,
+                "rss_mb": process_rss_mb(process.pid)}
+    finally:
+        stop_services([process])
+
+
+def median(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Prints the change against 'baseline' per service and mode; returns the number of regressions."""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    print(f"  {'service':<18} {'mode':<12} {'metric':<18} {'baseline':>9} {'current':>9} {'change':>8}")
+    baseline_cases = {(case["service"], case["mode"]): case for case in baseline["cases"]}
+    regressions = 0
+    for case in results["cases"]:
+        old_case = baseline_cases.get((case["service"], case["mode"]))
+        if old_case is None:
+            continue
+        for metric in METRICS:
+            old, new = old_case.get(metric), case.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"  {case['service']:<18} {case['mode']:<12} {metric:<18} {old:>9.3f} {new:>9.3f} "
+                  f"{change:>+8.1%}{flag}")
+    print(f"  {regressions} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the WP 3.1 services")
+    parser.add_argument("--services", nargs="+", choices=list(SERVICE_MODULES), default=list(SERVICE_MODULES))
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--repeats", type=int, default=5, help="Starts per service and mode; medians are reported")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when --compare finds a regression")
+    args = parser.parse_args()
+
+    commit, dirty = git_revision()
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": commit,
+        "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"repeats": args.repeats},
+        "cases": [],
+    }
+
+    requests = first_requests()
+    print(f"Cold start, medians of {args.repeats} starts, {os.cpu_count()} CPUs\n")
+    print(f"{'service':<18} {'mode':<12} {'import s':>9} {'listen s':>9} {'serving s':>10} {'1st call s':>11} "
+          f"{'RSS MB':>7}")
+    for node_id in args.services:
+        imported = median([import_seconds(SERVICE_MODULES[node_id]) for _ in range(args.repeats)])
+        for mode in args.modes:
+            runs = [start_once(node_id, MODES[mode], requests[node_id]) for _ in range(args.repeats)]
+            case = {"service": node_id, "mode": mode, "import_seconds": imported}
+            case.update({metric: median([run[metric] for run in runs]) for metric in METRICS[1:]})
+            results["cases"].append(case)
+            rss = f"{case['rss_mb']:.0f}" if case["rss_mb"] is not None else "-"
+            print(f"{node_id:<18} {mode:<12} {imported:>9.3f} {case['listen_seconds']:>9.3f} "
+                  f"{case['serving_seconds']:>10.3f} {case['first_call_seconds']:>11.3f} {rss:>7}")
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
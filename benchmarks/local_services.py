@@ -0,0 +1,121 @@
+# benchmarks/local_services.py
+#
+# Runs the real WP 3.1 services (generator, analyzer, reporter) as local
+# subprocesses on ephemeral ports, so benchmarks measure the actual analyzer
+# and reporter code paths end to end. Each service is its own process, which
+# keeps the peak RSS it reports separate from the orchestrator's.
+
+import contextlib
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVICES_DIR = os.path.join(ROOT_DIR, "wp31_services")
+sys.path.insert(0, os.path.join(ROOT_DIR, "src", "orchestrator"))
+sys.path.insert(0, ROOT_DIR)
+
+# Node ID -> module whose build_server(port) starts the service
+SERVICE_MODULES = {
+    "energy-generator": "energy_generator.server",
+    "energy-analyzer": "energy_analyzer.server",
+    "report-generator": "report_generator.server",
+}
+
+# Started in each subprocess: bind port 0 and report the port the OS picked
+_LAUNCHER = (
+    "import importlib, sys\n"
+    "server, port = importlib.import_module(sys.argv[1]).build_server(0)\n"
+    "print(port, flush=True)\n"
+    "server.wait_for_termination()\n"
+)
+
+
+def start_service(module: str, log_path: str = os.devnull, env=None):
+    """Starts one service subprocess and returns (process, port) once it listens."""
+    service_env = dict(os.environ)
+    service_env["PYTHONPATH"] = os.pathsep.join([SERVICES_DIR, os.path.join(SERVICES_DIR, "generated")])
+    # Ephemeral gRPC ports would make the default metrics ports collide
+    service_env.setdefault("METRICS_PORT", "0")
+    service_env.update(env or {})
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen([sys.executable, "-c", _LAUNCHER, module], cwd=SERVICES_DIR,
+                                   env=service_env, stdout=subprocess.PIPE, stderr=log)
+    line = process.stdout.readline()
+    if not line.strip():
+        process.kill()
+        raise RuntimeError(f"{module} exited before listening; see {log_path}")
+    return process, int(line)
+
+
+def stop_services(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@contextlib.contextmanager
+def local_services(log_dir: str = None, env=None):
+    """
+    Runs every service as a subprocess and yields the orchestrator's
+    'service_registry' for them. Service logs go to '<log_dir>/<node>.log'.
+    """
+    processes = []
+    registry = {}
+    try:
+        for node_id, module in SERVICE_MODULES.items():
+            log_path = os.path.join(log_dir, f"{node_id}.log") if log_dir else os.devnull
+            process, port = start_service(module, log_path, env)
+            processes.append(process)
+            registry[node_id] = f"localhost:{port}"
+        yield registry
+    finally:
+        stop_services(processes)
+
+
+def make_pipeline_config(registry, data_dir: str, rows: int, handoff: str = "file",
+                         streaming: bool = False, chunk_rows: int = None, timeout_seconds: int = 3600):
+    """
+    Builds the generator -> analyzer -> reporter workflow over 'rows' synthetic
+    rows, writing its files to 'data_dir'. 'handoff' applies to both edges.
+    """
+    analyzer_parameters = {"chunk_rows": chunk_rows} if chunk_rows else {}
+    return {
+        "workflow_name": f"pipeline-{rows}",
+        "start_node": "energy-generator",
+        "service_registry": dict(registry),
+        "containers": {
+            "energy-generator": {
+                "id": "energy-generator",
+                "input_file": os.path.join(data_dir, "unused"),
+                "output_file": os.path.join(data_dir, "energy_data.csv"),
+                "next_node": "energy-analyzer",
+                "handoff": handoff,
+                "streaming": streaming,
+                "timeout_seconds": timeout_seconds,
+                "parameters": {"rows": rows, "households": 10_000, "span_seconds": 30 * 86_400, "seed": 1},
+            },
+            "energy-analyzer": {
+                "id": "energy-analyzer",
+                "input_file": os.path.join(data_dir, "energy_data.csv"),
+                "output_file": os.path.join(data_dir, "analysis_output.pb"),
+                "next_node": "report-generator",
+                "handoff": handoff,
+                "streaming": streaming,
+                "timeout_seconds": timeout_seconds,
+                "parameters": analyzer_parameters,
+            },
+            "report-generator": {
+                "id": "report-generator",
+                "input_file": os.path.join(data_dir, "analysis_output.pb"),
+                "output_file": os.path.join(data_dir, "energy_report.csv"),
+                "next_node": None,
+                "streaming": streaming,
+                "timeout_seconds": timeout_seconds,
+            },
+        },
+    }
@@ -0,0 +1,66 @@
+# benchmarks/standin_services.py
+#
+# Local stand-ins for the WP 3.1 services: in-process gRPC servers on ephemeral
+# ports that implement the ContainerExecutor contract and just sleep for a
+# fixed time instead of touching any files. They let orchestrator benchmarks
+# measure scheduling overhead without real data.
+
+import os
+import sys
+import time
+from concurrent import futures
+
+import grpc
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src", "orchestrator"))
+sys.path.insert(0, ROOT_DIR)
+
+from proto import energy_pipeline_pb2, energy_pipeline_pb2_grpc
+
+NODE_IDS = ["energy-generator", "energy-analyzer", "report-generator"]
+
+
+class StandInServicer(energy_pipeline_pb2_grpc.ContainerExecutorServicer):
+    def __init__(self, name: str, delay_seconds: float):
+        self.name = name
+        self.delay_seconds = delay_seconds
+
+    def Execute(self, request, context):
+        time.sleep(self.delay_seconds)
+        return energy_pipeline_pb2.ExecuteResponse(
+            success=True, message=f"{self.name} done", output_payload=request.input_payload)
+
+    def ExecuteStream(self, request, context):
+        response = self.Execute(request, context)
+        yield energy_pipeline_pb2.ExecuteProgress(
+            done=True, success=True, message=response.message, output_payload=response.output_payload)
+
+
+def start_standin_services(delay_seconds: float = 0.01, max_workers: int = 256):
+    """Starts one stand-in server per pipeline node; returns (servers, service_registry)."""
+    servers = []
+    registry = {}
+    for node_id in NODE_IDS:
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+        energy_pipeline_pb2_grpc.add_ContainerExecutorServicer_to_server(
+            StandInServicer(node_id, delay_seconds), server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        servers.append(server)
+        registry[node_id] = f"127.0.0.1:{port}"
+    return servers, registry
+
+
+def make_linear_config(registry, timeout_seconds: int = 30):
+    """Three-node pipeline config pointing at the stand-in services."""
+    containers = {}
+    for index, node_id in enumerate(NODE_IDS):
+        containers[node_id] = {
+            "id": node_id,
+            "input_file": f"/standin/{node_id}.in",
+            "output_file": f"/standin/{node_id}.out",
+            "next_node": NODE_IDS[index + 1] if index + 1 < len(NODE_IDS) else None,
+            "timeout_seconds": timeout_seconds,
+        }
+    return {"start_node": NODE_IDS[0], "service_registry": dict(registry), "containers": containers}
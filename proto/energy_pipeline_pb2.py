@@ -2,7 +2,7 @@
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # NO CHECKED-IN PROTOBUF GENCODE
 # source: energy_pipeline.proto
-# Protobuf Python Version: 6.31.0
+# Protobuf Python Version: 6.31.1
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
@@ -13,7 +13,7 @@ _runtime_version.ValidateProtobufRuntimeVersion(
     _runtime_version.Domain.PUBLIC,
     6,
     31,
-    0,
+    1,
     '',
     'energy_pipeline.proto'
 )
@@ -24,17 +24,27 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x15\x65nergy_pipeline.proto\"9\n\x0e\x45xecuteRequest\x12\x12\n\ninput_file\x18\x01 \x01(\t\x12\x13\n\x0boutput_file\x18\x02 \x01(\t\"3\n\x0f\x45xecuteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2A\n\x11\x43ontainerExecutor\x12,\n\x07\x45xecute\x12\x0f.ExecuteRequest\x1a\x10.ExecuteResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x15\x65nergy_pipeline.proto\"\xfd\x01\n\x0e\x45xecuteRequest\x12\x12\n\ninput_file\x18\x01 \x01(\t\x12\x13\n\x0boutput_file\x18\x02 \x01(\t\x12\x33\n\nparameters\x18\x03 \x03(\x0b\x32\x1f.ExecuteRequest.ParametersEntry\x12\x15\n\rinput_payload\x18\x04 \x01(\x0c\x12\x16\n\x0ereturn_payload\x18\x05 \x01(\x08\x12\x13\n\x0binput_files\x18\x06 \x03(\t\x12\x16\n\x0einput_payloads\x18\x07 \x03(\x0c\x1a\x31\n\x0fParametersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"c\n\x0f\x45xecuteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x16\n\x0eoutput_payload\x18\x03 \x01(\x0c\x12\x16\n\x0erows_processed\x18\x04 \x01(\x03\"\x8b\x01\n\x0f\x45xecuteProgress\x12\x16\n\x0erows_processed\x18\x01 \x01(\x03\x12\x18\n\x10\x63hunks_processed\x18\x02 \x01(\x05\x12\x0c\n\x04\x64one\x18\x03 \x01(\x08\x12\x0f\n\x07success\x18\x04 \x01(\x08\x12\x0f\n\x07message\x18\x05 \x01(\t\x12\x16\n\x0eoutput_payload\x18\x06 \x01(\x0c\"J\n\x13\x45xecuteBatchRequest\x12\x1d\n\x04jobs\x18\x01 \x03(\x0b\x32\x0f.ExecuteRequest\x12\x14\n\x0cmax_parallel\x18\x02 \x01(\x05\"G\n\x12\x45xecuteBatchResult\x12\r\n\x05index\x18\x01 \x01(\x05\x12\"\n\x08response\x18\x02 \x01(\x0b\x32\x10.ExecuteResponse2\xb4\x01\n\x11\x43ontainerExecutor\x12,\n\x07\x45xecute\x12\x0f.ExecuteRequest\x1a\x10.ExecuteResponse\x12\x34\n\rExecuteStream\x12\x0f.ExecuteRequest\x1a\x10.ExecuteProgress0\x01\x12;\n\x0c\x45xecuteBatch\x12\x14.ExecuteBatchRequest\x1a\x13.ExecuteBatchResult0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'energy_pipeline_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_EXECUTEREQUEST']._serialized_start=25
-  _globals['_EXECUTEREQUEST']._serialized_end=82
-  _globals['_EXECUTERESPONSE']._serialized_start=84
-  _globals['_EXECUTERESPONSE']._serialized_end=135
-  _globals['_CONTAINEREXECUTOR']._serialized_start=137
-  _globals['_CONTAINEREXECUTOR']._serialized_end=202
+  _globals['_EXECUTEREQUEST_PARAMETERSENTRY']._loaded_options = None
+  _globals['_EXECUTEREQUEST_PARAMETERSENTRY']._serialized_options = b'8\001'
+  _globals['_EXECUTEREQUEST']._serialized_start=26
+  _globals['_EXECUTEREQUEST']._serialized_end=279
+  _globals['_EXECUTEREQUEST_PARAMETERSENTRY']._serialized_start=230
+  _globals['_EXECUTEREQUEST_PARAMETERSENTRY']._serialized_end=279
+  _globals['_EXECUTERESPONSE']._serialized_start=281
+  _globals['_EXECUTERESPONSE']._serialized_end=380
+  _globals['_EXECUTEPROGRESS']._serialized_start=383
+  _globals['_EXECUTEPROGRESS']._serialized_end=522
+  _globals['_EXECUTEBATCHREQUEST']._serialized_start=524
+  _globals['_EXECUTEBATCHREQUEST']._serialized_end=598
+  _globals['_EXECUTEBATCHRESULT']._serialized_start=600
+  _globals['_EXECUTEBATCHRESULT']._serialized_end=671
+  _globals['_CONTAINEREXECUTOR']._serialized_start=674
+  _globals['_CONTAINEREXECUTOR']._serialized_end=854
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: workflow_scheduler.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'workflow_scheduler.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x18workflow_scheduler.proto\"f\n\x10SubmitRunRequest\x12\x13\n\x0b\x63onfig_json\x18\x01 \x01(\t\x12\x13\n\x0b\x63onfig_path\x18\x02 \x01(\t\x12\x16\n\x0eoverrides_json\x18\x03 \x01(\t\x12\x10\n\x08priority\x18\x04 \x01(\x05\"3\n\x11SubmitRunResponse\x12\x0e\n\x06run_id\x18\x01 \x01(\t\x12\x0e\n\x06queued\x18\x02 \x01(\x05\"\x1c\n\nRunRequest\x12\x0e\n\x06run_id\x18\x01 \x01(\t\"\xa4\x02\n\tRunStatus\x12\x0e\n\x06run_id\x18\x01 \x01(\t\x12\x1f\n\x05state\x18\x02 \x01(\x0e\x32\x10.RunStatus.State\x12\x15\n\rworkflow_name\x18\x03 \x01(\t\x12\x10\n\x08priority\x18\x04 \x01(\x05\x12\x0f\n\x07message\x18\x05 \x01(\t\x12\x14\n\x0csubmitted_at\x18\x06 \x01(\x01\x12\x12\n\nstarted_at\x18\x07 \x01(\x01\x12\x13\n\x0b\x66inished_at\x18\x08 \x01(\x01\x12\x14\n\x0ctimings_json\x18\t \x01(\t\"W\n\x05State\x12\x0b\n\x07UNKNOWN\x10\x00\x12\n\n\x06QUEUED\x10\x01\x12\x0b\n\x07RUNNING\x10\x02\x12\r\n\tSUCCEEDED\x10\x03\x12\n\n\x06\x46\x41ILED\x10\x04\x12\r\n\tCANCELLED\x10\x05\"\x14\n\x12QueueStatusRequest\"Q\n\x0bServiceLoad\x12\x0f\n\x07\x61\x64\x64ress\x18\x01 \x01(\t\x12\x11\n\tin_flight\x18\x02 \x01(\x05\x12\x0f\n\x07waiting\x18\x03 \x01(\x05\x12\r\n\x05limit\x18\x04 \x01(\x05\"\xa1\x02\n\x0bQueueStatus\x12\x0e\n\x06queued\x18\x01 \x01(\x05\x12\x0f\n\x07running\x18\x02 \x01(\x05\x12\x0f\n\x07workers\x18\x03 \x01(\x05\x12\x11\n\tsubmitted\x18\x04 \x01(\x03\x12\x11\n\tsucceeded\x18\x05 \x01(\x03\x12\x0e\n\x06\x66\x61iled\x18\x06 \x01(\x03\x12\x11\n\tcancelled\x18\x07 \x01(\x03\x12>\n\x12queued_by_priority\x18\x08 \x03(\x0b\x32\".QueueStatus.QueuedByPriorityEntry\x12\x1e\n\x08services\x18\t \x03(\x0b\x32\x0c.ServiceLoad\x1a\x37\n\x15QueuedByPriorityEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\x32\xc5\x01\n\x11WorkflowScheduler\x12\x32\n\tSubmitRun\x12\x11.SubmitRunRequest\x1a\x12.SubmitRunResponse\x12!\n\x06GetRun\x12\x0b.RunRequest\x1a\n.RunStatus\x12$\n\tCancelRun\x12\x0b.RunRequest\x1a\n.RunStatus\x12\x33\n\x0eGetQueueStatus\x12\x13.QueueStatusRequest\x1a\x0c.QueueStatusb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'workflow_scheduler_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_QUEUESTATUS_QUEUEDBYPRIORITYENTRY']._loaded_options = None
+  _globals['_QUEUESTATUS_QUEUEDBYPRIORITYENTRY']._serialized_options = b'8\001'
+  _globals['_SUBMITRUNREQUEST']._serialized_start=28
+  _globals['_SUBMITRUNREQUEST']._serialized_end=130
+  _globals['_SUBMITRUNRESPONSE']._serialized_start=132
+  _globals['_SUBMITRUNRESPONSE']._serialized_end=183
+  _globals['_RUNREQUEST']._serialized_start=185
+  _globals['_RUNREQUEST']._serialized_end=213
+  _globals['_RUNSTATUS']._serialized_start=216
+  _globals['_RUNSTATUS']._serialized_end=508
+  _globals['_RUNSTATUS_STATE']._serialized_start=421
+  _globals['_RUNSTATUS_STATE']._serialized_end=508
+  _globals['_QUEUESTATUSREQUEST']._serialized_start=510
+  _globals['_QUEUESTATUSREQUEST']._serialized_end=530
+  _globals['_SERVICELOAD']._serialized_start=532
+  _globals['_SERVICELOAD']._serialized_end=613
+  _globals['_QUEUESTATUS']._serialized_start=616
+  _globals['_QUEUESTATUS']._serialized_end=905
+  _globals['_QUEUESTATUS_QUEUEDBYPRIORITYENTRY']._serialized_start=850
+  _globals['_QUEUESTATUS_QUEUEDBYPRIORITYENTRY']._serialized_end=905
+  _globals['_WORKFLOWSCHEDULER']._serialized_start=908
+  _globals['_WORKFLOWSCHEDULER']._serialized_end=1105
+# @@protoc_insertion_point(module_scope)
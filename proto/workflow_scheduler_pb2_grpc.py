@@ -0,0 +1,236 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from . import workflow_scheduler_pb2 as workflow__scheduler__pb2
+
+GRPC_GENERATED_VERSION = '1.73.1'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + f' but the generated code in workflow_scheduler_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class WorkflowSchedulerStub(object):
+    """Long-running orchestrator (src/orchestrator/workflow_daemon.py): accepts
+    workflow runs, queues them by priority and executes them against the
+    ContainerExecutor services over warm, shared channels
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.SubmitRun = channel.unary_unary(
+                '/WorkflowScheduler/SubmitRun',
+                request_serializer=workflow__scheduler__pb2.SubmitRunRequest.SerializeToString,
+                response_deserializer=workflow__scheduler__pb2.SubmitRunResponse.FromString,
+                _registered_method=True)
+        self.GetRun = channel.unary_unary(
+                '/WorkflowScheduler/GetRun',
+                request_serializer=workflow__scheduler__pb2.RunRequest.SerializeToString,
+                response_deserializer=workflow__scheduler__pb2.RunStatus.FromString,
+                _registered_method=True)
+        self.CancelRun = channel.unary_unary(
+                '/WorkflowScheduler/CancelRun',
+                request_serializer=workflow__scheduler__pb2.RunRequest.SerializeToString,
+                response_deserializer=workflow__scheduler__pb2.RunStatus.FromString,
+                _registered_method=True)
+        self.GetQueueStatus = channel.unary_unary(
+                '/WorkflowScheduler/GetQueueStatus',
+                request_serializer=workflow__scheduler__pb2.QueueStatusRequest.SerializeToString,
+                response_deserializer=workflow__scheduler__pb2.QueueStatus.FromString,
+                _registered_method=True)
+
+
+class WorkflowSchedulerServicer(object):
+    """Long-running orchestrator (src/orchestrator/workflow_daemon.py): accepts
+    workflow runs, queues them by priority and executes them against the
+    ContainerExecutor services over warm, shared channels
+    """
+
+    def SubmitRun(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetRun(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CancelRun(self, request, context):
+        """Removes a queued run; a run that already started is left to finish
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetQueueStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_WorkflowSchedulerServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'SubmitRun': grpc.unary_unary_rpc_method_handler(
+                    servicer.SubmitRun,
+                    request_deserializer=workflow__scheduler__pb2.SubmitRunRequest.FromString,
+                    response_serializer=workflow__scheduler__pb2.SubmitRunResponse.SerializeToString,
+            ),
+            'GetRun': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRun,
+                    request_deserializer=workflow__scheduler__pb2.RunRequest.FromString,
+                    response_serializer=workflow__scheduler__pb2.RunStatus.SerializeToString,
+            ),
+            'CancelRun': grpc.unary_unary_rpc_method_handler(
+                    servicer.CancelRun,
+                    request_deserializer=workflow__scheduler__pb2.RunRequest.FromString,
+                    response_serializer=workflow__scheduler__pb2.RunStatus.SerializeToString,
+            ),
+            'GetQueueStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetQueueStatus,
+                    request_deserializer=workflow__scheduler__pb2.QueueStatusRequest.FromString,
+                    response_serializer=workflow__scheduler__pb2.QueueStatus.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'WorkflowScheduler', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('WorkflowScheduler', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class WorkflowScheduler(object):
+    """Long-running orchestrator (src/orchestrator/workflow_daemon.py): accepts
+    workflow runs, queues them by priority and executes them against the
+    ContainerExecutor services over warm, shared channels
+    """
+
+    @staticmethod
+    def SubmitRun(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/WorkflowScheduler/SubmitRun',
+            workflow__scheduler__pb2.SubmitRunRequest.SerializeToString,
+            workflow__scheduler__pb2.SubmitRunResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetRun(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/WorkflowScheduler/GetRun',
+            workflow__scheduler__pb2.RunRequest.SerializeToString,
+            workflow__scheduler__pb2.RunStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CancelRun(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/WorkflowScheduler/CancelRun',
+            workflow__scheduler__pb2.RunRequest.SerializeToString,
+            workflow__scheduler__pb2.RunStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetQueueStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/WorkflowScheduler/GetQueueStatus',
+            workflow__scheduler__pb2.QueueStatusRequest.SerializeToString,
+            workflow__scheduler__pb2.QueueStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,199 @@
+# src/orchestrator/aio_executor.py
+
+import asyncio
+import grpc
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Add root directory to PYTHONPATH for import resolution
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from proto import energy_pipeline_pb2_grpc
+from channel_pool import MAX_MESSAGE_BYTES
+from grpc_executor import build_request, get_handoff, validate_container_config
+from node_retry import get_node_policies
+from run_metrics import RunTimings
+from shard_executor import get_replicas, get_sharding
+
+# Workflows in flight at once when run_workflows() is not given a limit
+DEFAULT_MAX_CONCURRENT_WORKFLOWS = 256
+
+
+class AioChannelPool:
+    """
+    grpc.aio channels shared by every workflow running on one event loop.
+
+    Each address gets one channel; HTTP/2 multiplexes the concurrent RPCs of
+    all workflows over it. Channels belong to the loop they were created on,
+    so a pool must not be shared across asyncio.run() calls.
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, grpc.aio.Channel] = {}
+        self._stubs: Dict[str, energy_pipeline_pb2_grpc.ContainerExecutorStub] = {}
+        self.options = [
+            ("grpc.max_send_message_length", MAX_MESSAGE_BYTES),
+            ("grpc.max_receive_message_length", MAX_MESSAGE_BYTES),
+        ]
+
+    def stub(self, address: str) -> energy_pipeline_pb2_grpc.ContainerExecutorStub:
+        stub = self._stubs.get(address)
+        if stub is None:
+            channel = grpc.aio.insecure_channel(address, options=self.options)
+            self._channels[address] = channel
+            stub = self._stubs[address] = energy_pipeline_pb2_grpc.ContainerExecutorStub(channel)
+        return stub
+
+    async def close(self):
+        await asyncio.gather(*(channel.close() for channel in self._channels.values()))
+        self._channels.clear()
+        self._stubs.clear()
+
+
+async def call_node_async(stub, request, container_id: str, container_config: Dict[str, Any],
+                          timings: Optional[RunTimings] = None):
+    # Async twin of grpc_executor.call_node; returns (success, message, output_payload)
+    timeout = container_config.get("timeout_seconds", 30)
+    started = time.perf_counter()
+    if not container_config.get("streaming", False):
+        call = stub.Execute(request, timeout=timeout)
+        response = await call
+        if timings is not None:
+            timings.record(container_id, time.perf_counter() - started, await call.trailing_metadata())
+        return response.success, response.message, response.output_payload
+
+    final = None
+    call = stub.ExecuteStream(request, timeout=timeout)
+    async for progress in call:
+        if progress.done:
+            final = progress
+        else:
+            logging.info(f"{container_id} progress: {progress.rows_processed} rows in {progress.chunks_processed} chunks")
+    if timings is not None:
+        timings.record(container_id, time.perf_counter() - started, await call.trailing_metadata())
+    if final is None:
+        return False, "Stream ended without a final result", b""
+    return final.success, final.message, final.output_payload
+
+
+async def execute_workflow_async(config: Dict[str, Any], pool: AioChannelPool, run_label: str = "") -> bool:
+    """
+    Runs one linear workflow on the event loop and returns True on success.
+
+    Each node is bounded by its 'timeout_seconds': the value is sent as the
+    RPC deadline and also enforced locally with asyncio.wait_for. Cancelling
+    the task running this coroutine cancels the in-flight RPC.
+    """
+    containers = config.get("containers", {})
+    service_registry = config.get("service_registry", {})
+
+    start_node_id = config.get("start_node")
+    if not start_node_id:
+        raise ValueError("Missing 'start_node' in config")
+    if config.get("run_journal"):
+        raise ValueError("The asyncio backend does not support 'run_journal'")
+    if config.get("stage_cache"):
+        raise ValueError("The asyncio backend does not support 'stage_cache'")
+    if (config.get("channel_pool") or {}).get("compression", "none") != "none":
+        raise ValueError("The asyncio backend does not support 'channel_pool.compression'")
+
+    prefix = f"[aio{' ' + run_label if run_label else ''}]"
+    timings = RunTimings(config.get("workflow_name"))
+    current_id = start_node_id
+    visited = set()
+    incoming_payload = None
+
+    while current_id:
+        if current_id in visited:
+            raise ValueError(f"Cycle detected in workflow at node: {current_id}")
+        visited.add(current_id)
+
+        container = containers.get(current_id)
+        if not container:
+            raise ValueError(f"Container ID '{current_id}' not found in 'containers' config")
+
+        next_id = container.get("next_node")
+        if isinstance(next_id, list):
+            raise ValueError(f"Container '{current_id}' has several successors; "
+                             "the asyncio backend only runs linear workflows")
+        handoff = get_handoff(current_id, container, next_id)
+        if handoff == "pipe":
+            raise ValueError(f"Container '{current_id}' uses 'pipe' hand-off; "
+                             "the asyncio backend does not support it")
+        memory_output = handoff == "memory"
+        memory_input = incoming_payload is not None
+        validate_container_config(current_id, container, memory_input, memory_output)
+
+        replicas = get_replicas(current_id, service_registry)
+        if get_sharding(current_id, container, replicas) is not None:
+            raise ValueError(f"Container '{current_id}' is sharded; "
+                             "the asyncio backend only runs unsharded nodes")
+        if get_node_policies(current_id, container, None) != (None, None):
+            raise ValueError(f"Container '{current_id}' sets 'retry' or 'hedging'; "
+                             "the asyncio backend does not support them")
+        server_address = replicas[0]
+
+        request = build_request(current_id, container, [incoming_payload] if memory_input else [],
+                                not memory_input, memory_output)
+        timeout = container.get("timeout_seconds", 30)
+        logging.info(f"{prefix} Executing {current_id} at {server_address}")
+
+        try:
+            success, message, output_payload = await asyncio.wait_for(
+                call_node_async(pool.stub(server_address), request, current_id, container, timings), timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"{prefix} {current_id} timed out after {timeout}s")
+            return False
+        except grpc.aio.AioRpcError as e:
+            logging.error(f"{prefix} gRPC error for {current_id}: {e.details()}")
+            return False
+
+        if not success:
+            logging.error(f"{prefix} {current_id} failed: {message}")
+            return False
+        logging.info(f"{prefix} {current_id} succeeded: {message}")
+
+        incoming_payload = output_payload if memory_output else None
+        current_id = next_id
+
+    logging.info(f"{prefix} {timings.format_summary()}")
+    return True
+
+
+async def run_workflows(configs: List[Dict[str, Any]],
+                        max_concurrent: int = DEFAULT_MAX_CONCURRENT_WORKFLOWS,
+                        pool: Optional[AioChannelPool] = None) -> List[bool]:
+    """
+    Runs many workflow instances concurrently on one event loop and returns
+    their results in order. At most 'max_concurrent' run at the same time.
+    A run that raises, e.g. on an invalid config, is logged and counts as
+    failed; the other runs carry on.
+    """
+    owns_pool = pool is None
+    pool = pool or AioChannelPool()
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run_one(index: int, config: Dict[str, Any]) -> bool:
+        async with semaphore:
+            return await execute_workflow_async(config, pool, run_label=f"#{index}")
+
+    try:
+        results = await asyncio.gather(*(run_one(i, config) for i, config in enumerate(configs)),
+                                       return_exceptions=True)
+    finally:
+        if owns_pool:
+            await pool.close()
+
+    for index, result in enumerate(results):
+        if isinstance(result, BaseException):
+            logging.error(f"[aio #{index}] Workflow failed: {result!r}")
+    return [result is True for result in results]
+
+
+def execute_workflows(configs: List[Dict[str, Any]],
+                      max_concurrent: int = DEFAULT_MAX_CONCURRENT_WORKFLOWS) -> List[bool]:
+    """Blocking entry point: runs run_workflows() on a fresh event loop."""
+    return asyncio.run(run_workflows(configs, max_concurrent))
@@ -0,0 +1,258 @@
+# src/orchestrator/batch_executor.py
+
+import copy
+import grpc
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Add root directory to PYTHONPATH for import resolution
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from proto import energy_pipeline_pb2
+from channel_pool import MAX_MESSAGE_BYTES, ChannelPool, get_default_pool
+from grpc_executor import build_request, describe_request, get_handoff, validate_container_config
+from node_retry import get_node_policies
+from run_metrics import RunTimings
+from shard_executor import get_replicas, get_sharding
+
+DEFAULT_BATCH_SETTINGS = {
+    # Jobs sent in one ExecuteBatch call
+    "max_jobs": 64,
+    # Jobs the service runs at once; 0 leaves it to the service (BATCH_PARALLELISM)
+    "max_parallel": 0,
+    # Per-run overrides of the containers, one workflow run each
+    "runs": [],
+}
+
+
+def get_batch_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the config's optional 'batch' section merged over DEFAULT_BATCH_SETTINGS."""
+    settings = config.get("batch") or {}
+    if not isinstance(settings, dict):
+        raise ValueError("'batch' must be a dictionary")
+    unknown = set(settings) - set(DEFAULT_BATCH_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown 'batch' settings: {sorted(unknown)}")
+    merged = dict(DEFAULT_BATCH_SETTINGS, **settings)
+    if not isinstance(merged["max_jobs"], int) or merged["max_jobs"] < 1:
+        raise ValueError("'batch.max_jobs' must be a positive integer")
+    if not isinstance(merged["max_parallel"], int) or merged["max_parallel"] < 0:
+        raise ValueError("'batch.max_parallel' must be a non-negative integer")
+    if not isinstance(merged["runs"], list) or not all(isinstance(run, dict) for run in merged["runs"]):
+        raise ValueError("'batch.runs' must be a list of dictionaries")
+    return merged
+
+
+def apply_overrides(config: Dict[str, Any], overrides: Dict[str, Any], label: str) -> Dict[str, Any]:
+    """
+    Returns a copy of 'config' whose containers are updated from 'overrides',
+    which maps container IDs to fields replacing the container's own, e.g. one
+    day's input_file and output_file; 'parameters' are merged key by key.
+    """
+    run = copy.deepcopy(config)
+    for container_id, fields in overrides.items():
+        container = run["containers"].get(container_id)
+        if container is None or not isinstance(fields, dict):
+            raise ValueError(f"{label} overrides unknown container '{container_id}'")
+        fields = dict(fields)
+        parameters = fields.pop("parameters", None)
+        container.update(fields)
+        if parameters:
+            container["parameters"] = dict(container.get("parameters") or {}, **parameters)
+    return run
+
+
+def expand_runs(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Returns one workflow config per entry of 'batch.runs' (see apply_overrides)."""
+    runs = []
+    name = config.get("workflow_name") or "workflow"
+    # The run list itself is not copied into every run
+    base = {key: value for key, value in config.items() if key != "batch"}
+    for index, overrides in enumerate(get_batch_settings(config)["runs"]):
+        run = apply_overrides(base, overrides, f"'batch.runs[{index}]'")
+        run["workflow_name"] = f"{name}[{index}]"
+        runs.append(run)
+    return runs
+
+
+class BatchedRun:
+    """Progress of one workflow run: the node it is at and its in-memory input."""
+
+    def __init__(self, index: int, config: Dict[str, Any]):
+        if not config.get("start_node"):
+            raise ValueError("Missing 'start_node' in config")
+        if config.get("run_journal"):
+            raise ValueError("Batched execution does not support 'run_journal'")
+        if config.get("stage_cache"):
+            raise ValueError("Batched execution does not support 'stage_cache'")
+        self.index = index
+        self.config = config
+        self.current_id = config["start_node"]
+        self.visited = set()
+        self.incoming_payload = None
+        self.failed = False
+
+    def next_job(self):
+        """
+        Builds the request for the run's current node and returns
+        (node ID, service address, container config, request, memory_output).
+        """
+        current_id = self.current_id
+        if current_id in self.visited:
+            raise ValueError(f"Cycle detected in workflow at node: {current_id}")
+        self.visited.add(current_id)
+
+        container = self.config.get("containers", {}).get(current_id)
+        if not container:
+            raise ValueError(f"Container ID '{current_id}' not found in 'containers' config")
+        next_id = container.get("next_node")
+        if isinstance(next_id, list):
+            raise ValueError(f"Container '{current_id}' has several successors; "
+                             "batched execution only runs linear workflows")
+        handoff = get_handoff(current_id, container, next_id)
+        if handoff == "pipe":
+            raise ValueError(f"Container '{current_id}' uses 'pipe' hand-off; batched execution does not support it")
+        memory_output = handoff == "memory"
+        memory_input = self.incoming_payload is not None
+        validate_container_config(current_id, container, memory_input, memory_output)
+
+        replicas = get_replicas(current_id, self.config.get("service_registry", {}))
+        if get_sharding(current_id, container, replicas) is not None:
+            raise ValueError(f"Container '{current_id}' is sharded; batched execution only runs unsharded nodes")
+        if get_node_policies(current_id, container, None) != (None, None):
+            raise ValueError(f"Container '{current_id}' sets 'retry' or 'hedging'; "
+                             "batched execution does not support them")
+
+        request = build_request(current_id, container, [self.incoming_payload] if memory_input else [],
+                                not memory_input, memory_output)
+        return current_id, replicas[0], container, request, memory_output
+
+    def advance(self, container: Dict[str, Any], output_payload: bytes, memory_output: bool):
+        self.incoming_payload = output_payload if memory_output else None
+        self.current_id = container.get("next_node")
+
+
+def split_batches(jobs: List, max_jobs: int):
+    # Consecutive slices of at most 'max_jobs' jobs whose requests fit in one
+    # gRPC message; jobs are (run, container config, request, memory_output)
+    batch, size = [], 0
+    for job in jobs:
+        job_size = job[2].ByteSize()
+        if batch and (len(batch) == max_jobs or size + job_size > MAX_MESSAGE_BYTES):
+            yield batch
+            batch, size = [], 0
+        batch.append(job)
+        size += job_size
+    if batch:
+        yield batch
+
+
+def call_batch(stub, requests: List, container_id: str, timeout: float, results: List,
+               max_parallel: int = 0, timings: Optional[RunTimings] = None):
+    # Sends 'requests' as one ExecuteBatch call. Results stream in as the service
+    # finishes each job; they are logged as they arrive and stored in 'results'
+    # as (success, message, output_payload) at the job's index.
+    started = time.perf_counter()
+    stream = stub.ExecuteBatch(energy_pipeline_pb2.ExecuteBatchRequest(jobs=requests, max_parallel=max_parallel),
+                               timeout=timeout)
+    for done, result in enumerate(stream, 1):
+        response = result.response
+        results[result.index] = (response.success, response.message, response.output_payload)
+        logging.info(f"[Batch] {container_id} job {result.index} {'succeeded' if response.success else 'failed'} "
+                     f"({done}/{len(requests)}): {response.message}")
+    if timings is not None:
+        timings.record(f"{container_id}[{len(requests)} jobs]", time.perf_counter() - started,
+                       stream.trailing_metadata())
+
+
+def execute_batch(pool: ChannelPool, address: str, requests: List, container_id: str, timeout: float,
+                  max_parallel: int = 0, timings: Optional[RunTimings] = None):
+    """
+    Runs 'requests' as one ExecuteBatch call on a pooled channel and returns
+    their (success, message, output_payload) results in request order. Jobs
+    that finished before a gRPC error keep their results; the others fail.
+    """
+    results = [None] * len(requests)
+    missing = (False, "Batch ended without a result for this job", b"")
+    try:
+        with pool.stub(address) as stub:
+            call_batch(stub, requests, container_id, timeout, results, max_parallel, timings)
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.UNAVAILABLE:
+            pool.discard(address)
+        logging.error(f"gRPC error for {container_id} batch at {address}: {e.details()}")
+        missing = (False, f"gRPC error: {e.details()}", b"")
+    return [result or missing for result in results]
+
+
+def log_invalid_run(index: int, error: Exception):
+    logging.error(f"Run {index}: invalid workflow config: {error!r}")
+    print(f"  -> ERROR: run {index}: {error}")
+
+
+def execute_workflows_batched(configs: List[Dict[str, Any]], pool: Optional[ChannelPool] = None,
+                              max_jobs: int = DEFAULT_BATCH_SETTINGS["max_jobs"],
+                              max_parallel: int = DEFAULT_BATCH_SETTINGS["max_parallel"],
+                              timings: Optional[RunTimings] = None) -> List[bool]:
+    """
+    Runs many linear workflow runs, e.g. a backfill over daily files, and
+    returns their results in order.
+
+    The runs advance stage by stage. In every step the runs waiting on the
+    same node at the same address are grouped, and each group is sent as
+    ExecuteBatch calls of up to 'max_jobs' requests (and one gRPC message)
+    instead of one Execute per run. A run whose job fails, or whose config is
+    invalid, stops there; the others go on. Each call's
+    deadline is the node's 'timeout_seconds' per job it carries.
+    """
+    pool = pool or get_default_pool()
+    timings = timings or RunTimings(f"{len(configs)} batched runs")
+    # A run whose config is invalid fails on its own (None here); the others go on
+    runs: List[Optional[BatchedRun]] = []
+    for index, config in enumerate(configs):
+        try:
+            runs.append(BatchedRun(index, config))
+        except Exception as e:
+            log_invalid_run(index, e)
+            runs.append(None)
+
+    while True:
+        # (node ID, address) -> [(run, container config, request, memory_output)]
+        groups: Dict[Any, List] = {}
+        for run in runs:
+            if run is not None and run.current_id and not run.failed:
+                try:
+                    container_id, address, container, request, memory_output = run.next_job()
+                except Exception as e:
+                    run.failed = True
+                    log_invalid_run(run.index, e)
+                    continue
+                groups.setdefault((container_id, address), []).append((run, container, request, memory_output))
+        if not groups:
+            break
+
+        for (container_id, address), jobs in groups.items():
+            for chunk in split_batches(jobs, max_jobs):
+                timeout = sum(container.get("timeout_seconds", 30) for _, container, _, _ in chunk)
+                logging.info(f"[Batch] Sending {len(chunk)} {container_id} jobs to {address}")
+                print(f"[gRPC] Executing {container_id} for {len(chunk)} runs at {address}")
+                results = execute_batch(pool, address, [request for _, _, request, _ in chunk], container_id,
+                                        timeout, max_parallel, timings)
+
+                for (run, container, request, memory_output), (success, message, output_payload) in zip(chunk, results):
+                    if success:
+                        run.advance(container, output_payload, memory_output)
+                    else:
+                        run.failed = True
+                        logging.error(f"Run {run.index}: {container_id} failed ({describe_request(request)}): "
+                                      f"{message}")
+                        print(f"  -> ERROR: run {run.index}: {container_id} failed: {message}")
+                succeeded = sum(success for success, _, _ in results)
+                print(f"  -> {succeeded}/{len(chunk)} {container_id} jobs succeeded")
+
+    logging.info(f"[gRPC] Channel pool stats: {pool.stats()}")
+    print(f"\n{timings.format_summary()}")
+    return [run is not None and not run.failed for run in runs]
@@ -3,46 +3,107 @@
 import json
 import os
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List
 
-def parse_config(path: str) -> Dict[str, Any]:
+def get_successors(container: Dict[str, Any]) -> List[str]:
     """
-    Parses and validates the JSON configuration file for the orchestration workflow.
+    Returns the IDs of the nodes that follow a container. 'next_node' may be
+    null, a single node ID, or a list of node IDs for fan-out in DAG workflows.
     """
-    if not os.path.exists(path):
-        print(f"Error: Configuration file not found at '{path}'")
-        sys.exit(1)
+    next_node = container.get("next_node")
+    if next_node is None:
+        return []
+    if isinstance(next_node, str):
+        return [next_node] if next_node else []
+    return list(next_node)
 
-    with open(path, 'r') as f:
-        try:
-            config = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"Error: Invalid JSON in configuration file '{path}'. Details: {e}")
-            sys.exit(1)
+def find_cycle(containers: Dict[str, Any]):
+    """Returns a node ID that is part of a cycle in the 'next_node' graph, or None."""
+    state = {}  # node ID -> "visiting" | "done"
+    for root in containers:
+        if root in state:
+            continue
+        stack = [(root, iter(get_successors(containers[root])))]
+        state[root] = "visiting"
+        while stack:
+            node_id, successors = stack[-1]
+            successor = next(successors, None)
+            if successor is None:
+                state[node_id] = "done"
+                stack.pop()
+            elif state.get(successor) == "visiting":
+                return successor
+            elif successor not in state and successor in containers:
+                state[successor] = "visiting"
+                stack.append((successor, iter(get_successors(containers[successor]))))
+    return None
 
-    
+def validate_config(config: Dict[str, Any]):
+    """
+    Validates a workflow config and raises ValueError describing the first
+    problem found, so long-running callers can reject a bad config instead of exiting.
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Invalid config. It must be a JSON object.")
 
     # Validate that 'start_node' exists and is a non-empty string
     if "start_node" not in config or not isinstance(config["start_node"], str) or not config["start_node"]:
-        print("Error: Invalid config. It must contain a non-empty 'start_node' string.")
-        sys.exit(1)
+        raise ValueError("Invalid config. It must contain a non-empty 'start_node' string.")
 
     # Validate that 'containers' exists and is a dictionary
     if "containers" not in config or not isinstance(config["containers"], dict):
-        print("Error: Invalid config. It must contain a 'containers' dictionary.")
-        sys.exit(1)
+        raise ValueError("Invalid config. It must contain a 'containers' dictionary.")
 
     # Validate that 'service_registry' exists and is a dictionary
     if "service_registry" not in config or not isinstance(config["service_registry"], dict):
-        print("Error: Invalid config. It must contain a 'service_registry' dictionary.")
-        sys.exit(1)
-        
+        raise ValueError("Invalid config. It must contain a 'service_registry' dictionary.")
+
     start_node_id = config["start_node"]
     if start_node_id not in config["containers"]:
-        print(f"Error: The 'start_node' ID '{start_node_id}' does not exist in the 'containers' dictionary.")
+        raise ValueError(f"The 'start_node' ID '{start_node_id}' does not exist in the 'containers' dictionary.")
+
+    # Validate the workflow graph: 'next_node' may list several successors, and a
+    # node listed by several containers has several predecessors (a join)
+    for container_id, container in config["containers"].items():
+        if not isinstance(container, dict):
+            raise ValueError(f"Container '{container_id}' must be a dictionary.")
+        next_node = container.get("next_node")
+        if next_node is not None and not isinstance(next_node, str) and not (
+                isinstance(next_node, list) and all(isinstance(n, str) and n for n in next_node)):
+            raise ValueError(f"Container '{container_id}' has an invalid 'next_node'. "
+                             "It must be null, a node ID or a list of node IDs.")
+        for successor in get_successors(container):
+            if successor not in config["containers"]:
+                raise ValueError(f"Container '{container_id}' points to unknown 'next_node' '{successor}'.")
+
+    cycle_node = find_cycle(config["containers"])
+    if cycle_node is not None:
+        raise ValueError(f"The workflow graph contains a cycle through '{cycle_node}'.")
+
+    max_concurrency = config.get("max_concurrency")
+    if max_concurrency is not None and (not isinstance(max_concurrency, int) or max_concurrency < 1):
+        raise ValueError("Invalid config. 'max_concurrency' must be a positive integer.")
+
+def parse_config(path: str) -> Dict[str, Any]:
+    """
+    Parses and validates the JSON configuration file for the orchestration workflow.
+    """
+    if not os.path.exists(path):
+        print(f"Error: Configuration file not found at '{path}'")
         sys.exit(1)
 
-    
+    with open(path, 'r') as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON in configuration file '{path}'. Details: {e}")
+            sys.exit(1)
+
+    try:
+        validate_config(config)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
     print("Configuration parsed and validated successfully.")
-    return config
\ No newline at end of file
+    return config
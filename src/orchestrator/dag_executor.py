@@ -0,0 +1,201 @@
+# src/orchestrator/dag_executor.py
+
+import grpc
+import logging
+from concurrent import futures
+from typing import Any, Dict, List, Optional, Tuple
+
+from channel_pool import ChannelPool, get_default_pool
+from config_parser import get_successors
+from grpc_executor import (build_request, describe_request, get_handoff, journal_node, record_sharded_output,
+                           run_node, validate_container_config)
+from node_retry import get_node_policies
+from run_journal import build_run_journal
+from run_metrics import RunTimings
+from shard_executor import get_replicas, get_sharding
+from stage_cache import build_stage_cache
+
+# Nodes run at the same time when 'max_concurrency' is not set in the config
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def build_graph(config: Dict[str, Any]) -> Tuple[List[str], Dict[str, List[str]], Dict[str, List[str]]]:
+    """
+    Returns (topological order, successors, predecessors) for every node reachable
+    from 'start_node'. Ties are broken by the order of the 'containers' section.
+    """
+    containers = config.get("containers", {})
+    start_node_id = config.get("start_node")
+    if not start_node_id:
+        raise ValueError("Missing 'start_node' in config")
+
+    # Collect the nodes reachable from the start node
+    reachable = set()
+    stack = [start_node_id]
+    while stack:
+        node_id = stack.pop()
+        if node_id in reachable:
+            continue
+        if node_id not in containers:
+            raise ValueError(f"Container ID '{node_id}' not found in 'containers' config")
+        reachable.add(node_id)
+        stack.extend(get_successors(containers[node_id]))
+
+    declared = [node_id for node_id in containers if node_id in reachable]
+    successors = {node_id: get_successors(containers[node_id]) for node_id in declared}
+    predecessors = {node_id: [] for node_id in declared}
+    for node_id in declared:
+        for successor in successors[node_id]:
+            predecessors[successor].append(node_id)
+
+    # Kahn's algorithm
+    remaining = {node_id: len(predecessors[node_id]) for node_id in declared}
+    order = []
+    ready = [node_id for node_id in declared if remaining[node_id] == 0]
+    while ready:
+        node_id = ready.pop(0)
+        order.append(node_id)
+        for successor in successors[node_id]:
+            remaining[successor] -= 1
+            if remaining[successor] == 0:
+                ready.append(successor)
+    if len(order) != len(declared):
+        stuck = [node_id for node_id in declared if remaining[node_id] > 0]
+        raise ValueError(f"Cycle detected in workflow involving nodes: {stuck}")
+    return order, successors, predecessors
+
+
+def execute_dag(config: Dict[str, Any], max_concurrency: Optional[int] = None,
+                pool: Optional[ChannelPool] = None, timings: Optional[RunTimings] = None) -> bool:
+    """
+    Runs a workflow whose nodes may have several successors and predecessors.
+
+    A node is scheduled as soon as all of its predecessors have succeeded, and
+    independent nodes run concurrently on a thread pool limited to
+    'max_concurrency' (argument, then config, then DEFAULT_MAX_CONCURRENCY).
+    When a node fails, nodes depending on it are skipped while independent
+    branches finish. With a 'run_journal', nodes completed by an earlier
+    failed run are not run again. Returns True when every node succeeded;
+    per-node metrics are collected in 'timings' (a fresh RunTimings by default).
+    """
+    pool = pool or get_default_pool()
+    containers = config.get("containers", {})
+    service_registry = config.get("service_registry", {})
+    max_concurrency = max_concurrency or config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+    cache = build_stage_cache(config.get("stage_cache"))
+    timings = timings or RunTimings(config.get("workflow_name"))
+
+    order, successors, predecessors = build_graph(config)
+
+    # Validate every node up front so a bad config fails before anything runs
+    plans = {}
+    for node_id in order:
+        container = containers[node_id]
+        modes = {get_handoff(node_id, container, successor) for successor in successors[node_id]}
+        if "pipe" in modes:
+            raise ValueError(f"Container '{node_id}' uses 'pipe' hand-off, which only the linear executor runs")
+        if len(modes) > 1:
+            raise ValueError(f"Container '{node_id}' mixes 'file' and 'memory' handoff to its successors")
+        memory_output = modes == {"memory"}
+        memory_inputs = [p for p in predecessors[node_id]
+                         if get_handoff(p, containers[p], node_id) == "memory"]
+        # Input files are read unless every predecessor hands its output over in memory
+        read_input_files = not predecessors[node_id] or len(memory_inputs) < len(predecessors[node_id])
+        validate_container_config(node_id, container, not read_input_files, memory_output)
+
+        replicas = get_replicas(node_id, service_registry)
+        get_node_policies(node_id, container, get_sharding(node_id, container, replicas))
+        plans[node_id] = (", ".join(replicas), memory_inputs, read_input_files, memory_output)
+
+    status = {node_id: "pending" for node_id in order}
+    payloads: Dict[str, bytes] = {}
+    requests = {}
+    # Output files of sharded (or hedged) nodes -> the files that replace them as inputs
+    sharded_outputs: Dict[str, List[str]] = {}
+
+    journal = build_run_journal(config)
+    if journal is not None:
+        # A node only ran after all of its predecessors, so the journaled nodes can simply be marked done
+        for node_id in order:
+            if journal.is_completed(node_id):
+                status[node_id] = "succeeded"
+                sharded_outputs.update(journal.output_files(node_id))
+                if plans[node_id][3]:
+                    payloads[node_id] = journal.payload(node_id)
+                print(f"[Journal] Skipping {node_id}: completed in an earlier run ({journal.message(node_id)})")
+
+    def submit(executor, node_id: str):
+        # Requests are built on the scheduling thread, before the predecessors'
+        # in-memory payloads can be released
+        server_address, memory_inputs, read_input_files, memory_output = plans[node_id]
+        container = containers[node_id]
+        request = requests[node_id] = build_request(node_id, container, [payloads[p] for p in memory_inputs],
+                                                    read_input_files, memory_output, sharded_outputs)
+        logging.info(f"[gRPC] Connecting to {node_id} at {server_address}")
+        print(f"[gRPC] Executing {node_id} -> {describe_request(request)}")
+        return executor.submit(run_node, pool, service_registry, request, node_id, container, cache, timings,
+                               sharded_outputs)
+
+    logging.info(f"[DAG] Running {len(order)} nodes with max_concurrency={max_concurrency}")
+    with futures.ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        running = {}
+
+        def schedule_ready():
+            for node_id in order:
+                if status[node_id] != "pending":
+                    continue
+                predecessor_states = {status[p] for p in predecessors[node_id]}
+                if predecessor_states & {"failed", "skipped"}:
+                    status[node_id] = "skipped"
+                    logging.warning(f"[DAG] Skipping {node_id}: a predecessor did not succeed")
+                elif predecessor_states <= {"succeeded"}:
+                    status[node_id] = "running"
+                    running[submit(executor, node_id)] = node_id
+
+        schedule_ready()
+        while running:
+            done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                node_id = running.pop(future)
+                try:
+                    success, message, output_payload = future.result()
+                except grpc.RpcError as e:
+                    success, message, output_payload = False, f"gRPC error: {e.details()}", b""
+
+                request = requests.pop(node_id)
+                if success:
+                    status[node_id] = "succeeded"
+                    record_sharded_output(sharded_outputs, node_id, containers[node_id], service_registry, request)
+                    if plans[node_id][3]:
+                        payloads[node_id] = output_payload
+                    journal_node(journal, sharded_outputs, node_id, request, message, output_payload,
+                                 plans[node_id][3])
+                    logging.info(f"{node_id} succeeded: {message}")
+                    print(f"  -> SUCCESS: {node_id}: {message}")
+                else:
+                    status[node_id] = "failed"
+                    logging.error(f"{node_id} failed: {message}")
+                    print(f"  -> ERROR: {node_id} failed: {message}")
+
+            # Free in-memory outputs once every consumer has started
+            for producer in list(payloads):
+                if all(status[s] != "pending" for s in successors[producer]):
+                    del payloads[producer]
+            schedule_ready()
+
+    logging.info(f"[gRPC] Channel pool stats: {pool.stats()}")
+    if cache is not None:
+        logging.info(f"[Cache] Stage cache stats: {cache.stats()}")
+    print(f"\n{timings.format_summary()}")
+
+    succeeded = all(state == "succeeded" for state in status.values())
+    if journal is not None:
+        journal.finish(succeeded)
+    if succeeded:
+        logging.info("DAG pipeline completed successfully.")
+        print("\nWorkflow completed successfully.")
+    else:
+        summary = {node_id: state for node_id, state in status.items() if state != "succeeded"}
+        logging.warning(f"DAG pipeline stopped due to an error: {summary}")
+        print(f"\nWorkflow stopped due to an error: {summary}")
+    return succeeded
@@ -1,19 +1,46 @@
 # src/orchestrator/grpc_executor.py
 
+import functools
 import grpc
+import json
 import logging
 import os
 import sys
-from typing import Dict, Any
+import time
+import uuid
+from concurrent import futures
+from typing import Dict, Any, List, Optional
 
 # Add root directory to PYTHONPATH for import resolution
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from proto import energy_pipeline_pb2, energy_pipeline_pb2_grpc
+from proto import energy_pipeline_pb2
+from channel_pool import ChannelPool, get_default_pool
+from node_retry import execute_hedged, execute_with_retry, get_node_policies
+from run_journal import RunJournal, build_run_journal
+from run_metrics import RunTimings
+from shard_executor import execute_sharded, get_replicas, get_sharding, shard_output_path
+from stage_cache import StageCache, build_stage_cache
 
-# Stricter validation: ensure required fields are present and not empty
-def validate_container_config(container_id: str, container_config: Dict[str, Any]):
-    required_fields = ["id", "input_file", "output_file"]
+# How a node's output reaches the next node: through a file on the shared
+# volume, as bytes forwarded by the orchestrator in the next request, or
+# through a file the next node reads while it is still being written ("pipe")
+HANDOFF_MODES = ("file", "memory", "pipe")
+
+# Request parameters connecting the two ends of a pipe (see
+# wp31_services/src/common/payload_io.py); both carry the same run token
+PIPE_OUTPUT = "pipe_output"
+PIPE_INPUT = "pipe_input"
+
+# Stricter validation: ensure required fields are present and not empty.
+# File paths are not needed on the side of an edge that is handed off in memory.
+def validate_container_config(container_id: str, container_config: Dict[str, Any],
+                              memory_input: bool = False, memory_output: bool = False):
+    required_fields = ["id"]
+    if not memory_input:
+        required_fields.append("input_file")
+    if not memory_output:
+        required_fields.append("output_file")
     for field in required_fields:
         if field not in container_config:
             raise ValueError(f"Container '{container_id}' missing required field: '{field}'")
@@ -21,7 +48,232 @@ def validate_container_config(container_id: str, container_config: Dict[str, Any
             # This check prevents empty strings, which was a "Dangerous Default"
             raise ValueError(f"Container '{container_id}' field '{field}' cannot be empty")
 
-def execute_workflow(config: Dict[str, Any]):
+def build_parameters(container_id: str, container_config: Dict[str, Any]) -> Dict[str, str]:
+    # Optional per-node 'parameters' are forwarded to the service as a string map
+    parameters = container_config.get("parameters") or {}
+    if not isinstance(parameters, dict):
+        raise ValueError(f"Container '{container_id}' field 'parameters' must be a dictionary")
+    return {
+        str(key): value if isinstance(value, str) else json.dumps(value)
+        for key, value in parameters.items()
+    }
+
+def get_handoff(container_id: str, container_config: Dict[str, Any], next_id) -> str:
+    # 'handoff' is either one mode for the node's outgoing edge or a dictionary
+    # mapping successor IDs to modes; anything not listed uses "file"
+    if not next_id:
+        return "file"
+    handoff = container_config.get("handoff", "file")
+    if isinstance(handoff, dict):
+        handoff = handoff.get(next_id, "file")
+    if handoff not in HANDOFF_MODES:
+        raise ValueError(f"Container '{container_id}' has invalid handoff '{handoff}' to '{next_id}'. "
+                         f"Expected one of {HANDOFF_MODES}")
+    return handoff
+
+def call_node(stub, request, container_id: str, container_config: Dict[str, Any],
+              timings: Optional[RunTimings] = None):
+    # Runs one node and returns (success, message, output_payload). Nodes with
+    # "streaming": true use the chunked ExecuteStream RPC and log progress after
+    # every processed chunk. The service's metrics (trailing metadata) and the
+    # call's wall time are added to 'timings'.
+    timeout = container_config.get("timeout_seconds", 30)
+    started = time.perf_counter()
+    if not container_config.get("streaming", False):
+        response, call = stub.Execute.with_call(request, timeout=timeout)
+        if timings is not None:
+            timings.record(container_id, time.perf_counter() - started, call.trailing_metadata())
+        return response.success, response.message, response.output_payload
+
+    final = None
+    stream = stub.ExecuteStream(request, timeout=timeout)
+    for progress in stream:
+        if progress.done:
+            final = progress
+        else:
+            logging.info(f"{container_id} progress: {progress.rows_processed} rows in {progress.chunks_processed} chunks")
+    if timings is not None:
+        timings.record(container_id, time.perf_counter() - started, stream.trailing_metadata())
+    if final is None:
+        return False, "Stream ended without a final result", b""
+    return final.success, final.message, final.output_payload
+
+def build_request(container_id: str, container_config: Dict[str, Any], input_payloads: List[bytes],
+                  read_input_files: bool, memory_output: bool,
+                  sharded_outputs: Optional[Dict[str, List[str]]] = None):
+    # 'input_file' may be a single path or, for join nodes, a list of paths. A node
+    # with exactly one input uses the single input_file / input_payload fields so
+    # it stays compatible with services that predate join nodes. An input written
+    # by a sharded node is replaced by its per-shard files ('sharded_outputs').
+    input_files = []
+    if read_input_files:
+        input_file = container_config["input_file"]
+        for path in (list(input_file) if isinstance(input_file, list) else [input_file]):
+            input_files.extend((sharded_outputs or {}).get(path, [path]))
+
+    # The hardcoded "/data/" prefix is now REMOVED
+    request = energy_pipeline_pb2.ExecuteRequest(
+        output_file="" if memory_output else container_config["output_file"],
+        parameters=build_parameters(container_id, container_config),
+        return_payload=memory_output
+    )
+    if len(input_payloads) + len(input_files) > 1:
+        request.input_payloads.extend(input_payloads)
+        request.input_files.extend(input_files)
+    elif input_payloads:
+        request.input_payload = input_payloads[0]
+    elif input_files:
+        request.input_file = input_files[0]
+    return request
+
+def describe_request(request) -> str:
+    inputs = [request.input_file] if request.input_file else list(request.input_files)
+    if request.input_payload or request.input_payloads:
+        inputs.append("<memory>")
+    return f"{', '.join(inputs) or '<none>'} -> {request.output_file or '<memory>'}"
+
+def execute_node(pool: ChannelPool, server_address: str, request, container_id: str,
+                 container_config: Dict[str, Any], timings: Optional[RunTimings] = None):
+    # Runs one node on a pooled channel and returns (success, message, output_payload).
+    # gRPC errors are re-raised after dropping the channel if the server was unavailable.
+    try:
+        # Reuse the pooled channel for this address instead of opening a new one
+        with pool.stub(server_address) as stub:
+            return call_node(stub, request, container_id, container_config, timings)
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.UNAVAILABLE:
+            pool.discard(server_address)
+        raise
+
+def run_node(pool: ChannelPool, service_registry: Dict[str, Any], request, container_id: str,
+             container_config: Dict[str, Any], cache: Optional[StageCache] = None,
+             timings: Optional[RunTimings] = None, sharded_outputs: Optional[Dict[str, List[str]]] = None):
+    # Runs a node on its only replica, or as shards over several replicas. With a
+    # stage cache, a stored output for the same inputs and parameters is reused
+    # and the RPC is skipped; "cache": false opts a node out. Unsharded nodes are
+    # retried and hedged as their 'retry' and 'hedging' sections say; a hedge that
+    # wins with a file output is added to 'sharded_outputs' like a sharded node's
+    # files. Every call is recorded in 'timings' when given.
+    replicas = get_replicas(container_id, service_registry)
+    plan = get_sharding(container_id, container_config, replicas)
+    retry, hedging = get_node_policies(container_id, container_config, plan)
+    # Sharded nodes writing to disk leave one file per shard, which is not cached
+    cacheable = (cache is not None and container_config.get("cache", True)
+                 and (plan is None or request.return_payload))
+    started = time.perf_counter()
+    key = cache.key_for(container_id, request) if cacheable else None
+    if key is not None:
+        cached = cache.load(key)
+        if cached is not None and restore_cached_output(request, cached):
+            logging.info(f"[Cache] Hit for {container_id} ({len(cached)} bytes, key {key[:12]})")
+            if timings is not None:
+                timings.record(container_id, time.perf_counter() - started, cached=True)
+            return True, f"Cache hit: reused {len(cached)} bytes", cached if request.return_payload else b""
+
+    output_file = request.output_file
+    if plan is None and hedging is not None:
+        success, message, output_payload, output_file = execute_with_retry(
+            lambda: execute_hedged(pool, replicas[0], hedging, request, container_id, container_config, timings),
+            retry, container_id)
+        if success and output_file != request.output_file and sharded_outputs is not None:
+            sharded_outputs[request.output_file] = [output_file]
+        result = success, message, output_payload
+    elif plan is None:
+        result = execute_with_retry(
+            lambda: execute_node(pool, replicas[0], request, container_id, container_config, timings),
+            retry, container_id)
+    else:
+        result = execute_sharded(pool, replicas, request, container_id, container_config, plan,
+                                 functools.partial(call_node, timings=timings))
+
+    success, _, output_payload = result
+    if key is not None and success:
+        try:
+            if not request.return_payload:
+                with open(output_file, "rb") as f:
+                    output_payload = f.read()
+            cache.store(key, output_payload)
+        except OSError as e:
+            logging.info(f"[Cache] Could not store output of {container_id}: {e}")
+    return result
+
+def restore_cached_output(request, cached: bytes) -> bool:
+    # A cached file output is written back to output_file; in-memory outputs need nothing
+    if request.return_payload:
+        return True
+    try:
+        directory = os.path.dirname(request.output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(request.output_file, "wb") as f:
+            f.write(cached)
+        return True
+    except OSError as e:
+        logging.info(f"[Cache] Could not restore {request.output_file}: {e}")
+        return False
+
+def record_sharded_output(sharded_outputs: Dict[str, List[str]], container_id: str,
+                          container_config: Dict[str, Any], service_registry: Dict[str, Any], request):
+    # Remembers the per-shard files of a sharded node that wrote its output to disk
+    if request.return_payload:
+        return
+    plan = get_sharding(container_id, container_config, get_replicas(container_id, service_registry))
+    if plan is not None:
+        sharded_outputs[request.output_file] = [
+            shard_output_path(request.output_file, i) for i in range(plan["shards"])]
+
+def check_pipe_node(container_id: str, plan, policies):
+    # Both ends of a pipe run as one plain call: the input is still growing, so it
+    # cannot be hashed for the stage cache, split into shards or sent twice
+    if plan is not None:
+        raise ValueError(f"Container '{container_id}' is sharded and cannot use 'pipe' hand-off")
+    if policies != (None, None):
+        raise ValueError(f"Container '{container_id}' sets 'retry' or 'hedging' and cannot use 'pipe' hand-off")
+
+def finish_piped(piped, journal: Optional[RunJournal], sharded_outputs: Dict[str, List[str]]) -> bool:
+    # Waits for the nodes that were started ahead of their successors ("pipe"
+    # hand-off), reports them in workflow order and returns True if all succeeded
+    succeeded = True
+    for container_id, request, future in piped:
+        try:
+            success, message, _ = future.result()
+        except grpc.RpcError as e:
+            success, message = False, f"gRPC error: {e.details()}"
+        if success and succeeded:
+            journal_node(journal, sharded_outputs, container_id, request, message, b"", False)
+            logging.info(f"{container_id} succeeded: {message}")
+            print(f"  -> SUCCESS: {container_id}: {message}")
+        elif not success:
+            succeeded = False
+            logging.error(f"{container_id} failed: {message}")
+            print(f"  -> ERROR: {container_id} failed: {message}")
+    return succeeded
+
+def replaced_output_files(sharded_outputs: Dict[str, List[str]], request) -> Dict[str, List[str]]:
+    # The files that replace the request's output file (shards or a winning hedge), for the run journal
+    if request.return_payload or request.output_file not in sharded_outputs:
+        return {}
+    return {request.output_file: sharded_outputs[request.output_file]}
+
+def journal_node(journal: Optional[RunJournal], sharded_outputs: Dict[str, List[str]], container_id: str,
+                 request, message: str, output_payload: bytes, memory_output: bool):
+    # Records a successful node, with its in-memory output when it is handed off that way
+    if journal is not None:
+        journal.record(container_id, message, output_payload if memory_output else None,
+                       replaced_output_files(sharded_outputs, request))
+
+def execute_workflow(config: Dict[str, Any], pool: Optional[ChannelPool] = None,
+                     timings: Optional[RunTimings] = None) -> bool:
+    # Channels come from the process-wide pool so repeated runs reuse connections.
+    # Returns True when every node succeeded; per-node metrics are collected in
+    # 'timings' (a fresh RunTimings unless the caller passes one to read them).
+    pool = pool or get_default_pool()
+    # Optional 'stage_cache' section: reuse outputs of stages whose inputs did not change
+    cache = build_stage_cache(config.get("stage_cache"))
+    timings = timings or RunTimings(config.get("workflow_name"))
+    # Optional 'run_journal' section: resume a failed run after its last successful node
+    journal = build_run_journal(config)
+
     # Get the dictionary of containers, not a list
     containers = config.get("containers", {})
     service_registry = config.get("service_registry", {})
@@ -32,6 +284,15 @@ def execute_workflow(config: Dict[str, Any]):
 
     current_id = start_node_id
     visited = set()
+    # Output of the previous node when it was handed off in memory
+    incoming_payload = None
+    # Output files of sharded (or hedged) nodes -> the files that replace them as inputs
+    sharded_outputs: Dict[str, List[str]] = {}
+    # Nodes started ahead because their output is piped into a later node: (ID, request, future)
+    piped = []
+    pipe_executor = futures.ThreadPoolExecutor(max_workers=max(len(containers), 1))
+    # Run token of the pipe feeding the current node
+    pipe_token = None
 
     while current_id:
         if current_id in visited:
@@ -42,53 +303,100 @@ def execute_workflow(config: Dict[str, Any]):
         if not container:
             raise ValueError(f"Container ID '{current_id}' not found in 'containers' config")
 
+        next_id = container.get("next_node")
+        if isinstance(next_id, list):
+            raise ValueError(f"Container '{current_id}' has several successors; "
+                             "set \"execution_mode\": \"dag\" to run fan-out workflows")
+        handoff = get_handoff(current_id, container, next_id)
+        memory_output = handoff == "memory"
+        memory_input = incoming_payload is not None
+
         # Run validation for the current container
-        validate_container_config(current_id, container)
+        validate_container_config(current_id, container, memory_input, memory_output)
+
+        # Get the specific server address for THIS container from the registry;
+        # a list of replica addresses runs the node as shards
+        replicas = get_replicas(current_id, service_registry)
+        plan = get_sharding(current_id, container, replicas)
+        policies = get_node_policies(current_id, container, plan)
+        server_address = ", ".join(replicas)
+        if handoff == "pipe" or pipe_token:
+            check_pipe_node(current_id, plan, policies)
 
-        # Get the specific server address for THIS container from the registry
-        server_address = service_registry.get(current_id)
-        if not server_address:
-            raise ValueError(f"Missing service address for '{current_id}' in 'service_registry'")
+        if journal is not None and journal.is_completed(current_id) and not pipe_token:
+            # Completed by an earlier, failed run: reuse its output instead of running it again
+            sharded_outputs.update(journal.output_files(current_id))
+            incoming_payload = journal.payload(current_id) if memory_output else None
+            print(f"[Journal] Skipping {current_id}: completed in an earlier run ({journal.message(current_id)})")
+            current_id = next_id
+            continue
 
         # These now get the full, correct path directly from the config
-        input_file = container["input_file"]
-        output_file = container["output_file"]
+        request = build_request(current_id, container, [incoming_payload] if memory_input else [],
+                                not memory_input, memory_output, sharded_outputs)
+        pipe_input = pipe_token is not None
+        if pipe_input:
+            request.parameters[PIPE_INPUT] = pipe_token
+            pipe_token = None
         
         logging.info(f"[gRPC] Connecting to {current_id} at {server_address}")
-        print(f"[gRPC] Executing {current_id} -> {input_file} -> {output_file}")
+        print(f"[gRPC] Executing {current_id} -> {describe_request(request)}")
+
+        if handoff == "pipe":
+            # Start the node and move on: the next node reads its output while it is written
+            pipe_token = request.parameters[PIPE_OUTPUT] = uuid.uuid4().hex
+            piped.append((current_id, request, pipe_executor.submit(
+                execute_node, pool, replicas[0], request, current_id, container, timings)))
+            current_id = next_id
+            continue
 
         try:
-            # Open a new channel for each service call
-            with grpc.insecure_channel(server_address) as channel:
-                stub = energy_pipeline_pb2_grpc.ContainerExecutorStub(channel)
-
-                # The hardcoded "/data/" prefix is now REMOVED
-                request = energy_pipeline_pb2.ExecuteRequest(
-                    input_file=input_file,
-                    output_file=output_file
-                )
-
-                response = stub.Execute(request, timeout=container.get("timeout_seconds", 30))
-                
-                if response.success:
-                    logging.info(f"{current_id} succeeded: {response.message}")
-                    print(f"  -> SUCCESS: {response.message}")
-                else:
-                    logging.error(f"{current_id} failed: {response.message}")
-                    print(f"  -> ERROR: {current_id} failed: {response.message}")
-                    break # Stop the workflow on failure
-        
+            if pipe_input:
+                success, message, output_payload = execute_node(pool, replicas[0], request, current_id, container,
+                                                                timings)
+            else:
+                success, message, output_payload = run_node(pool, service_registry, request, current_id, container,
+                                                          cache, timings, sharded_outputs)
         except grpc.RpcError as e:
+            finish_piped(piped, journal, sharded_outputs)
             logging.error(f"gRPC error for {current_id}: {e.details()}")
             print(f"  -> FATAL gRPC ERROR: Could not connect to {current_id} at {server_address}. Details: {e.details()}")
             break # Stop the workflow on connection error
 
+        # Nodes piped into this one ran alongside it and are reported first
+        piped_succeeded = finish_piped(piped, journal, sharded_outputs)
+        piped = []
+        if success and piped_succeeded:
+            record_sharded_output(sharded_outputs, current_id, container, service_registry, request)
+            journal_node(journal, sharded_outputs, current_id, request, message, output_payload, memory_output)
+            logging.info(f"{current_id} succeeded: {message}")
+            print(f"  -> SUCCESS: {message}")
+        else:
+            if not success:
+                logging.error(f"{current_id} failed: {message}")
+                print(f"  -> ERROR: {current_id} failed: {message}")
+            break # Stop the workflow on failure
+
+        # Forward the output directly when the edge to the next node is in memory
+        incoming_payload = output_payload if memory_output else None
+
         # Move to the next node
-        current_id = container.get("next_node")
+        current_id = next_id
+
+    # Nodes still running after a failure elsewhere (their results are not used)
+    pipe_executor.shutdown()
+
+    logging.info(f"[gRPC] Channel pool stats: {pool.stats()}")
+    if cache is not None:
+        logging.info(f"[Cache] Stage cache stats: {cache.stats()}")
+    print(f"\n{timings.format_summary()}")
+    if journal is not None:
+        journal.finish(not current_id)
 
     if not current_id:
         logging.info("gRPC pipeline completed successfully.")
         print("\nWorkflow completed successfully.")
     else:
         logging.warning("gRPC pipeline stopped due to an error.")
-        print("\nWorkflow stopped due to an error.")
\ No newline at end of file
+        print("\nWorkflow stopped due to an error.")
+    return not current_id
\ No newline at end of file
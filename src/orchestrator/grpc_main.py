@@ -10,7 +10,11 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 
 
 from config_parser import parse_config
+from channel_pool import configure_default_pool
 from grpc_executor import execute_workflow
+from dag_executor import execute_dag
+from aio_executor import execute_workflows
+from batch_executor import execute_workflows_batched, expand_runs, get_batch_settings
 
 LOG_DIR = os.environ.get("LOG_DIR", "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -31,9 +35,27 @@ if __name__ == "__main__":
         
         config = parse_config(CONFIG_PATH)
         
+        # Optional 'channel_pool' section tunes keepalive, idle eviction and the channel cap
+        configure_default_pool(config.get("channel_pool"))
         
         # Passing the entire 'config' object, not just a part of it.
-        execute_workflow(config)
+        # "execution_mode": "dag" runs fan-out/fan-in workflows with parallel branches.
+        # "execution_mode": "aio" uses the asyncio backend built on grpc.aio.
+        # "execution_mode": "batch" runs every entry of 'batch.runs' with ExecuteBatch calls.
+        if config.get("execution_mode") == "dag":
+            execute_dag(config)
+        elif config.get("execution_mode") == "batch":
+            settings = get_batch_settings(config)
+            results = execute_workflows_batched(expand_runs(config), max_jobs=settings["max_jobs"],
+                                                max_parallel=settings["max_parallel"])
+            print(f"\n{sum(results)} of {len(results)} workflow runs completed successfully.")
+            if not all(results):
+                sys.exit(1)
+        elif config.get("execution_mode") == "aio":
+            succeeded = execute_workflows([config])[0]
+            print("\nWorkflow completed successfully." if succeeded else "\nWorkflow stopped due to an error.")
+        else:
+            execute_workflow(config)
 
     except json.JSONDecodeError as e:
         
@@ -0,0 +1,228 @@
+# src/orchestrator/node_retry.py
+
+import grpc
+import logging
+import os
+import queue
+import random
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, Optional
+
+from run_metrics import RunTimings
+
+# gRPC status codes retried when a node's 'retry' section does not list its own.
+# "FAILED" stands for a response with success = false. DEADLINE_EXCEEDED is
+# not among them: the server may still be running the first attempt, and a
+# retry would write the same output_file at the same time.
+DEFAULT_RETRY_ON = ("UNAVAILABLE",)
+FAILED = "FAILED"
+
+DEFAULT_RETRY_SETTINGS = {
+    "max_attempts": 3,
+    "initial_backoff_seconds": 0.5,
+    "max_backoff_seconds": 10.0,
+    "backoff_multiplier": 2.0,
+    "retry_on": list(DEFAULT_RETRY_ON),
+}
+
+DEFAULT_HEDGE_DELAY_SECONDS = 1.0
+
+
+def _number(container_id: str, section: str, settings: Dict[str, Any], key: str, minimum: float) -> float:
+    value = settings[key]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+        raise ValueError(f"Container '{container_id}' '{section}.{key}' must be a number >= {minimum}")
+    return value
+
+
+def get_retry_policy(container_id: str, container_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the node's retry policy, or None when it runs once.
+
+    'retry' is true for the defaults or a dictionary overriding any of
+    DEFAULT_RETRY_SETTINGS. 'retry_on' lists the gRPC status codes to retry,
+    plus "FAILED" to also retry responses with success = false.
+    """
+    retry = container_config.get("retry")
+    if not retry:
+        return None
+    if retry is True:
+        retry = {}
+    if not isinstance(retry, dict):
+        raise ValueError(f"Container '{container_id}' field 'retry' must be true or a dictionary")
+    unknown = set(retry) - set(DEFAULT_RETRY_SETTINGS)
+    if unknown:
+        raise ValueError(f"Container '{container_id}' has unknown 'retry' settings: {sorted(unknown)}")
+
+    policy = dict(DEFAULT_RETRY_SETTINGS, **retry)
+    if not isinstance(policy["max_attempts"], int) or policy["max_attempts"] < 1:
+        raise ValueError(f"Container '{container_id}' 'retry.max_attempts' must be a positive integer")
+    _number(container_id, "retry", policy, "initial_backoff_seconds", 0)
+    _number(container_id, "retry", policy, "max_backoff_seconds", 0)
+    _number(container_id, "retry", policy, "backoff_multiplier", 1)
+    codes = set(grpc.StatusCode.__members__) | {FAILED}
+    if not isinstance(policy["retry_on"], list) or not set(policy["retry_on"]) <= codes:
+        raise ValueError(f"Container '{container_id}' 'retry.retry_on' must list gRPC status codes "
+                         f"(e.g. {list(DEFAULT_RETRY_ON)}) or \"{FAILED}\"")
+    if "DEADLINE_EXCEEDED" in policy["retry_on"] and container_config.get("output_file"):
+        logging.warning(f"Container '{container_id}' retries DEADLINE_EXCEEDED; a retry may write "
+                        f"'{container_config['output_file']}' while the timed-out attempt still does")
+    return policy
+
+
+def get_hedging(container_id: str, container_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the node's hedging settings, or None when it is not hedged.
+
+    'hedging' names a second replica ('address') that receives a copy of the
+    request once the first one has not answered within 'delay_seconds'.
+    Only unary (non-streaming) calls are hedged, as a stream's progress
+    cannot be merged from two servers.
+    """
+    hedging = container_config.get("hedging")
+    if hedging is None:
+        return None
+    if not isinstance(hedging, dict):
+        raise ValueError(f"Container '{container_id}' field 'hedging' must be a dictionary")
+    settings = {"address": hedging.get("address"),
+                "delay_seconds": hedging.get("delay_seconds", DEFAULT_HEDGE_DELAY_SECONDS)}
+    unknown = set(hedging) - set(settings)
+    if unknown:
+        raise ValueError(f"Container '{container_id}' has unknown 'hedging' settings: {sorted(unknown)}")
+    if not isinstance(settings["address"], str) or not settings["address"]:
+        raise ValueError(f"Container '{container_id}' 'hedging.address' must be a non-empty \"host:port\" string")
+    _number(container_id, "hedging", settings, "delay_seconds", 0)
+    if container_config.get("streaming", False):
+        raise ValueError(f"Container '{container_id}' cannot combine 'hedging' with 'streaming'")
+    return settings
+
+
+def backoff_delay(policy: Dict[str, Any], attempt: int) -> float:
+    # Exponential backoff with full jitter: a random wait up to the capped exponential delay
+    ceiling = min(policy["max_backoff_seconds"],
+                  policy["initial_backoff_seconds"] * policy["backoff_multiplier"] ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def execute_with_retry(attempt, policy: Optional[Dict[str, Any]], container_id: str):
+    """
+    Calls 'attempt()' (returning (success, message, output_payload)) until it
+    succeeds, fails in a way 'policy' does not retry, or runs out of attempts,
+    sleeping with backoff in between. The last result or gRPC error is passed on.
+    """
+    max_attempts = policy["max_attempts"] if policy else 1
+    for number in range(1, max_attempts + 1):
+        try:
+            result = attempt()
+        except grpc.RpcError as e:
+            if number == max_attempts or e.code().name not in policy["retry_on"]:
+                raise
+            reason = f"{e.code().name}: {e.details()}"
+        else:
+            if result[0] or number == max_attempts or FAILED not in policy["retry_on"]:
+                return result
+            reason = result[1]
+        delay = backoff_delay(policy, number)
+        logging.warning(f"[Retry] {container_id} attempt {number}/{max_attempts} failed ({reason}); "
+                        f"retrying in {delay:.2f}s")
+        time.sleep(delay)
+
+
+def hedge_output_path(output_file: str) -> str:
+    # /data/analysis_output.pb -> /data/analysis_output.hedge.pb
+    stem, extension = os.path.splitext(output_file)
+    return f"{stem}.hedge{extension}"
+
+
+def execute_hedged(pool, address: str, hedging: Dict[str, Any], request, container_id: str,
+                   container_config: Dict[str, Any], timings: Optional[RunTimings] = None):
+    """
+    Runs a unary node on 'address' and, if it has not answered after
+    'delay_seconds' (or failed before that), sends the same request to the
+    hedge replica. The first successful response wins and the other call is
+    cancelled. Returns (success, message, output_payload, output_file), where
+    output_file is where the winner wrote its output: a hedge writes to
+    hedge_output_path() so two servers never write the same file.
+    """
+    timeout = container_config.get("timeout_seconds", 30)
+    hedge_request = type(request)()
+    hedge_request.CopyFrom(request)
+    if not request.return_payload:
+        hedge_request.output_file = hedge_output_path(request.output_file)
+
+    finished = queue.Queue()
+    calls = []
+    unavailable = set()
+    with ExitStack() as leases:
+        # Channels that returned UNAVAILABLE are dropped once their leases are released
+        leases.callback(lambda: [pool.discard(a) for a in unavailable])
+
+        def start(call_address: str, call_request, label: str):
+            stub = leases.enter_context(pool.stub(call_address))
+            future = stub.Execute.future(call_request, timeout=timeout)
+            calls.append(future)
+            started = time.perf_counter()
+            future.add_done_callback(lambda f: finished.put((f, call_address, call_request, label, started)))
+
+        def start_hedge():
+            logging.info(f"[Hedge] Sending {container_id} to {hedging['address']} as well")
+            start(hedging["address"], hedge_request, f"{container_id} (hedge)")
+
+        start(address, request, container_id)
+        hedged = False
+        pending = 1
+        error = None
+        result = None
+        try:
+            while pending:
+                try:
+                    future, call_address, call_request, label, started = finished.get(
+                        timeout=None if hedged else hedging["delay_seconds"])
+                except queue.Empty:
+                    start_hedge()
+                    hedged, pending = True, pending + 1
+                    continue
+                pending -= 1
+                try:
+                    response = future.result()
+                except grpc.RpcError as e:
+                    if e.code() == grpc.StatusCode.UNAVAILABLE:
+                        unavailable.add(call_address)
+                    error = error or e
+                    message = e.details()
+                else:
+                    if timings is not None:
+                        timings.record(label, time.perf_counter() - started, future.trailing_metadata())
+                    result = (response.success, response.message, response.output_payload,
+                              call_request.output_file)
+                    if response.success:
+                        logging.info(f"[Hedge] {label} on {call_address} answered first")
+                        return result
+                    message = response.message
+                logging.warning(f"[Hedge] {label} on {call_address} failed: {message}")
+                if not hedged:
+                    # The first call failed before the hedge delay; send the hedge right away
+                    start_hedge()
+                    hedged, pending = True, pending + 1
+        finally:
+            # The losing call is no longer needed
+            for call in calls:
+                call.cancel()
+    if result is not None:
+        return result
+    raise error
+
+
+def get_node_policies(container_id: str, container_config: Dict[str, Any], plan: Optional[Dict[str, Any]]):
+    """
+    Returns the node's (retry policy, hedging settings). Sharded nodes already
+    retry every shard on another replica ('sharding.max_attempts'), so they
+    take neither.
+    """
+    retry = get_retry_policy(container_id, container_config)
+    hedging = get_hedging(container_id, container_config)
+    if plan is not None and (retry is not None or hedging is not None):
+        raise ValueError(f"Container '{container_id}' is sharded; use 'sharding.max_attempts' "
+                         "instead of 'retry' and 'hedging'")
+    return retry, hedging
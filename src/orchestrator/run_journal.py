@@ -0,0 +1,146 @@
+# src/orchestrator/run_journal.py
+
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+DEFAULT_JOURNAL_SETTINGS = {
+    "directory": ".run_journal",
+    "resume": True,
+}
+
+# Bumped whenever the journal layout changes so old journals are never resumed
+JOURNAL_VERSION = 1
+
+
+def _file_name(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", text)
+
+
+def workflow_fingerprint(config: Dict[str, Any]) -> str:
+    # Resuming is only safe while the nodes and their wiring are unchanged;
+    # service addresses may differ between runs
+    return hashlib.sha256(json.dumps({"start_node": config.get("start_node"),
+                                      "containers": config.get("containers", {})},
+                                     sort_keys=True).encode()).hexdigest()
+
+
+class RunJournal:
+    """
+    Persisted record of the nodes one workflow has completed.
+
+    After each successful node the journal stores its message, where its
+    file output went (per-shard or hedge files replacing output_file) and,
+    for in-memory hand-off, its output bytes. When a run fails, the next run
+    of the same workflow skips the journaled nodes and continues after the
+    last one instead of recomputing them. A run that completes, or a changed
+    workflow config, starts the next run from scratch.
+
+    Like the stage cache, journaled file outputs are assumed to still be in
+    place on the shared volume; the journal does not check them.
+    """
+
+    def __init__(self, config: Dict[str, Any], directory: str = DEFAULT_JOURNAL_SETTINGS["directory"],
+                 resume: bool = DEFAULT_JOURNAL_SETTINGS["resume"]):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.name = _file_name(config.get("workflow_name") or "workflow")
+        self.path = os.path.join(directory, f"{self.name}.json")
+        self.fingerprint = workflow_fingerprint(config)
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        self.resumed = 0
+
+        previous = self._load() if resume else None
+        if previous is not None:
+            self.completed = previous["completed"]
+            self.resumed = len(self.completed)
+            logging.info(f"[Journal] Resuming '{self.name}' after {self.resumed} completed nodes: "
+                         f"{list(self.completed)}")
+        else:
+            self._clear_payloads()
+        self._write("running")
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if journal.get("version") != JOURNAL_VERSION or journal.get("status") == "succeeded":
+            return None
+        if journal.get("fingerprint") != self.fingerprint:
+            logging.info(f"[Journal] Workflow '{self.name}' changed since its last run; starting from scratch")
+            return None
+        return journal
+
+    def _payload_path(self, node_id: str) -> str:
+        return os.path.join(self.directory, f"{self.name}.{_file_name(node_id)}.payload")
+
+    def _clear_payloads(self):
+        prefix = f"{self.name}."
+        for entry in os.listdir(self.directory):
+            if entry.startswith(prefix) and entry.endswith(".payload"):
+                os.remove(os.path.join(self.directory, entry))
+
+    def _write(self, status: str):
+        # Written to a temporary file and renamed, like checkpoints
+        journal = {"version": JOURNAL_VERSION, "fingerprint": self.fingerprint, "status": status,
+                   "completed": self.completed}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(journal, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def is_completed(self, node_id: str) -> bool:
+        return node_id in self.completed
+
+    def message(self, node_id: str) -> str:
+        return self.completed[node_id]["message"]
+
+    def output_files(self, node_id: str) -> Dict[str, List[str]]:
+        """Output files of the node -> the files that replaced them (per-shard or hedge outputs)."""
+        return self.completed[node_id]["output_files"]
+
+    def payload(self, node_id: str) -> bytes:
+        """The in-memory output of a journaled node (b"" for file outputs)."""
+        if not self.completed[node_id]["payload"]:
+            return b""
+        with open(self._payload_path(node_id), "rb") as f:
+            return f.read()
+
+    def record(self, node_id: str, message: str, output_payload: Optional[bytes] = None,
+               output_files: Optional[Dict[str, List[str]]] = None):
+        """Journals a successful node; 'output_payload' is kept when it is handed off in memory."""
+        if output_payload is not None:
+            temp_path = f"{self._payload_path(node_id)}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(output_payload)
+            os.replace(temp_path, self._payload_path(node_id))
+        self.completed[node_id] = {"message": message, "payload": output_payload is not None,
+                                   "output_files": output_files or {}}
+        self._write("running")
+
+    def finish(self, succeeded: bool):
+        # A completed run needs no resumption, so its stored payloads are removed
+        if succeeded:
+            self._clear_payloads()
+        self._write("succeeded" if succeeded else "failed")
+
+
+def build_run_journal(config: Dict[str, Any]) -> Optional[RunJournal]:
+    """Creates the RunJournal described by the config's optional 'run_journal' section."""
+    settings = config.get("run_journal")
+    if settings is None or settings is False:
+        return None
+    if settings is True:
+        settings = {}
+    if not isinstance(settings, dict):
+        raise ValueError("'run_journal' must be true or a dictionary")
+    unknown = set(settings) - set(DEFAULT_JOURNAL_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown 'run_journal' settings: {sorted(unknown)}")
+    merged = dict(DEFAULT_JOURNAL_SETTINGS, **settings)
+    return RunJournal(config, merged["directory"], bool(merged["resume"]))
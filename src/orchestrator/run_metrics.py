@@ -0,0 +1,79 @@
+# src/orchestrator/run_metrics.py
+# Collects the per-call metrics the services send back as trailing metadata
+# (see wp31_services/src/common/grpc_logging.py) and turns them into a timing
+# summary per workflow run.
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Trailing metadata key -> field of a recorded call
+STAGE_METADATA = {
+    "x-stage-duration-ms": "server_ms",
+    "x-stage-rows": "rows",
+    "x-stage-bytes-read": "bytes_read",
+    "x-stage-bytes-written": "bytes_written",
+    "x-stage-peak-rss-bytes": "peak_rss_bytes",
+}
+
+
+def parse_stage_metadata(metadata) -> Dict[str, float]:
+    """Reads the stage metrics out of a call's trailing metadata; services without them give {}."""
+    metrics = {}
+    for key, value in metadata or ():
+        field = STAGE_METADATA.get(key)
+        if field is not None:
+            try:
+                metrics[field] = float(value)
+            except ValueError:
+                continue
+    return metrics
+
+
+class RunTimings:
+    """
+    Thread-safe record of every node call in one workflow run: the wall time
+    seen by the orchestrator plus the service's own duration, rows, bytes and
+    peak RSS. Sharded nodes are recorded once per shard ("node[i]").
+    """
+
+    def __init__(self, workflow_name: Optional[str] = None):
+        self.workflow_name = workflow_name or "workflow"
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._calls: List[Dict[str, Any]] = []
+
+    def record(self, node_id: str, wall_seconds: float, metadata=None, cached: bool = False):
+        call = {"node": node_id, "wall_seconds": wall_seconds, "cached": cached}
+        call.update(parse_stage_metadata(metadata))
+        with self._lock:
+            self._calls.append(call)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = [dict(call) for call in self._calls]
+        return {
+            "workflow": self.workflow_name,
+            "wall_seconds": time.perf_counter() - self._started,
+            "nodes": calls,
+        }
+
+    def format_summary(self) -> str:
+        """Returns the run's calls as a fixed-width table."""
+        run = self.as_dict()
+        lines = [f"Timing summary for '{run['workflow']}' ({run['wall_seconds']:.3f}s wall):",
+                 f"{'node':<26} {'wall s':>8} {'server s':>9} {'rows':>11} {'rows/s':>12} "
+                 f"{'read MB':>9} {'written MB':>10} {'peak RSS MB':>11}"]
+        for call in run["nodes"]:
+            if call["cached"]:
+                lines.append(f"{call['node']:<26} {call['wall_seconds']:>8.3f} {'(stage cache hit)':>9}")
+                continue
+            if "server_ms" not in call:
+                lines.append(f"{call['node']:<26} {call['wall_seconds']:>8.3f} {'(no metrics)':>9}")
+                continue
+            server_seconds = call["server_ms"] / 1000
+            rate = call["rows"] / server_seconds if server_seconds else 0.0
+            lines.append(f"{call['node']:<26} {call['wall_seconds']:>8.3f} {server_seconds:>9.3f} "
+                         f"{call['rows']:>11,.0f} {rate:>12,.0f} {call['bytes_read'] / 1e6:>9.1f} "
+                         f"{call['bytes_written'] / 1e6:>10.1f} {call['peak_rss_bytes'] / 1e6:>11.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,239 @@
+# src/orchestrator/shard_executor.py
+
+import grpc
+import logging
+import os
+import threading
+from concurrent import futures
+from typing import Any, Dict, List, Optional
+
+from channel_pool import ChannelPool
+from node_retry import DEFAULT_RETRY_ON
+
+# Ways the analyzer can split one input between shards (its 'partition_by' parameter)
+SHARD_KEYS = ("household_id", "rows")
+
+# Magics of the analyzer's report layouts (see wp31_services/src/common/report_codec.py)
+COLUMNAR_MAGIC = b"EPC1"
+STREAM_MAGIC = b"EPS1"
+AGGREGATE_MAGIC = b"EPA1"
+# Arrow IPC and Parquet outputs (see wp31_services/src/common/table_io.py)
+ARROW_MAGIC = b"ARROW1"
+PARQUET_MAGIC = b"PAR1"
+# gzip, zstd and lz4 frames of a compressed output (see wp31_services/src/common/compression.py)
+COMPRESSION_MAGICS = (b"\x1f\x8b", b"\x28\xb5\x2f\xfd", b"\x04\x22\x4d\x18")
+
+# ReportChunk field tags: 'rows' (field 1) and 'columns' (field 2), both length-delimited
+_ROWS_TAG = b"\x0a"
+_COLUMNS_TAG = b"\x12"
+
+
+def get_replicas(container_id: str, service_registry: Dict[str, Any]) -> List[str]:
+    # A 'service_registry' entry is one "host:port" or a list of replica addresses
+    entry = service_registry.get(container_id)
+    if not entry:
+        raise ValueError(f"Missing service address for '{container_id}' in 'service_registry'")
+    replicas = [entry] if isinstance(entry, str) else list(entry)
+    if not all(isinstance(address, str) and address for address in replicas):
+        raise ValueError(f"Service addresses for '{container_id}' must be non-empty strings")
+    return replicas
+
+
+def get_sharding(container_id: str, container_config: Dict[str, Any], replicas: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the node's sharding plan, or None when it runs as a single request.
+
+    Only nodes with a 'sharding' section are sharded: the services that do
+    not partition their input would otherwise each produce the full output.
+    'shards' defaults to the number of replicas and 'max_attempts' (per
+    shard, each on a different replica when possible) to 3.
+    """
+    sharding = container_config.get("sharding")
+    if sharding is None:
+        return None
+    if not isinstance(sharding, dict):
+        raise ValueError(f"Container '{container_id}' field 'sharding' must be a dictionary")
+
+    plan = {
+        "shards": sharding.get("shards", len(replicas)),
+        "by": sharding.get("by", "household_id"),
+        "max_attempts": sharding.get("max_attempts", 3),
+    }
+    unknown = set(sharding) - set(plan)
+    if unknown:
+        raise ValueError(f"Container '{container_id}' has unknown 'sharding' settings: {sorted(unknown)}")
+    if not isinstance(plan["shards"], int) or plan["shards"] < 1:
+        raise ValueError(f"Container '{container_id}' 'sharding.shards' must be a positive integer")
+    if not isinstance(plan["max_attempts"], int) or plan["max_attempts"] < 1:
+        raise ValueError(f"Container '{container_id}' 'sharding.max_attempts' must be a positive integer")
+    if plan["by"] not in SHARD_KEYS:
+        raise ValueError(f"Container '{container_id}' has invalid 'sharding.by' '{plan['by']}'. "
+                         f"Expected one of {SHARD_KEYS}")
+    return plan
+
+
+def shard_output_path(output_file: str, shard_index: int) -> str:
+    # /data/analysis_output.pb -> /data/analysis_output.shard-0.pb
+    stem, extension = os.path.splitext(output_file)
+    return f"{stem}.shard-{shard_index}{extension}"
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _report_frame(tag: bytes, body: bytes) -> bytes:
+    # One varint length-delimited ReportChunk holding 'body' in the tagged field
+    chunk = tag + _encode_varint(len(body)) + body
+    return _encode_varint(len(chunk)) + chunk
+
+
+def merge_report_payloads(payloads: List[bytes]) -> bytes:
+    """
+    Concatenates the analyzer outputs of all shards, in shard order, into one report.
+
+    Serialized ProcessedDataReports merge by plain concatenation (their repeated
+    field is appended). As soon as one shard used the columnar or chunked layout,
+    every shard becomes one or more frames of a chunked (EPS1) report instead,
+    so each columnar household table stays with its own rows.
+    """
+    if any(payload.startswith(COMPRESSION_MAGICS) for payload in payloads):
+        raise ValueError("Compressed shard outputs cannot be merged in memory; use file hand-off")
+    if any(payload.startswith((ARROW_MAGIC, PARQUET_MAGIC)) for payload in payloads):
+        raise ValueError("Arrow and Parquet shard outputs cannot be merged in memory; use file hand-off")
+    if any(payload.startswith(AGGREGATE_MAGIC) for payload in payloads):
+        raise ValueError("Window rollup (aggregate_windows) shard outputs cannot be merged in memory; "
+                         "use file hand-off")
+    if not any(payload.startswith((COLUMNAR_MAGIC, STREAM_MAGIC)) for payload in payloads):
+        return b"".join(payloads)
+
+    merged = [STREAM_MAGIC]
+    for payload in payloads:
+        if payload.startswith(STREAM_MAGIC):
+            merged.append(payload[len(STREAM_MAGIC):])
+        elif payload.startswith(COLUMNAR_MAGIC):
+            merged.append(_report_frame(_COLUMNS_TAG, payload[len(COLUMNAR_MAGIC):]))
+        elif payload:
+            merged.append(_report_frame(_ROWS_TAG, payload))
+    return b"".join(merged)
+
+
+class ReplicaTracker:
+    """
+    Picks the replica for each shard attempt: the one with the fewest shards in
+    flight, skipping replicas the shard already failed on and replicas that
+    returned UNAVAILABLE during this run.
+    """
+
+    def __init__(self, replicas: List[str]):
+        self.replicas = replicas
+        self._lock = threading.Lock()
+        self._in_flight = {address: 0 for address in replicas}
+        self._dispatched = {address: 0 for address in replicas}
+        self._unavailable = set()
+
+    def acquire(self, exclude) -> str:
+        with self._lock:
+            candidates = [a for a in self.replicas if a not in exclude and a not in self._unavailable]
+            if not candidates:
+                # Every preferred replica failed; fall back to the least loaded one
+                candidates = [a for a in self.replicas if a not in exclude] or self.replicas
+            address = min(candidates, key=lambda a: (self._in_flight[a], self._dispatched[a]))
+            self._in_flight[address] += 1
+            self._dispatched[address] += 1
+            return address
+
+    def release(self, address: str, unavailable: bool = False):
+        with self._lock:
+            self._in_flight[address] -= 1
+            if unavailable:
+                self._unavailable.add(address)
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._dispatched)
+
+
+def build_shard_request(request, plan: Dict[str, Any], shard_index: int):
+    # Same inputs as the node's request, restricted to one partition and
+    # writing its own output (in memory, or next to the node's output file)
+    shard_request = type(request)()
+    shard_request.CopyFrom(request)
+    shard_request.parameters["partition_count"] = str(plan["shards"])
+    shard_request.parameters["partition_index"] = str(shard_index)
+    shard_request.parameters["partition_by"] = plan["by"]
+    if not request.return_payload:
+        shard_request.output_file = shard_output_path(request.output_file, shard_index)
+    return shard_request
+
+
+def _run_shard(pool: ChannelPool, tracker: ReplicaTracker, request, plan: Dict[str, Any],
+               shard_index: int, container_id: str, container_config: Dict[str, Any], call_node):
+    shard_id = f"{container_id}[{shard_index}]"
+    shard_request = build_shard_request(request, plan, shard_index)
+    tried = set()
+    message = "no attempt made"
+    for attempt in range(1, plan["max_attempts"] + 1):
+        address = tracker.acquire(tried)
+        tried.add(address)
+        unavailable = False
+        retryable = True
+        try:
+            with pool.stub(address) as stub:
+                success, message, output_payload = call_node(stub, shard_request, shard_id, container_config)
+        except grpc.RpcError as e:
+            unavailable = e.code() == grpc.StatusCode.UNAVAILABLE
+            if unavailable:
+                pool.discard(address)
+            # Like node retries: a call that may still be running (e.g. past its
+            # deadline) would race its retry writing the same shard file
+            retryable = e.code().name in DEFAULT_RETRY_ON
+            success, message, output_payload = False, f"gRPC error: {e.details()}", b""
+        finally:
+            tracker.release(address, unavailable)
+
+        if success:
+            logging.info(f"[Shard] {shard_id} succeeded on {address} (attempt {attempt}): {message}")
+            return True, message, output_payload
+        logging.warning(f"[Shard] {shard_id} failed on {address} (attempt {attempt}/{plan['max_attempts']}): {message}")
+        if not retryable:
+            break
+    return False, message, b""
+
+
+def execute_sharded(pool: ChannelPool, replicas: List[str], request, container_id: str,
+                    container_config: Dict[str, Any], plan: Dict[str, Any], call_node):
+    """
+    Runs one node as 'shards' partitions spread over its replicas and returns
+    (success, message, output_payload) like grpc_executor.execute_node.
+
+    Each shard is the node's request plus 'partition_count' / 'partition_index' /
+    'partition_by' parameters. Shards are dispatched concurrently to the least
+    loaded replica, and a failed shard is retried on another one. In-memory
+    outputs are merged in shard order; file outputs are left as one file per
+    shard (see shard_output_path) for the next node to read in order.
+    'call_node' runs one request on a stub (grpc_executor.call_node).
+    """
+    tracker = ReplicaTracker(replicas)
+    logging.info(f"[Shard] Running {container_id} as {plan['shards']} shards by {plan['by']} "
+                 f"on {len(replicas)} replicas")
+    with futures.ThreadPoolExecutor(max_workers=plan["shards"]) as executor:
+        results = list(executor.map(
+            lambda i: _run_shard(pool, tracker, request, plan, i, container_id, container_config, call_node),
+            range(plan["shards"])))
+    logging.info(f"[Shard] {container_id} shard attempts per replica: {tracker.summary()}")
+
+    failed = [i for i, (success, _, _) in enumerate(results) if not success]
+    if failed:
+        return False, f"{len(failed)} of {plan['shards']} shards failed; first error: {results[failed[0]][1]}", b""
+
+    output_payload = merge_report_payloads([payload for _, _, payload in results]) if request.return_payload else b""
+    return True, f"All {plan['shards']} shards succeeded on {len(replicas)} replicas", output_payload
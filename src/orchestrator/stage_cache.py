@@ -0,0 +1,195 @@
+# src/orchestrator/stage_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_SETTINGS = {
+    "directory": ".stage_cache",
+    "max_bytes": 1024 * 1024 * 1024,
+}
+
+# Bumped whenever the key layout changes so old entries are never reused
+CACHE_KEY_VERSION = b"stage-cache-v2"
+
+# Parameters that make a stage read state left by its earlier runs (anomaly
+# detector state, incremental checkpoints); its output then depends on more
+# than its inputs, so it always runs
+STATEFUL_PARAMETERS = ("anomaly_state_file", "checkpoint_file")
+
+# How the services pick an output's compression (wp31_services/src/common/compression.py):
+# the 'compression' parameter, else the output file's extension, at
+# 'compression_level' or the codec's default level
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".zst": "zstd", ".lz4": "lz4"}
+DEFAULT_COMPRESSION_LEVELS = {"gzip": 6, "zstd": 1, "lz4": 0}
+
+
+def output_compression(request) -> Optional[Tuple[str, str]]:
+    """Returns the (codec, level) a service compresses the request's output with, or None."""
+    codec = request.parameters.get("compression")
+    if codec is None and not request.return_payload:
+        codec = COMPRESSION_EXTENSIONS.get(os.path.splitext(request.output_file)[1].lower())
+    if codec is None or codec == "none":
+        return None
+    return codec, request.parameters.get("compression_level", str(DEFAULT_COMPRESSION_LEVELS.get(codec)))
+
+
+class StageCache:
+    """
+    Content-addressed cache of stage outputs in a local directory.
+
+    An entry is keyed on the node ID, its request parameters, how it hands
+    its output on (the output file's extensions, which select its format and
+    compression, or in-memory), the resolved output compression and the
+    SHA-256 of every input (forwarded payloads and the files the node reads),
+    so a rerun with unchanged inputs and config reuses the stored output
+    instead of calling the service. Entries are evicted least recently used
+    first once the directory holds more than 'max_bytes'.
+
+    Input and output files are only cacheable when the orchestrator can see
+    them at the same paths as the services (e.g. the shared /data volume is
+    mounted locally). Nodes whose files it cannot read, and stateful nodes
+    (STATEFUL_PARAMETERS or "incremental"), simply bypass the cache.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_SETTINGS["directory"],
+                 max_bytes: int = DEFAULT_CACHE_SETTINGS["max_bytes"]):
+        if max_bytes < 1:
+            raise ValueError(f"'max_bytes' must be positive, got {max_bytes}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # (path, size, mtime_ns) -> digest, so unchanged files are hashed once per process
+        self._file_digests: Dict[Tuple[str, int, int], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+    def _file_digest(self, path: str) -> str:
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._file_digests.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self._lock:
+                self._file_digests[memo_key] = digest
+        return digest
+
+    def key_for(self, container_id: str, request) -> Optional[str]:
+        """
+        Returns the cache key of a request, or None when the node keeps state
+        between runs or one of its input files is not readable here.
+        """
+        stateful = [name for name in STATEFUL_PARAMETERS if request.parameters.get(name)]
+        if request.parameters.get("incremental", "false").lower() == "true":
+            stateful.append("incremental")
+        if stateful:
+            logging.info(f"[Cache] Bypassing cache for {container_id}: "
+                         f"it keeps state between runs ({', '.join(stateful)})")
+            with self._lock:
+                self.bypassed += 1
+            return None
+        sha = hashlib.sha256(CACHE_KEY_VERSION)
+        sha.update(json.dumps({"id": container_id, "parameters": dict(request.parameters),
+                               "output_suffixes": "".join(pathlib.PurePath(request.output_file).suffixes).lower(),
+                               "return_payload": request.return_payload,
+                               "compression": output_compression(request)},
+                              sort_keys=True).encode())
+        try:
+            inputs = [hashlib.sha256(payload).hexdigest() for payload in request.input_payloads]
+            inputs += [self._file_digest(path) for path in request.input_files]
+            if request.input_payload:
+                inputs.append(hashlib.sha256(request.input_payload).hexdigest())
+            elif request.input_file:
+                inputs.append(self._file_digest(request.input_file))
+        except OSError as e:
+            logging.info(f"[Cache] Bypassing cache for {container_id}: {e}")
+            with self._lock:
+                self.bypassed += 1
+            return None
+        sha.update(json.dumps(inputs).encode())
+        return sha.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.out")
+
+    def load(self, key: str) -> Optional[bytes]:
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # The modification time doubles as the entry's last use for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(data)
+        return data
+
+    def store(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            logging.info(f"[Cache] Not caching {len(data)} bytes: larger than max_bytes={self.max_bytes}")
+            return
+        path = self._entry_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._evict_over_capacity()
+
+    def _evict_over_capacity(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".out"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                return
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "bytes_saved": self.bytes_saved,
+            }
+
+
+def build_stage_cache(settings: Optional[Dict[str, Any]]) -> Optional[StageCache]:
+    """Creates the cache from the optional top-level 'stage_cache' config section (None = disabled)."""
+    if settings is None:
+        return None
+    unknown = set(settings) - set(DEFAULT_CACHE_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown 'stage_cache' settings: {sorted(unknown)}")
+    return StageCache(**settings)
@@ -0,0 +1,504 @@
+# src/orchestrator/workflow_daemon.py
+#
+# Long-running orchestrator. It accepts workflow runs over gRPC (the
+# WorkflowScheduler service in proto/workflow_scheduler.proto), queues them by
+# priority and executes them on worker threads. The workers share one channel
+# pool, with optional per-service call limits, and a cache of parsed configs.
+#
+# Usage:
+#   python src/orchestrator/workflow_daemon.py serve --port 50050 --workers 8 --limit energy-analyzer=4
+#   python src/orchestrator/workflow_daemon.py submit config/energy-pipeline.json --priority 5 --wait
+#   python src/orchestrator/workflow_daemon.py serve --config-dir config
+#   python src/orchestrator/workflow_daemon.py submit energy-pipeline.json --remote
+#   python src/orchestrator/workflow_daemon.py status <run_id>
+#   python src/orchestrator/workflow_daemon.py cancel <run_id>
+#   python src/orchestrator/workflow_daemon.py queue
+
+import argparse
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from concurrent import futures
+from typing import Any, Dict, Optional, Tuple
+
+import grpc
+from google.protobuf import json_format
+
+# Add root directory to PYTHONPATH for import resolution
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from proto import workflow_scheduler_pb2, workflow_scheduler_pb2_grpc
+from batch_executor import apply_overrides, execute_workflows_batched, expand_runs, get_batch_settings
+from channel_pool import GRPC_COMPRESSION_ALGORITHMS, LimitedChannelPool
+from config_parser import validate_config
+from dag_executor import execute_dag
+from grpc_executor import execute_workflow
+from run_metrics import RunTimings
+from shard_executor import get_replicas
+
+DEFAULT_PORT = 50050
+DEFAULT_WORKERS = 8
+# Finished runs kept for GetRun; the oldest are forgotten first
+DEFAULT_MAX_HISTORY = 10_000
+# Parsed configs kept for resubmission
+CONFIG_CACHE_SIZE = 256
+# Execution modes the daemon runs; the asyncio backend needs an event loop of its own
+DAEMON_MODES = (None, "grpc", "dag", "batch")
+
+RunStatus = workflow_scheduler_pb2.RunStatus
+FINISHED_STATES = (RunStatus.SUCCEEDED, RunStatus.FAILED, RunStatus.CANCELLED)
+
+
+def check_daemon_config(config: Dict[str, Any]):
+    # Everything that can be rejected at submission is, so a bad run never occupies a worker
+    validate_config(config)
+    if config.get("execution_mode") not in DAEMON_MODES:
+        raise ValueError(f"The daemon does not run \"execution_mode\": \"{config['execution_mode']}\"; "
+                         "use \"grpc\", \"dag\" or \"batch\"")
+    if config.get("execution_mode") == "batch":
+        get_batch_settings(config)
+
+
+class ConfigCache:
+    """
+    Validated workflow configs, keyed by their JSON text or by config file
+    (path, modification time and size), so resubmitting a workflow skips
+    parsing and validation. Cached configs are shared between runs and are
+    never modified; overrides are applied to a copy.
+
+    Config files are only read from 'config_dir', with relative paths taken
+    from it; without one, only JSON text is accepted.
+    """
+
+    def __init__(self, max_entries: int = CONFIG_CACHE_SIZE, config_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.config_dir = os.path.realpath(config_dir) if config_dir else None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, config_json: str = "", config_path: str = "") -> Dict[str, Any]:
+        if bool(config_json) == bool(config_path):
+            raise ValueError("Set exactly one of 'config_json' and 'config_path'")
+        if config_path:
+            config_path = self._resolve(config_path)
+            try:
+                stat = os.stat(config_path)
+            except OSError as e:
+                raise ValueError(f"Cannot read config file '{config_path}': {e}")
+            key = ("path", config_path, stat.st_mtime_ns, stat.st_size)
+        else:
+            key = ("json", hashlib.sha256(config_json.encode()).hexdigest())
+
+        with self._lock:
+            config = self._entries.get(key)
+            if config is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return config
+            self.misses += 1
+
+        if config_path:
+            with open(config_path, "r") as f:
+                config_json = f.read()
+        try:
+            config = json.loads(config_json)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in workflow config: {e}")
+        check_daemon_config(config)
+
+        with self._lock:
+            self._entries[key] = config
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return config
+
+    def _resolve(self, config_path: str) -> str:
+        # Symlinks and '..' are resolved first, so a path cannot leave the config directory
+        if self.config_dir is None:
+            raise ValueError("This daemon only accepts inline configs ('config_json'); "
+                             "start it with --config-dir to submit config files by path")
+        path = os.path.realpath(os.path.join(self.config_dir, config_path))
+        if os.path.commonpath([path, self.config_dir]) != self.config_dir:
+            raise ValueError(f"Config file '{config_path}' is outside the daemon's config directory")
+        return path
+
+
+def run_config(config: Dict[str, Any], pool: LimitedChannelPool, timings: RunTimings) -> bool:
+    """Runs one submitted workflow with the executor its 'execution_mode' selects."""
+    mode = config.get("execution_mode")
+    if mode == "dag":
+        return execute_dag(config, pool=pool, timings=timings)
+    if mode == "batch":
+        settings = get_batch_settings(config)
+        return all(execute_workflows_batched(expand_runs(config), pool, settings["max_jobs"],
+                                             settings["max_parallel"], timings))
+    return execute_workflow(config, pool, timings)
+
+
+class RunRecord:
+    """One submitted workflow run and what is known about it so far."""
+
+    def __init__(self, run_id: str, config: Dict[str, Any], priority: int):
+        self.run_id = run_id
+        self.config = config
+        self.priority = priority
+        self.workflow_name = config.get("workflow_name") or "workflow"
+        self.state = RunStatus.QUEUED
+        self.message = ""
+        self.submitted_at = time.time()
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self.timings: Optional[Dict[str, Any]] = None
+
+    def to_status(self) -> RunStatus:
+        return RunStatus(
+            run_id=self.run_id, state=self.state, workflow_name=self.workflow_name, priority=self.priority,
+            message=self.message, submitted_at=self.submitted_at, started_at=self.started_at,
+            finished_at=self.finished_at, timings_json=json.dumps(self.timings) if self.timings else "")
+
+
+class WorkflowScheduler:
+    """
+    Priority queue of workflow runs and the worker threads executing them.
+
+    Higher priorities start first and equal priorities in submission order.
+    At most 'workers' runs execute at once, all sharing 'pool'. Runs of the
+    same workflow (by 'workflow_name') execute one at a time, since they
+    write the same output files and share its run_journal; a queued run
+    waits while another run of its workflow executes. 'node_limits'
+    caps the calls in flight to a node's service addresses, which are looked
+    up in each submitted config's 'service_registry'. The last 'max_history'
+    finished runs can still be queried.
+    """
+
+    def __init__(self, pool: LimitedChannelPool, workers: int = DEFAULT_WORKERS,
+                 node_limits: Optional[Dict[str, int]] = None, max_history: int = DEFAULT_MAX_HISTORY):
+        if workers < 1:
+            raise ValueError(f"'workers' must be at least 1, got {workers}")
+        self.pool = pool
+        self.workers = workers
+        self.node_limits = dict(node_limits or {})
+        self.max_history = max_history
+
+        self._condition = threading.Condition()
+        # (-priority, sequence, run ID); cancelled runs stay in the heap and are skipped
+        self._queue = []
+        self._sequence = itertools.count()
+        self._active: Dict[str, RunRecord] = {}
+        self._finished: "OrderedDict[str, RunRecord]" = OrderedDict()
+        self._queued_by_priority: Dict[int, int] = defaultdict(int)
+        self._running = 0
+        self._running_workflows = set()
+        self.counts = {"submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+        self._stopping = False
+        self._threads = [threading.Thread(target=self._work, name=f"run-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, config: Dict[str, Any], priority: int = 0) -> Tuple[str, int]:
+        """Queues a validated config; returns (run ID, runs now waiting in the queue)."""
+        self._apply_node_limits(config)
+        record = RunRecord(uuid.uuid4().hex, config, priority)
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("The daemon is shutting down")
+            self._active[record.run_id] = record
+            heapq.heappush(self._queue, (-priority, next(self._sequence), record.run_id))
+            self._queued_by_priority[priority] += 1
+            self.counts["submitted"] += 1
+            self._condition.notify()
+            queued = sum(self._queued_by_priority.values())
+        logging.info(f"[Daemon] Queued run {record.run_id} ('{record.workflow_name}', priority {priority})")
+        return record.run_id, queued
+
+    def _apply_node_limits(self, config: Dict[str, Any]):
+        registry = config.get("service_registry", {})
+        for node_id, limit in self.node_limits.items():
+            if node_id in registry:
+                for address in get_replicas(node_id, registry):
+                    if address not in self.pool.limits:
+                        self.pool.set_limit(address, limit)
+
+    def status(self, run_id: str) -> Optional[RunStatus]:
+        with self._condition:
+            record = self._active.get(run_id) or self._finished.get(run_id)
+            return record.to_status() if record is not None else None
+
+    def cancel(self, run_id: str) -> Optional[RunStatus]:
+        """Cancels a queued run; runs that already started are not interrupted."""
+        with self._condition:
+            record = self._active.get(run_id) or self._finished.get(run_id)
+            if record is not None and record.state == RunStatus.QUEUED:
+                self._dequeue(record)
+                self._finish(record, RunStatus.CANCELLED, "Cancelled before it started")
+            return record.to_status() if record is not None else None
+
+    def queue_status(self) -> workflow_scheduler_pb2.QueueStatus:
+        services = [workflow_scheduler_pb2.ServiceLoad(**load) for load in self.pool.load()]
+        with self._condition:
+            return workflow_scheduler_pb2.QueueStatus(
+                queued=sum(self._queued_by_priority.values()), running=self._running, workers=self.workers,
+                queued_by_priority={p: n for p, n in self._queued_by_priority.items() if n},
+                services=services, **self.counts)
+
+    def stop(self):
+        """Lets running runs finish, cancels the queued ones and stops the workers."""
+        with self._condition:
+            self._stopping = True
+            for record in list(self._active.values()):
+                if record.state == RunStatus.QUEUED:
+                    self._dequeue(record)
+                    self._finish(record, RunStatus.CANCELLED, "The daemon shut down before the run started")
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _dequeue(self, record: RunRecord):
+        # Called with the lock held; the heap entry is dropped when a worker reaches it
+        self._queued_by_priority[record.priority] -= 1
+        if not self._queued_by_priority[record.priority]:
+            del self._queued_by_priority[record.priority]
+
+    def _finish(self, record: RunRecord, state: int, message: str):
+        # Called with the lock held: the run moves to the bounded history
+        record.state = state
+        record.message = message
+        record.finished_at = time.time()
+        record.config = None
+        self.counts[RunStatus.State.Name(state).lower()] += 1
+        del self._active[record.run_id]
+        self._finished[record.run_id] = record
+        while len(self._finished) > self.max_history:
+            self._finished.popitem(last=False)
+
+    def _pop_runnable(self) -> Optional[RunRecord]:
+        # Called with the lock held: the first queued run whose workflow is not
+        # running. Runs passed over keep their place in the heap.
+        deferred = []
+        record = None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            candidate = self._active.get(entry[2])
+            if candidate is None or candidate.state != RunStatus.QUEUED:
+                continue
+            if candidate.workflow_name in self._running_workflows:
+                deferred.append(entry)
+                continue
+            record = candidate
+            break
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+        return record
+
+    def _next_run(self) -> Optional[RunRecord]:
+        with self._condition:
+            while True:
+                if self._stopping:
+                    return None
+                record = self._pop_runnable()
+                if record is None:
+                    self._condition.wait()
+                    continue
+                self._dequeue(record)
+                record.state = RunStatus.RUNNING
+                record.started_at = time.time()
+                self._running += 1
+                self._running_workflows.add(record.workflow_name)
+                return record
+
+    def _work(self):
+        while True:
+            record = self._next_run()
+            if record is None:
+                return
+            logging.info(f"[Daemon] Starting run {record.run_id} ('{record.workflow_name}')")
+            timings = RunTimings(record.workflow_name)
+            try:
+                succeeded = run_config(record.config, self.pool, timings)
+                message = ("Workflow completed successfully." if succeeded
+                           else "Workflow stopped due to an error; see the orchestrator log.")
+            except Exception as e:
+                logging.exception(f"[Daemon] Run {record.run_id} failed")
+                succeeded, message = False, f"An error occurred: {e}"
+            with self._condition:
+                record.timings = timings.as_dict()
+                self._running -= 1
+                self._running_workflows.discard(record.workflow_name)
+                self._finish(record, RunStatus.SUCCEEDED if succeeded else RunStatus.FAILED, message)
+                # Runs of the same workflow may have been waiting for this one
+                self._condition.notify_all()
+            logging.info(f"[Daemon] Run {record.run_id} finished: {message}")
+
+
+class WorkflowSchedulerServicer(workflow_scheduler_pb2_grpc.WorkflowSchedulerServicer):
+    def __init__(self, scheduler: WorkflowScheduler, configs: ConfigCache):
+        self._scheduler = scheduler
+        self._configs = configs
+
+    def SubmitRun(self, request, context):
+        try:
+            config = self._configs.get(request.config_json, request.config_path)
+            if request.overrides_json:
+                overrides = json.loads(request.overrides_json)
+                if not isinstance(overrides, dict):
+                    raise ValueError("'overrides_json' must be a JSON object")
+                config = apply_overrides(config, overrides, "'overrides_json'")
+                check_daemon_config(config)
+            run_id, queued = self._scheduler.submit(config, request.priority)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except RuntimeError as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        return workflow_scheduler_pb2.SubmitRunResponse(run_id=run_id, queued=queued)
+
+    def GetRun(self, request, context):
+        status = self._scheduler.status(request.run_id)
+        if status is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"Unknown run '{request.run_id}'")
+        return status
+
+    def CancelRun(self, request, context):
+        status = self._scheduler.cancel(request.run_id)
+        if status is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"Unknown run '{request.run_id}'")
+        return status
+
+    def GetQueueStatus(self, request, context):
+        return self._scheduler.queue_status()
+
+
+def build_server(scheduler: WorkflowScheduler, port: int = DEFAULT_PORT, configs: Optional[ConfigCache] = None):
+    # Creates and starts the server and returns (server, bound port); port 0 picks a free port
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=16))
+    workflow_scheduler_pb2_grpc.add_WorkflowSchedulerServicer_to_server(
+        WorkflowSchedulerServicer(scheduler, configs or ConfigCache()), server)
+    port = server.add_insecure_port(f"[::]:{port}")
+    server.start()
+    logging.info(f"[Daemon] Workflow scheduler listening on :{port} with {scheduler.workers} workers")
+    return server, port
+
+
+def parse_limits(values) -> Tuple[Dict[str, int], Dict[str, int]]:
+    # "--limit energy-analyzer=4" limits a node's service addresses, "--limit host:port=4" one address
+    node_limits, address_limits = {}, {}
+    for value in values or ():
+        key, _, limit = value.rpartition("=")
+        if not key or not limit.isdigit() or int(limit) < 1:
+            raise ValueError(f"Invalid --limit '{value}'; expected NODE_ID=N or HOST:PORT=N")
+        (address_limits if ":" in key else node_limits)[key] = int(limit)
+    return node_limits, address_limits
+
+
+def serve(args):
+    log_dir = os.environ.get("LOG_DIR", "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    logging.basicConfig(filename=os.path.join(log_dir, "workflow_daemon.log"), level=logging.INFO,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.quiet:
+        # The executors print every node and timing summary; at high run rates that is mostly noise
+        sys.stdout = open(os.devnull, "w")
+
+    node_limits, address_limits = parse_limits(args.limit)
+    pool = LimitedChannelPool(address_limits, compression=args.compression)
+    scheduler = WorkflowScheduler(pool, args.workers, node_limits, args.max_history)
+    server, port = build_server(scheduler, args.port, ConfigCache(config_dir=args.config_dir))
+    print(f"Workflow daemon listening on :{port}", file=sys.stderr)
+
+    signal.signal(signal.SIGTERM, lambda *_: server.stop(5))
+    try:
+        server.wait_for_termination()
+    except KeyboardInterrupt:
+        server.stop(5)
+    scheduler.stop()
+    pool.close()
+
+
+def print_message(message):
+    print(json_format.MessageToJson(message, preserving_proto_field_name=True))
+
+
+def run_client(args) -> int:
+    with grpc.insecure_channel(args.address) as channel:
+        stub = workflow_scheduler_pb2_grpc.WorkflowSchedulerStub(channel)
+        if args.command == "submit":
+            request = workflow_scheduler_pb2.SubmitRunRequest(priority=args.priority,
+                                                              overrides_json=args.overrides or "")
+            if args.remote:
+                request.config_path = args.config
+            else:
+                with open(args.config, "r") as f:
+                    request.config_json = f.read()
+            response = stub.SubmitRun(request)
+            if not args.wait:
+                print_message(response)
+                return 0
+            while True:
+                status = stub.GetRun(workflow_scheduler_pb2.RunRequest(run_id=response.run_id))
+                if status.state in FINISHED_STATES:
+                    print_message(status)
+                    return 0 if status.state == RunStatus.SUCCEEDED else 1
+                time.sleep(0.2)
+        if args.command == "status":
+            print_message(stub.GetRun(workflow_scheduler_pb2.RunRequest(run_id=args.run_id)))
+        elif args.command == "cancel":
+            print_message(stub.CancelRun(workflow_scheduler_pb2.RunRequest(run_id=args.run_id)))
+        else:
+            print_message(stub.GetQueueStatus(workflow_scheduler_pb2.QueueStatusRequest()))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running workflow orchestrator and its client")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the daemon")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Runs executed at once")
+    serve_parser.add_argument("--limit", action="append", metavar="NODE_ID=N|HOST:PORT=N",
+                              help="Cap the calls in flight to a service (repeatable)")
+    serve_parser.add_argument("--max-history", type=int, default=DEFAULT_MAX_HISTORY)
+    serve_parser.add_argument("--config-dir", help="Directory that configs submitted by path (--remote) are read "
+                                                   "from; without it only inline configs are accepted")
+    serve_parser.add_argument("--quiet", action="store_true", help="Discard the executors' console output")
+    serve_parser.add_argument("--compression", choices=sorted(GRPC_COMPRESSION_ALGORITHMS), default="none",
+                              help="gRPC compression of the requests sent to the services")
+
+    for name in ("submit", "status", "cancel", "queue"):
+        command = commands.add_parser(name)
+        command.add_argument("--address", default=f"localhost:{DEFAULT_PORT}")
+        if name == "submit":
+            command.add_argument("config", help="Workflow config file")
+            command.add_argument("--priority", type=int, default=0)
+            command.add_argument("--overrides", help="JSON object of container overrides")
+            command.add_argument("--remote", action="store_true",
+                                 help="Send the path, relative to the daemon's --config-dir, for the daemon to "
+                                      "read instead of the file's contents")
+            command.add_argument("--wait", action="store_true", help="Wait for the run and print its status")
+        elif name in ("status", "cancel"):
+            command.add_argument("run_id")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+        return 0
+    try:
+        return run_client(args)
+    except grpc.RpcError as e:
+        print(f"Error: {e.code().name}: {e.details()}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
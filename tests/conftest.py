@@ -0,0 +1,10 @@
+# tests/conftest.py
+# The orchestrator modules import each other as top-level modules, like
+# grpc_main.py does when it runs from src/orchestrator.
+
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src", "orchestrator"))
+sys.path.insert(0, ROOT_DIR)
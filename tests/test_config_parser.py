@@ -0,0 +1,78 @@
+# tests/test_config_parser.py
+
+import copy
+
+import pytest
+
+from config_parser import get_successors, validate_config
+
+VALID_CONFIG = {
+    "workflow_name": "test",
+    "start_node": "a",
+    "service_registry": {"a": "localhost:1", "b": "localhost:2", "c": "localhost:3"},
+    "containers": {
+        "a": {"id": "a", "input_file": "/data/in", "output_file": "/data/a", "next_node": ["b", "c"]},
+        "b": {"id": "b", "input_file": "/data/a", "output_file": "/data/b", "next_node": None},
+        "c": {"id": "c", "input_file": "/data/a", "output_file": "/data/c", "next_node": None},
+    },
+}
+
+
+def config_with(**changes):
+    config = copy.deepcopy(VALID_CONFIG)
+    config.update(changes)
+    return config
+
+
+def test_valid_config_passes():
+    validate_config(copy.deepcopy(VALID_CONFIG))
+
+
+def test_get_successors():
+    assert get_successors({"next_node": None}) == []
+    assert get_successors({"next_node": ""}) == []
+    assert get_successors({"next_node": "b"}) == ["b"]
+    assert get_successors({"next_node": ["b", "c"]}) == ["b", "c"]
+
+
+@pytest.mark.parametrize("config, message", [
+    ([], "must be a JSON object"),
+    (config_with(start_node=""), "non-empty 'start_node'"),
+    (config_with(containers=[]), "'containers' dictionary"),
+    (config_with(service_registry=None), "'service_registry' dictionary"),
+    (config_with(start_node="missing"), "'missing' does not exist"),
+    (config_with(max_concurrency=0), "'max_concurrency' must be a positive integer"),
+    (config_with(max_concurrency="2"), "'max_concurrency' must be a positive integer"),
+])
+def test_invalid_top_level_fields(config, message):
+    with pytest.raises(ValueError, match=message):
+        validate_config(config)
+
+
+def test_container_must_be_a_dictionary():
+    config = config_with()
+    config["containers"]["b"] = "not a container"
+    with pytest.raises(ValueError, match="Container 'b' must be a dictionary"):
+        validate_config(config)
+
+
+@pytest.mark.parametrize("next_node", [5, ["b", 5], ["b", ""]])
+def test_invalid_next_node(next_node):
+    config = config_with()
+    config["containers"]["a"]["next_node"] = next_node
+    with pytest.raises(ValueError, match="invalid 'next_node'"):
+        validate_config(config)
+
+
+def test_unknown_next_node():
+    config = config_with()
+    config["containers"]["b"]["next_node"] = "z"
+    with pytest.raises(ValueError, match="unknown 'next_node' 'z'"):
+        validate_config(config)
+
+
+def test_cycle_is_rejected():
+    config = config_with()
+    config["containers"]["c"]["next_node"] = "a"
+    with pytest.raises(ValueError, match="contains a cycle"):
+        validate_config(config)
@@ -0,0 +1,466 @@
+# tests/test_orchestrator.py
+# Orchestrator behaviour that needs no running services: calls go to fake stubs.
+
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import threading
+import time
+import types
+
+import grpc
+import pytest
+
+import aio_executor
+from batch_executor import execute_workflows_batched
+import channel_pool
+from channel_pool import ChannelPool
+from node_retry import execute_hedged, execute_with_retry, get_retry_policy, hedge_output_path
+from proto import energy_pipeline_pb2
+from shard_executor import execute_sharded, get_sharding, shard_output_path
+from stage_cache import StageCache, output_compression
+import workflow_daemon
+from workflow_daemon import FINISHED_STATES, ConfigCache, RunStatus, WorkflowScheduler
+
+
+class FakeAioCall:
+    # Stands in for a grpc.aio unary call: awaiting it gives the response
+    def __init__(self, response):
+        self.response = response
+
+    def __await__(self):
+        async def result():
+            return self.response
+        return result().__await__()
+
+    async def trailing_metadata(self):
+        return ()
+
+
+class FakeResponse:
+    def __init__(self, success=True, message="ok"):
+        self.success = success
+        self.message = message
+        self.output_payload = b""
+
+
+class FakeAioStub:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def Execute(self, request, timeout=None):
+        self.calls.append(request)
+        return FakeAioCall(FakeResponse())
+
+
+class FakeAioPool:
+    def __init__(self):
+        self.calls = []
+
+    def stub(self, address):
+        return FakeAioStub(self.calls)
+
+
+def linear_config(**changes):
+    config = {
+        "start_node": "a",
+        "service_registry": {"a": "localhost:1"},
+        "containers": {"a": {"id": "a", "input_file": "in.csv", "output_file": "out.csv"}},
+    }
+    config.update(changes)
+    return config
+
+
+def test_aio_reports_rejected_settings_per_config():
+    pool = FakeAioPool()
+    configs = [
+        linear_config(),
+        linear_config(stage_cache={"directory": "cache"}),
+        linear_config(channel_pool={"compression": "gzip"}),
+        linear_config(channel_pool={"compression": "none"}),
+    ]
+    results = asyncio.run(aio_executor.run_workflows(configs, pool=pool))
+    assert results == [True, False, False, True]
+    assert len(pool.calls) == 2
+
+
+def cache_request(input_path, output_file="out/report.csv", return_payload=False, **parameters):
+    return energy_pipeline_pb2.ExecuteRequest(input_file=str(input_path), output_file=output_file,
+                                              return_payload=return_payload, parameters=parameters)
+
+
+def test_stage_cache_key_follows_inputs_parameters_and_output(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    input_path = tmp_path / "in.pb"
+    input_path.write_bytes(b"records")
+    key = cache.key_for("reporter", cache_request(input_path))
+
+    # Same inputs and output format, different directory: same output
+    assert cache.key_for("reporter", cache_request(input_path, "elsewhere/report.csv")) == key
+    assert cache.key_for("reporter", cache_request(input_path, "out/report.parquet")) != key
+    assert cache.key_for("reporter", cache_request(input_path, "", return_payload=True)) != key
+    assert cache.key_for("reporter", cache_request(input_path, output_format="arrow")) != key
+    assert cache.key_for("analyzer", cache_request(input_path)) != key
+
+    input_path.write_bytes(b"other records")
+    assert cache.key_for("reporter", cache_request(input_path)) != key
+
+
+def test_stage_cache_bypasses_unreadable_inputs(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    assert cache.key_for("reporter", cache_request(tmp_path / "missing.pb")) is None
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_stage_cache_bypasses_stateful_nodes(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    input_path = tmp_path / "in.csv"
+    input_path.write_bytes(b"timestamp,household_id,power\n")
+    for parameters in ({"anomaly_state_file": "/data/state.bin"}, {"checkpoint_file": "/data/ckpt.json"},
+                       {"incremental": "true"}):
+        assert cache.key_for("analyzer", cache_request(input_path, **parameters)) is None
+    assert cache.key_for("analyzer", cache_request(input_path, incremental="false")) is not None
+    assert cache.stats()["bypassed"] == 3
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._code.name
+
+
+def test_retry_does_not_repeat_timed_out_calls_by_default():
+    policy = get_retry_policy("analyzer", {"retry": {"initial_backoff_seconds": 0}})
+    attempts = []
+
+    def attempt():
+        attempts.append(1)
+        raise FakeRpcError(grpc.StatusCode.DEADLINE_EXCEEDED)
+
+    with pytest.raises(grpc.RpcError):
+        execute_with_retry(attempt, policy, "analyzer")
+    assert len(attempts) == 1
+
+
+def test_retry_repeats_unavailable_calls():
+    policy = get_retry_policy("analyzer", {"retry": {"initial_backoff_seconds": 0}})
+    results = [FakeRpcError(grpc.StatusCode.UNAVAILABLE), (True, "ok", b"")]
+
+    def attempt():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert execute_with_retry(attempt, policy, "analyzer") == (True, "ok", b"")
+
+
+class FakeFuture(concurrent.futures.Future):
+    # A grpc unary future: a concurrent.futures.Future with trailing metadata
+    def trailing_metadata(self):
+        return ()
+
+
+class FakeHedgePool:
+    # The first replica never answers; the hedge replica answers at once
+    def __init__(self, hedge_address):
+        self.hedge_address = hedge_address
+        self.requests = {}
+        self.futures = []
+
+    @contextlib.contextmanager
+    def stub(self, address):
+        pool = self
+
+        class Execute:
+            @staticmethod
+            def future(request, timeout=None):
+                pool.requests[address] = request
+                future = FakeFuture()
+                pool.futures.append(future)
+                if address == pool.hedge_address:
+                    future.set_result(types.SimpleNamespace(success=True, message="ok", output_payload=b""))
+                return future
+
+        yield types.SimpleNamespace(Execute=Execute)
+
+    def discard(self, address):
+        pass
+
+
+def test_hedge_writes_its_own_output_file():
+    pool = FakeHedgePool("replica-2:1")
+    request = energy_pipeline_pb2.ExecuteRequest(input_file="/data/in.csv", output_file="/data/out.pb")
+    hedging = {"address": "replica-2:1", "delay_seconds": 0.01}
+
+    success, _, _, output_file = execute_hedged(pool, "replica-1:1", hedging, request, "analyzer", {})
+
+    assert success
+    assert output_file == hedge_output_path("/data/out.pb") == "/data/out.hedge.pb"
+    assert pool.requests["replica-1:1"].output_file == "/data/out.pb"
+    assert pool.requests["replica-2:1"].output_file == "/data/out.hedge.pb"
+    # The slow first call is cancelled
+    assert pool.futures[0].cancelled()
+
+
+class FakeBatchStream(list):
+    def trailing_metadata(self):
+        return ()
+
+
+class FakeBatchPool:
+    def __init__(self):
+        self.jobs = []
+
+    @contextlib.contextmanager
+    def stub(self, address):
+        yield types.SimpleNamespace(ExecuteBatch=self.execute_batch)
+
+    def execute_batch(self, request, timeout):
+        self.jobs.extend(request.jobs)
+        return FakeBatchStream(
+            energy_pipeline_pb2.ExecuteBatchResult(
+                index=index, response=energy_pipeline_pb2.ExecuteResponse(success=True, message="ok"))
+            for index in range(len(request.jobs)))
+
+    def discard(self, address):
+        pass
+
+    def stats(self):
+        return {}
+
+
+@pytest.mark.parametrize("setting", [{"run_journal": "journal.json"}, {"stage_cache": {"directory": "cache"}},
+                                     {"containers": {}}])
+def test_batched_run_with_an_invalid_config_fails_alone(setting):
+    pool = FakeBatchPool()
+    results = execute_workflows_batched([linear_config(), linear_config(**setting), linear_config()], pool=pool)
+
+    assert results == [True, False, True]
+    assert len(pool.jobs) == 2
+
+
+def test_stage_cache_key_follows_output_compression(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    input_path = tmp_path / "in.pb"
+    input_path.write_bytes(b"records")
+    key = cache.key_for("reporter", cache_request(input_path, "out/report.csv"))
+
+    gzip_key = cache.key_for("reporter", cache_request(input_path, "out/report.csv", compression="gzip"))
+    assert gzip_key != key
+    # A .gz, .zst or .lz4 extension compresses as well
+    assert cache.key_for("reporter", cache_request(input_path, "out/report.csv.gz")) != key
+    assert cache.key_for("reporter", cache_request(input_path, "out/report.csv", compression="gzip",
+                                                   compression_level="9")) != gzip_key
+    assert cache.key_for("reporter", cache_request(input_path, "out/report.csv.zst")) != \
+        cache.key_for("reporter", cache_request(input_path, "out/report.csv.lz4"))
+    assert output_compression(cache_request(input_path, "out/report.csv.gz")) == ("gzip", "6")
+    assert output_compression(cache_request(input_path, "out/report.csv.gz", compression="none")) is None
+    assert output_compression(cache_request(input_path, "", return_payload=True)) is None
+
+
+def test_sharding_needs_a_sharding_section():
+    replicas = ["analyzer-1:1", "analyzer-2:1"]
+    assert get_sharding("reporter", {}, replicas) is None
+    assert get_sharding("analyzer", {"sharding": {}}, replicas) == {"shards": 2, "by": "household_id",
+                                                                   "max_attempts": 3}
+
+
+class FakeShardPool:
+    @contextlib.contextmanager
+    def stub(self, address):
+        yield address
+
+    def discard(self, address):
+        pass
+
+
+@pytest.mark.parametrize("code, attempts", [(grpc.StatusCode.DEADLINE_EXCEEDED, 1), (grpc.StatusCode.UNAVAILABLE, 2)])
+def test_shards_only_retry_calls_that_cannot_still_be_running(code, attempts):
+    calls = []
+
+    def call_node(stub, request, shard_id, container_config):
+        calls.append(request.output_file)
+        if len(calls) == 1:
+            raise FakeRpcError(code)
+        return True, "ok", b""
+
+    request = energy_pipeline_pb2.ExecuteRequest(input_file="/data/in.csv", output_file="/data/out.pb")
+    plan = {"shards": 1, "by": "rows", "max_attempts": 3}
+    success, _, _ = execute_sharded(FakeShardPool(), ["analyzer-1:1", "analyzer-2:1"], request, "analyzer", {},
+                                    plan, call_node)
+    assert success == (attempts == 2)
+    assert calls == [shard_output_path("/data/out.pb", 0)] * attempts
+
+
+class FakeRuns:
+    # Replaces workflow_daemon.run_config: runs block until released and are recorded as they start
+    def __init__(self):
+        self.started = []
+        self.running = set()
+        self.overlapping = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, config, pool, timings):
+        name = config["workflow_name"]
+        with self._lock:
+            self.started.append(name)
+            if name in self.running:
+                self.overlapping.append(name)
+            self.running.add(name)
+        self.release.wait(5)
+        with self._lock:
+            self.running.discard(name)
+        return True
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def fake_runs(monkeypatch):
+    runs = FakeRuns()
+    monkeypatch.setattr(workflow_daemon, "run_config", runs)
+    return runs
+
+
+def test_daemon_starts_higher_priorities_first(fake_runs):
+    scheduler = WorkflowScheduler(object(), workers=1)
+    try:
+        scheduler.submit({"workflow_name": "first"})
+        wait_until(lambda: fake_runs.started == ["first"])
+        low, _ = scheduler.submit({"workflow_name": "low"}, priority=0)
+        scheduler.submit({"workflow_name": "high"}, priority=5)
+        fake_runs.release.set()
+        wait_until(lambda: scheduler.status(low).state in FINISHED_STATES)
+        assert fake_runs.started == ["first", "high", "low"]
+    finally:
+        fake_runs.release.set()
+        scheduler.stop()
+
+
+def test_daemon_cancels_queued_runs_only(fake_runs):
+    scheduler = WorkflowScheduler(object(), workers=1)
+    try:
+        running, _ = scheduler.submit({"workflow_name": "running"})
+        wait_until(lambda: fake_runs.started == ["running"])
+        queued, _ = scheduler.submit({"workflow_name": "queued"})
+
+        assert scheduler.cancel(queued).state == RunStatus.CANCELLED
+        assert scheduler.cancel(running).state == RunStatus.RUNNING
+        fake_runs.release.set()
+        wait_until(lambda: scheduler.status(running).state in FINISHED_STATES)
+        assert scheduler.status(running).state == RunStatus.SUCCEEDED
+        assert fake_runs.started == ["running"]
+    finally:
+        fake_runs.release.set()
+        scheduler.stop()
+
+
+def test_daemon_runs_one_run_of_a_workflow_at_a_time(fake_runs):
+    scheduler = WorkflowScheduler(object(), workers=2)
+    try:
+        first, _ = scheduler.submit({"workflow_name": "same"})
+        second, _ = scheduler.submit({"workflow_name": "same"})
+        scheduler.submit({"workflow_name": "other"})
+        # The second worker passes over the waiting run of 'same'
+        wait_until(lambda: sorted(fake_runs.started) == ["other", "same"])
+        assert scheduler.status(second).state == RunStatus.QUEUED
+
+        fake_runs.release.set()
+        wait_until(lambda: scheduler.status(second).state in FINISHED_STATES)
+        assert fake_runs.started.count("same") == 2
+        assert fake_runs.overlapping == []
+    finally:
+        fake_runs.release.set()
+        scheduler.stop()
+
+
+def test_daemon_reads_config_files_from_its_config_directory_only(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    config = linear_config()
+    (config_dir / "workflow.json").write_text(json.dumps(config))
+    (tmp_path / "secret.json").write_text(json.dumps(config))
+
+    assert ConfigCache(config_dir=str(config_dir)).get(config_path="workflow.json") == config
+    for path in ("../secret.json", str(tmp_path / "secret.json")):
+        with pytest.raises(ValueError, match="outside"):
+            ConfigCache(config_dir=str(config_dir)).get(config_path=path)
+    with pytest.raises(ValueError, match="inline"):
+        ConfigCache().get(config_path=str(config_dir / "workflow.json"))
+
+
+class FakeChannel:
+    # Stands in for grpc.insecure_channel; a real channel's connectivity polling
+    # thread can outlive a channel the pool closes right away
+    def __init__(self, address, options=None, compression=None):
+        self.closed = False
+
+    def __getattr__(self, name):
+        # subscribe, unsubscribe and the stub's method factories
+        return lambda *args, **kwargs: None
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_channels(monkeypatch):
+    monkeypatch.setattr(channel_pool.grpc, "insecure_channel", FakeChannel)
+
+
+def lease(pool, address):
+    with pool.stub(address) as stub:
+        return stub
+
+
+def test_channel_pool_reuses_the_stub_of_an_address(fake_channels):
+    pool = ChannelPool()
+    try:
+        first = lease(pool, "localhost:1")
+        assert lease(pool, "localhost:1") is first
+        assert lease(pool, "localhost:2") is not first
+        assert {key: pool.stats()[key] for key in ("hits", "misses", "open_channels")} == \
+            {"hits": 1, "misses": 2, "open_channels": 2}
+    finally:
+        pool.close()
+
+
+def test_channel_pool_evicts_the_least_recently_used_idle_channel(fake_channels):
+    pool = ChannelPool(max_channels=2)
+    try:
+        with pool.stub("localhost:1") as leased:
+            lease(pool, "localhost:2")
+            lease(pool, "localhost:3")
+            # localhost:1 is leased, so the idle localhost:2 goes instead
+            assert list(pool._entries) == ["localhost:1", "localhost:3"]
+            assert lease(pool, "localhost:1") is leased
+        lease(pool, "localhost:4")
+        assert list(pool._entries) == ["localhost:1", "localhost:4"]
+        assert pool.stats()["evictions"] == 2
+    finally:
+        pool.close()
+
+
+def test_channel_pool_closes_idle_channels(fake_channels):
+    pool = ChannelPool(idle_timeout_seconds=0.01)
+    try:
+        first = lease(pool, "localhost:1")
+        time.sleep(0.05)
+        assert lease(pool, "localhost:1") is not first
+        assert {key: pool.stats()[key] for key in ("hits", "misses", "evictions")} == \
+            {"hits": 0, "misses": 2, "evictions": 1}
+    finally:
+        pool.close()
@@ -0,0 +1,215 @@
+# energy_analyzer/anomaly.py
+# Anomaly detection for the analyzer. The default is the fixed efficiency
+# threshold; "ewma" flags readings that are far from the household's own
+# exponentially weighted history instead.
+#
+# The EWMA detector keeps three numbers per household (mean, variance and
+# observation count) and updates them chunk by chunk, so each call costs time
+# proportional to its new rows. All households of a chunk are processed
+# together: rows are sorted by household and pandas' grouped ewm() runs the
+# per-household recurrences in compiled code, with each household's saved state
+# prepended as its first observation.
+
+import io
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+DETECTORS = ("threshold", "ewma")
+# Efficiency below which the threshold detector flags a record
+EFFICIENCY_THRESHOLD = 0.1
+# Analyzed columns the EWMA detector can watch
+SIGNALS = ("efficiency", "power_consumption")
+
+DEFAULT_ALPHA = 0.1
+DEFAULT_Z_THRESHOLD = 3.0
+DEFAULT_WARMUP = 10
+
+
+def make_detector(parameters):
+    """
+    Returns the EwmaDetector configured by a request's parameters, or None
+    for the default threshold rule.
+
+    'anomaly_detector': "threshold" (default) or "ewma", then for "ewma":
+    'anomaly_signal' (efficiency), 'ewma_alpha' (0.1), 'zscore_threshold' (3)
+    and 'anomaly_warmup' (10 observations before a household is judged).
+    """
+    name = parameters.get("anomaly_detector", "threshold")
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown anomaly_detector '{name}'. Expected one of {DETECTORS}")
+    if name == "threshold":
+        return None
+    return EwmaDetector(
+        signal=parameters.get("anomaly_signal", "efficiency"),
+        alpha=float(parameters.get("ewma_alpha", DEFAULT_ALPHA)),
+        z_threshold=float(parameters.get("zscore_threshold", DEFAULT_Z_THRESHOLD)),
+        warmup=int(parameters.get("anomaly_warmup", DEFAULT_WARMUP)),
+    )
+
+
+def _segment_starts(keys: np.ndarray) -> np.ndarray:
+    # True where a new run of equal keys starts in a sorted key array
+    starts = np.ones(len(keys), dtype=bool)
+    starts[1:] = keys[1:] != keys[:-1]
+    return starts
+
+
+def _grouped_ewm(values: np.ndarray, keys: np.ndarray, alpha: float) -> np.ndarray:
+    # EWMA of 'values' within runs of equal (sorted) 'keys', skipping NaNs
+    series = pd.Series(values)
+    return series.groupby(keys, sort=False).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy()
+
+
+class EwmaDetector:
+    """
+    Per-household EWMA z-score detector.
+
+    A reading is anomalous when it lies more than 'z_threshold' standard
+    deviations from the household's EWMA mean before it, once the household
+    has at least 'warmup' earlier readings. Non-finite readings are neither
+    judged nor added to the state.
+    """
+
+    def __init__(self, signal: str = "efficiency", alpha: float = DEFAULT_ALPHA,
+                 z_threshold: float = DEFAULT_Z_THRESHOLD, warmup: int = DEFAULT_WARMUP):
+        if signal not in SIGNALS:
+            raise ValueError(f"Unknown anomaly_signal '{signal}'. Expected one of {SIGNALS}")
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"'ewma_alpha' must be in (0, 1], got {alpha}")
+        if z_threshold <= 0:
+            raise ValueError(f"'zscore_threshold' must be positive, got {z_threshold}")
+        self.signal = signal
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self._index = {}
+        self._mean = np.empty(0)
+        self._var = np.empty(0)
+        self._count = np.empty(0, dtype=np.int64)
+
+    def settings(self) -> dict:
+        """The detector's configuration; state saved under other settings is not reused."""
+        return {"detector": "ewma", "signal": self.signal, "alpha": self.alpha,
+                "z_threshold": self.z_threshold, "warmup": self.warmup}
+
+    @property
+    def households(self) -> int:
+        return len(self._index)
+
+    def _state_slots(self, households) -> np.ndarray:
+        # State positions of 'households', adding empty state for new ones
+        slots = np.fromiter((self._index.setdefault(h, len(self._index)) for h in households),
+                            dtype=np.int64, count=len(households))
+        missing = len(self._index) - len(self._count)
+        if missing:
+            self._mean = np.concatenate([self._mean, np.full(missing, np.nan)])
+            self._var = np.concatenate([self._var, np.zeros(missing)])
+            self._count = np.concatenate([self._count, np.zeros(missing, dtype=np.int64)])
+        return slots
+
+    def detect(self, df) -> np.ndarray:
+        """Returns the anomaly flags of an analyzed chunk and adds its readings to the state."""
+        rows = len(df)
+        if not rows:
+            return np.zeros(0, dtype=bool)
+        values = df[self.signal].to_numpy(dtype=float)
+        values = np.where(np.isfinite(values), values, np.nan)
+        codes, households = pd.factorize(df['household_id'].astype(str))
+        slots = self._state_slots(households)
+
+        # Households with history get their state as a first, prepended observation
+        known = np.flatnonzero(self._count[slots] > 0)
+        keys = np.concatenate([known, codes])
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        is_state = order < len(known)
+        data_position = order - len(known)
+
+        mean_input = np.concatenate([self._mean[slots[known]], values])[order]
+        mean = _grouped_ewm(mean_input, keys, self.alpha)
+        starts = _segment_starts(keys)
+        # The mean before each observation: the previous element of the same household
+        previous_mean = np.concatenate([[np.nan], mean[:-1]])
+        previous_mean[starts] = np.nan
+
+        # Exponentially weighted variance: v = (1 - a) * (v + a * d^2) with d = x - previous mean,
+        # i.e. an EWMA of (1 - a) * d^2 started from the saved variance
+        deviation = mean_input - previous_mean
+        finite = ~np.isnan(mean_input) & ~is_state
+        var_input = (1.0 - self.alpha) * deviation ** 2
+        # A new household's first reading has no deviation yet and starts the variance at 0
+        var_input[finite & np.isnan(previous_mean)] = 0.0
+        var_input[is_state] = np.concatenate([self._var[slots[known]], np.zeros(rows)])[order][is_state]
+        var = _grouped_ewm(var_input, keys, self.alpha)
+        previous_var = np.concatenate([[np.nan], var[:-1]])
+        previous_var[starts] = np.nan
+
+        # Readings seen before each observation: saved count plus earlier finite readings in this chunk
+        seen = np.cumsum(finite) - finite
+        first_seen = seen[starts]
+        segment = np.cumsum(starts) - 1
+        saved_count = np.zeros(len(keys), dtype=np.int64)
+        saved_count[is_state] = self._count[slots[known]]
+        count_before = seen - first_seen[segment] + np.maximum.reduceat(saved_count, np.flatnonzero(starts))[segment]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.abs(deviation) / np.sqrt(previous_var)
+        # With zero variance any change is infinitely far (0 / 0 is NaN and not flagged)
+        flagged = finite & (count_before >= self.warmup) & (z > self.z_threshold)
+
+        # Save each household's state after its last observation
+        ends = np.flatnonzero(np.append(starts[1:], True))
+        group_slots = slots[keys[ends]]
+        last_mean = mean[ends]
+        has_mean = ~np.isnan(last_mean)
+        self._mean[group_slots[has_mean]] = last_mean[has_mean]
+        self._var[group_slots[has_mean]] = np.nan_to_num(var[ends][has_mean])
+        self._count[group_slots] = count_before[ends] + finite[ends]
+
+        result = np.zeros(rows, dtype=bool)
+        result[data_position[~is_state]] = flagged[~is_state]
+        return result
+
+    def to_bytes(self) -> bytes:
+        """Serializes the settings and per-household state as a compressed .npz archive."""
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, settings=np.array(json.dumps(self.settings())),
+                            households=np.array(list(self._index), dtype=str),
+                            mean=self._mean, var=self._var, count=self._count)
+        return buffer.getvalue()
+
+    def load_bytes(self, data: bytes) -> bool:
+        """Restores state saved by to_bytes(); returns False (and keeps empty state) if the settings differ."""
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            if json.loads(str(archive['settings'])) != self.settings():
+                return False
+            self._index = {household: slot for slot, household in enumerate(archive['households'].tolist())}
+            self._mean = archive['mean']
+            self._var = archive['var']
+            self._count = archive['count']
+        return True
+
+
+def load_state_file(detector: EwmaDetector, path: str):
+    # Restores the state an earlier call saved to 'anomaly_state_file', if any
+    if not path or not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        if not detector.load_bytes(f.read()):
+            log.info(f"[Analyzer] '{path}' was saved with other detector settings; starting from empty state")
+
+
+def save_state_file(detector: EwmaDetector, path: str):
+    # Written to a temporary file and renamed, like checkpoints
+    if not path:
+        return
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(detector.to_bytes())
+    os.replace(temp_path, path)
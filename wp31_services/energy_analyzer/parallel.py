@@ -0,0 +1,212 @@
+# energy_analyzer/parallel.py
+# CPU parallelism for the analyzer. pandas parsing and protobuf encoding hold
+# the GIL, so a single server process never uses more than one core. Two
+# options spread the work over processes:
+#
+# - ANALYZER_WORKERS=N splits one large CSV request into byte ranges that N
+#   worker processes parse, analyze and encode; the parts are merged in order.
+# - ANALYZER_PROCESSES=N runs N server processes on the same port
+#   (SO_REUSEPORT), so concurrent requests land on different processes.
+#
+# server.py imports the process helpers before the stage is loaded, so the
+# codecs (pandas, NumPy) are imported where the analysis needs them.
+
+import logging
+import multiprocessing
+import multiprocessing.util
+import os
+import signal
+from concurrent import futures
+
+from src.common.compression import detect_compression
+from src.common.payload_io import PIPE_INPUT
+from src.common.stage_metrics import resolve_metrics_port
+from src.common.table_io import CSV_FORMAT, detect_input_format, output_format
+
+log = logging.getLogger(__name__)
+
+# Inputs smaller than this are analyzed in the request thread; below it the
+# process hand-off costs more than it saves
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# Byte ranges per worker, so a slow range does not leave the other workers idle
+RANGES_PER_WORKER = 2
+
+
+def _env_count(name: str) -> int:
+    value = int(os.environ.get(name, "1"))
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1, got {value}")
+    return value
+
+
+def worker_count() -> int:
+    """Analysis worker processes per server (ANALYZER_WORKERS, default 1 = off)."""
+    return _env_count("ANALYZER_WORKERS")
+
+
+def server_process_count() -> int:
+    """Server processes sharing the port (ANALYZER_PROCESSES, default 1)."""
+    return _env_count("ANALYZER_PROCESSES")
+
+
+def csv_byte_ranges(path: str, parts: int):
+    """
+    Splits a CSV file into up to 'parts' [start, end) byte ranges of whole
+    lines after the header. Returns (header bytes, ranges).
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        ranges = []
+        step = max((size - start) // parts, 1)
+        while start < size:
+            # Extend each cut to the end of the line it falls in
+            f.seek(min(start + step, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+def _analyze_range(path: str, start: int, end: int, header: bytes, report_format: str, parameters: dict):
+    # Runs in a worker process: parse, analyze and encode one byte range of the CSV
+    import io
+    import pandas as pd
+    from src.common.record_batch import RecordBatch
+    from src.common.report_codec import COLUMNAR_FORMAT, ROW_FORMAT, serialize_report
+    from energy_analyzer.stage import analyze_frame, select_partition
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    columns = pd.read_csv(io.BytesIO(header)).columns
+    df = analyze_frame(select_partition(pd.read_csv(io.BytesIO(data), header=None, names=columns), parameters))
+    if report_format == COLUMNAR_FORMAT:
+        # A columnar report is one message, so its parts are merged before encoding
+        return len(df), RecordBatch.from_frame(df)
+    return len(df), serialize_report(df, ROW_FORMAT)
+
+
+class AnalysisPool:
+    """
+    Analyzes large CSV requests in worker processes.
+
+    Workers are started with 'spawn', as forking a process that already runs
+    gRPC threads is unsafe.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = futures.ProcessPoolExecutor(max_workers=workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+        # Start the workers now rather than on the first request
+        list(self._executor.map(_worker_pid, range(workers)))
+        # Stop them before multiprocessing joins a server process's children at exit
+        multiprocessing.util.Finalize(self, self._executor.shutdown, exitpriority=10)
+        log.info(f"[Analyzer] Started {workers} analysis worker processes")
+
+    def can_split(self, request) -> bool:
+        """Only large CSV files on disk with a protobuf output are split."""
+        from src.common.report_codec import REPORT_FORMATS, ROW_FORMAT
+
+        parameters = request.parameters
+        if request.input_payload or request.input_payloads or output_format(request) is not None:
+            return False
+        # A piped input is still being written
+        if PIPE_INPUT in parameters:
+            return False
+        # Window rollups and detector state are built from the whole input in the request's process
+        if "aggregate_windows" in parameters or parameters.get("anomaly_detector", "threshold") != "threshold":
+            return False
+        # Row-range partitions need each row's position in the whole input
+        if parameters.get("partition_by") == "rows" and int(parameters.get("partition_count", 1)) > 1:
+            return False
+        if parameters.get("report_format", ROW_FORMAT) not in REPORT_FORMATS:
+            return False
+        paths = list(request.input_files) or [request.input_file]
+        if not all(os.path.isfile(path) for path in paths):
+            return False
+        for path in paths:
+            with open(path, "rb") as f:
+                # Byte ranges of a compressed file cannot be parsed on their own
+                if detect_compression(f) is not None or detect_input_format(f) != CSV_FORMAT:
+                    return False
+        return sum(os.path.getsize(path) for path in paths) >= PARALLEL_MIN_BYTES
+
+    def analyze(self, request):
+        """Returns (rows analyzed, serialized report) for a request accepted by can_split()."""
+        from src.common.record_batch import RecordBatch
+        from src.common.report_codec import COLUMNAR_FORMAT, COLUMNAR_MAGIC, ROW_FORMAT
+
+        report_format = request.parameters.get("report_format", ROW_FORMAT)
+        parameters = dict(request.parameters)
+        paths = list(request.input_files) or [request.input_file]
+        jobs = []
+        for path in paths:
+            header, ranges = csv_byte_ranges(path, self.workers * RANGES_PER_WORKER)
+            jobs += [self._executor.submit(_analyze_range, path, start, end, header, report_format, parameters)
+                     for start, end in ranges]
+        parts = [job.result() for job in jobs]
+        rows = sum(part_rows for part_rows, _ in parts)
+        if report_format == COLUMNAR_FORMAT:
+            batch = RecordBatch.concat([part for _, part in parts])
+            return rows, COLUMNAR_MAGIC + batch.columnar_report_bytes()
+        # Serialized ProcessedDataReports merge by concatenation
+        return rows, b"".join(part for _, part in parts)
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+def stop_on_sigterm(server):
+    """
+    Stops 'server' on SIGTERM (docker stop) so wait_for_termination() returns
+    and the process exits normally, shutting down its analysis workers; the
+    default handler would kill it and leave the workers behind.
+    """
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop(None))
+
+
+def _serve_process(port: int, index: int):
+    # Entry point of the extra server processes started by serve_processes()
+    from energy_analyzer.server import build_server
+
+    metrics_port = resolve_metrics_port(port)
+    if metrics_port:
+        os.environ["METRICS_PORT"] = str(metrics_port + index)
+    server, _ = build_server(port)
+    stop_on_sigterm(server)
+    server.wait_for_termination()
+
+
+def serve_processes(port: int, processes: int):
+    """
+    Runs 'processes' analyzer servers on 'port'. gRPC binds with SO_REUSEPORT,
+    so the kernel spreads incoming connections over them. Process i serves
+    its metrics on the usual metrics port + i.
+    """
+    from energy_analyzer.server import build_server
+
+    # Not daemonic: each server may start its own analysis worker processes.
+    # SIGTERM (docker stop) is passed on to them once this server has stopped.
+    context = multiprocessing.get_context("spawn")
+    children = [context.Process(target=_serve_process, args=(port, index)) for index in range(1, processes)]
+    for child in children:
+        child.start()
+    log.info(f"[Analyzer] Serving on :{port} from {processes} processes")
+    try:
+        server, _ = build_server(port)
+        stop_on_sigterm(server)
+        server.wait_for_termination()
+    finally:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
@@ -0,0 +1,434 @@
+# Energy Analyzer stage: the ContainerExecutor servicer and the analysis.
+# server.py loads it through a StageLoader, so pandas, NumPy and pyarrow are
+# only imported once the server is up.
+
+import io
+import os
+import logging
+import pandas as pd
+
+from generated import energy_pb2, energy_pb2_grpc
+from src.common.batch_runner import execute_batch
+from src.common.compression import detect_compression, output_compression
+from src.common.checkpoint import (checkpoint_path, checkpoint_state, consumed_digest, input_paths, is_incremental,
+                                   load_checkpoint, open_output_for_append, output_is_intact, require_files,
+                                   save_checkpoint)
+from src.common.payload_io import (PIPE_INPUT, PIPE_OUTPUT, OutputSink, describe_input, describe_output,
+                                   fail_pipe_output, open_inputs)
+from src.common.report_codec import (AGGREGATE_MAGIC, COLUMNAR_FORMAT, ROW_FORMAT, STREAM_MAGIC,
+                                     aggregate_report_to_frame, encode_report_chunk, serialize_report,
+                                     to_report_frame)
+from src.common.table_io import (CSV_FORMAT, TableWriter, count_table_rows, detect_input_format,
+                                 iter_input_frames, output_format)
+from energy_analyzer.parallel import AnalysisPool
+from energy_analyzer.anomaly import EFFICIENCY_THRESHOLD, load_state_file, make_detector, save_state_file
+from energy_analyzer.windows import WindowAggregator, parse_windows
+
+log = logging.getLogger(__name__)
+
+# Rows per chunk when a request asks for chunked execution without a size
+DEFAULT_CHUNK_ROWS = 100_000
+
+# The only input columns the analysis reads; Arrow and Parquet inputs are projected to them
+INPUT_COLUMNS = ['timestamp', 'household_id', 'power_consumption', 'voltage', 'current']
+
+def table_output_format(request):
+    # The analyzer writes protobuf reports unless an Arrow or Parquet output is requested
+    fmt = output_format(request)
+    if fmt == CSV_FORMAT:
+        raise ValueError("The analyzer writes protobuf reports, Arrow or Parquet, not CSV")
+    return fmt
+
+def analyze_frame(df, detector=None):
+    # Perform some analysis (placeholder logic, but now on the data from the file)
+    df['efficiency'] = (df['power_consumption'] / (df['voltage'] * df['current'])).round(3)
+    # A stateful detector ('anomaly_detector': "ewma") replaces the fixed efficiency threshold
+    if detector is None:
+        df['anomaly_detected'] = df['efficiency'] < EFFICIENCY_THRESHOLD
+    else:
+        df['anomaly_detected'] = detector.detect(df)
+    return df
+
+def make_request_detector(request):
+    # The request's anomaly detector with the state an earlier call saved to
+    # 'anomaly_state_file', so readings are judged against their whole history
+    detector = make_detector(request.parameters)
+    if detector is not None:
+        load_state_file(detector, request.parameters.get("anomaly_state_file"))
+    return detector
+
+def save_request_detector(request, detector):
+    if detector is not None:
+        save_state_file(detector, request.parameters.get("anomaly_state_file"))
+
+def aggregate_windows(request):
+    # 'aggregate_windows' (e.g. "1h,1d" or "1d/1h" for sliding windows) replaces
+    # the per-row records in the output with per-household window rollups
+    text = request.parameters.get("aggregate_windows")
+    return parse_windows(text) if text else None
+
+def write_aggregates(f, aggregator, table_format):
+    # Writes the AggregateReport (or its table for Arrow / Parquet outputs) and
+    # returns the number of household windows in it
+    report_data = aggregator.report()
+    if table_format:
+        writer = TableWriter(f, table_format)
+        writer.write(aggregate_report_to_frame(report_data))
+        writer.close()
+    else:
+        f.write(AGGREGATE_MAGIC + report_data.SerializeToString())
+    return sum(len(window.window_start_ms) for window in report_data.windows)
+
+# How 'partition_count' / 'partition_index' split the input between analyzers
+PARTITION_KEYS = ("household_id", "rows")
+
+def partition_row_range(total_rows: int, partition_count: int, partition_index: int):
+    # Contiguous [start, stop) slice of the input rows owned by one partition
+    return (total_rows * partition_index // partition_count,
+            total_rows * (partition_index + 1) // partition_count)
+
+def select_partition(df, parameters, row_offset: int = 0, total_rows: int = None):
+    # 'partition_count' / 'partition_index' let several analyzer nodes split the
+    # input between them. With 'partition_by' = "household_id" (default) each
+    # partition keeps the households whose stable hash falls into it; with "rows"
+    # it keeps a contiguous row range. Chunks pass their position in the whole
+    # input as 'row_offset' and the input's size as 'total_rows'.
+    partition_count = int(parameters.get("partition_count", 1))
+    if partition_count <= 1:
+        return df
+    partition_index = int(parameters.get("partition_index", 0))
+    if not 0 <= partition_index < partition_count:
+        raise ValueError(f"'partition_index' must be in [0, {partition_count}), got {partition_index}")
+
+    partition_by = parameters.get("partition_by", "household_id")
+    if partition_by == "rows":
+        start, stop = partition_row_range(len(df) if total_rows is None else total_rows,
+                                          partition_count, partition_index)
+        return df.iloc[max(start - row_offset, 0):max(stop - row_offset, 0)]
+    if partition_by != "household_id":
+        raise ValueError(f"Unknown partition_by '{partition_by}'. Expected one of {PARTITION_KEYS}")
+    buckets = pd.util.hash_array(df['household_id'].astype(str).to_numpy()) % partition_count
+    return df[buckets == partition_index]
+
+def count_csv_rows(source) -> int:
+    # Counts data rows by scanning for newlines, then rewinds the source.
+    # The generator never writes quoted newlines, so every line is one record.
+    lines = 0
+    last = b"\n"
+    for block in iter(lambda: source.read(1 << 20), b""):
+        lines += block.count(b"\n")
+        last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    source.seek(0)
+    return max(lines - 1, 0)
+
+def count_input_rows(source) -> int:
+    if detect_input_format(source) == CSV_FORMAT:
+        return count_csv_rows(source)
+    return count_table_rows(source)
+
+def read_csv_tail(path: str, offset: int):
+    # Returns (header line, complete lines after 'offset', offset after them).
+    # A last line without its newline may still be being written and is left
+    # for the next run.
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = max(offset, len(header))
+        f.seek(start)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    return header, data[:end], start + end
+
+# The class name MUST match the one from the shared .proto contract
+class ContainerExecutorServicer(energy_pb2_grpc.ContainerExecutorServicer):
+
+    def __init__(self, pool: AnalysisPool = None):
+        # Worker processes for large CSV inputs (ANALYZER_WORKERS); None analyzes in the request thread
+        self._pool = pool
+
+    # The method name MUST match the one from the shared .proto contract
+    def Execute(self, request, context):
+        log_prefix = "[Analyzer]"
+        log.info(f"{log_prefix} Received request: input='{request.input_file}', output='{request.output_file}'")
+        
+        try:
+            # "incremental": "true" only analyzes rows appended since the last run;
+            # a 'chunk_rows' parameter switches to bounded-memory chunked processing,
+            # as does a piped input or output, so chunks flow on while the other stage runs
+            parameters = request.parameters
+            if (is_incremental(request) or "chunk_rows" in parameters
+                    or PIPE_INPUT in parameters or PIPE_OUTPUT in parameters):
+                for progress in self._progress_steps(request):
+                    pass
+                return energy_pb2.ExecuteResponse(
+                    success=progress.success, message=progress.message, output_payload=progress.output_payload,
+                    rows_processed=progress.rows_processed)
+
+            if self._pool is not None and self._pool.can_split(request):
+                return self._execute_parallel(request)
+
+            # The orchestrator can ask for the columnar wire format; rows stay the default.
+            # An .arrow / .parquet output writes the analyzed table instead.
+            report_format = request.parameters.get("report_format", ROW_FORMAT)
+            table_format = table_output_format(request)
+            windows = aggregate_windows(request)
+
+            # The analyzer reads the CSV (or Arrow / Parquet table) generated in the
+            # previous step, or the bytes the orchestrator forwarded in memory
+            log.info(f"{log_prefix} Reading data from {describe_input(request)}...")
+            with open_inputs(request) as sources:
+                df = pd.concat([frame for source in sources for frame in iter_input_frames(source, INPUT_COLUMNS)],
+                               ignore_index=True)
+            detector = make_request_detector(request)
+            df = analyze_frame(select_partition(df, request.parameters), detector)
+            
+            log.info(f"{log_prefix} Analysis complete. Preparing '{table_format or report_format}' output...")
+
+            # Write the output file, or keep it in memory when the orchestrator hands
+            # it straight to the next stage
+            sink = OutputSink(request)
+            aggregated = None
+            with sink as f:
+                if windows:
+                    aggregator = WindowAggregator(windows)
+                    aggregator.update(df)
+                    aggregated = write_aggregates(f, aggregator, table_format)
+                elif table_format:
+                    writer = TableWriter(f, table_format)
+                    writer.write(to_report_frame(df))
+                    writer.close()
+                else:
+                    # Create the protobuf message structure required for the next step.
+                    # The report is built from whole columns instead of df.iterrows().
+                    f.write(serialize_report(df, report_format))
+
+            save_request_detector(request, detector)
+            message = f"Successfully analyzed {len(df)} records and saved to {describe_output(request)}"
+            if aggregated is not None:
+                message = (f"Successfully aggregated {len(df)} records into {aggregated} household windows "
+                           f"and saved them to {describe_output(request)}")
+            log.info(message)
+            return energy_pb2.ExecuteResponse(
+                success=True, message=message, output_payload=sink.payload, rows_processed=len(df))
+
+        except Exception as e:
+            error_message = f"{log_prefix} Failed to execute: {e}"
+            log.error(error_message, exc_info=True)
+            fail_pipe_output(request)
+            return energy_pb2.ExecuteResponse(success=False, message=error_message)
+
+    def warm_up(self):
+        # A few readings analyzed in memory (WARMUP_REQUEST), so the first real
+        # call finds the CSV parser, the analysis and the report encoder ready
+        data = (b"timestamp,household_id,power_consumption,voltage,current\n"
+                b"2025-01-01T00:00:00Z,H1,120.5,230.0,1.2\n"
+                b"2025-01-01T00:00:01Z,H2,3.0,231.0,1.1\n")
+        response = self.Execute(energy_pb2.ExecuteRequest(input_payload=data, return_payload=True), None)
+        if not response.success:
+            raise RuntimeError(response.message)
+
+    def _execute_parallel(self, request):
+        # Splits a large CSV input into line-aligned byte ranges that the worker
+        # processes parse, analyze and encode; the encoded parts are merged in order
+        log_prefix = "[Analyzer]"
+        log.info(f"{log_prefix} Analyzing {describe_input(request)} in {self._pool.workers} worker processes...")
+        rows, report = self._pool.analyze(request)
+        sink = OutputSink(request)
+        with sink as f:
+            f.write(report)
+
+        message = f"Successfully analyzed {rows} records and saved to {describe_output(request)}"
+        log.info(message)
+        return energy_pb2.ExecuteResponse(
+            success=True, message=message, output_payload=sink.payload, rows_processed=rows)
+
+    def ExecuteStream(self, request, context):
+        log_prefix = "[Analyzer]"
+        log.info(f"{log_prefix} Received streaming request: input='{request.input_file}', output='{request.output_file}'")
+
+        try:
+            yield from self._progress_steps(request)
+        except Exception as e:
+            error_message = f"{log_prefix} Failed to execute: {e}"
+            log.error(error_message, exc_info=True)
+            fail_pipe_output(request)
+            yield energy_pb2.ExecuteProgress(done=True, success=False, message=error_message)
+
+    def ExecuteBatch(self, request, context):
+        # Many Execute jobs in one call, run several at a time; each result is
+        # streamed back as soon as its job finishes
+        log_prefix = "[Analyzer]"
+        log.info(f"{log_prefix} Received batch request with {len(request.jobs)} jobs")
+        yield from execute_batch(self.Execute, request, context, log_prefix)
+
+    def _progress_steps(self, request):
+        if is_incremental(request):
+            return self._execute_incremental(request)
+        return self._execute_chunked(request)
+
+    def _execute_chunked(self, request):
+        # Reads the CSV in chunks and appends one length-delimited report frame per
+        # chunk, so peak memory depends on 'chunk_rows' and not on the input size
+        log_prefix = "[Analyzer]"
+        report_format = request.parameters.get("report_format", ROW_FORMAT)
+        chunk_rows = int(request.parameters.get("chunk_rows", DEFAULT_CHUNK_ROWS))
+        if chunk_rows <= 0:
+            raise ValueError(f"'chunk_rows' must be positive, got {chunk_rows}")
+
+        table_format = table_output_format(request)
+        # Window rollups are accumulated over all chunks and written at the end
+        windows = aggregate_windows(request)
+        aggregator = WindowAggregator(windows) if windows else None
+        # Detector state carries over from chunk to chunk
+        detector = make_request_detector(request)
+
+        log.info(f"{log_prefix} Reading data from {describe_input(request)} in chunks of {chunk_rows} rows...")
+        rows_processed = 0
+        chunks_processed = 0
+        sink = OutputSink(request)
+        with open_inputs(request) as sources, sink as f:
+            # Row-range partitions need the size of the whole input up front
+            total_rows = None
+            if request.parameters.get("partition_by") == "rows":
+                total_rows = sum(count_input_rows(source) for source in sources)
+
+            # Arrow / Parquet outputs get one record batch / row group per chunk
+            writer = TableWriter(f, table_format) if table_format and aggregator is None else None
+            if writer is None and aggregator is None:
+                f.write(STREAM_MAGIC)
+            row_offset = 0
+            for source in sources:
+                for chunk in iter_input_frames(source, INPUT_COLUMNS, chunk_rows):
+                    rows_read = len(chunk)
+                    chunk = select_partition(chunk, request.parameters, row_offset, total_rows)
+                    row_offset += rows_read
+                    chunk = analyze_frame(chunk, detector)
+                    if aggregator is not None:
+                        aggregator.update(chunk)
+                    elif writer is None:
+                        f.write(encode_report_chunk(chunk, report_format))
+                    else:
+                        writer.write(to_report_frame(chunk))
+                    rows_processed += len(chunk)
+                    chunks_processed += 1
+                    yield energy_pb2.ExecuteProgress(rows_processed=rows_processed, chunks_processed=chunks_processed)
+            if writer is not None:
+                writer.close(empty_frame=to_report_frame(analyze_frame(pd.DataFrame(columns=INPUT_COLUMNS))))
+            if aggregator is not None:
+                aggregated = write_aggregates(f, aggregator, table_format)
+        save_request_detector(request, detector)
+
+        message = (f"Successfully analyzed {rows_processed} records in {chunks_processed} chunks "
+                   f"and saved to {describe_output(request)}")
+        if aggregator is not None:
+            message = (f"Successfully aggregated {rows_processed} records in {chunks_processed} chunks into "
+                       f"{aggregated} household windows and saved them to {describe_output(request)}")
+        log.info(message)
+        yield energy_pb2.ExecuteProgress(
+            rows_processed=rows_processed, chunks_processed=chunks_processed,
+            done=True, success=True, message=message, output_payload=sink.payload)
+
+    def _execute_incremental(self, request):
+        # Analyzes only the CSV rows appended since the checkpoint and appends their
+        # records to the existing output, so a run costs time proportional to new data
+        log_prefix = "[Analyzer]"
+        require_files(request)
+        parameters = request.parameters
+        report_format = parameters.get("report_format", ROW_FORMAT)
+        chunk_rows = int(parameters.get("chunk_rows", DEFAULT_CHUNK_ROWS))
+        if chunk_rows <= 0:
+            raise ValueError(f"'chunk_rows' must be positive, got {chunk_rows}")
+        if parameters.get("partition_by") == "rows":
+            raise ValueError("Row-range partitions shift as the input grows; use household partitions with incremental mode")
+        if table_output_format(request):
+            raise ValueError("Arrow and Parquet files cannot be appended to; incremental mode writes protobuf reports")
+        if PIPE_INPUT in parameters or PIPE_OUTPUT in parameters:
+            raise ValueError("Incremental mode reads and appends whole files; it cannot be combined with pipe hand-off")
+        if aggregate_windows(request):
+            raise ValueError("Window rollups are rewritten as a whole; 'aggregate_windows' is not supported in incremental mode")
+        if output_compression(request):
+            raise ValueError("Compressed files cannot be appended to; incremental mode writes uncompressed reports")
+
+        # Serialized ProcessedDataReports can be appended to; a columnar (EPC1) file is
+        # one message and cannot, so columnar and chunked outputs use EPS1 frames
+        layout = "stream" if "chunk_rows" in parameters or report_format == COLUMNAR_FORMAT else "rows"
+        paths = input_paths(request)
+        settings = {
+            "layout": layout,
+            "report_format": report_format,
+            "partition_count": parameters.get("partition_count", "1"),
+            "partition_index": parameters.get("partition_index", "0"),
+            "inputs": paths,
+        }
+        # Detector state is kept in the checkpoint, so it always matches the rows already analyzed
+        detector = make_detector(parameters)
+        if detector is not None:
+            settings["anomaly_detector"] = detector.settings()
+        state_path = checkpoint_path(request)
+        checkpoint = load_checkpoint(state_path, settings)
+        if checkpoint is not None and not output_is_intact(request.output_file, checkpoint["output_size"]):
+            checkpoint = None
+        for path in paths:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Input file not found: {path}")
+            with open(path, "rb") as f:
+                if detect_compression(f) is not None:
+                    raise ValueError(f"Incremental mode reads appended CSV rows; '{path}' is compressed")
+                if detect_input_format(f) != CSV_FORMAT:
+                    raise ValueError(f"Incremental mode reads appended CSV rows; '{path}' is not a CSV file")
+            state = checkpoint["inputs"].get(path) if checkpoint else None
+            if state is not None:
+                with open(path, "rb") as f:
+                    header = f.readline().decode()
+                # A shrunken or rewritten input, or one whose consumed rows changed,
+                # is not an append; start over
+                if (os.path.getsize(path) < state["offset"] or header != state["header"]
+                        or consumed_digest(path, state["offset"]) != state.get("digest")):
+                    log.info(f"{log_prefix} '{path}' was rewritten since the last run; rebuilding the output")
+                    checkpoint = None
+                    break
+
+        output_size = checkpoint["output_size"] if checkpoint else 0
+        if detector is not None and checkpoint_state(checkpoint) is not None:
+            detector.load_bytes(checkpoint_state(checkpoint))
+        log.info(f"{log_prefix} Incremental run from {'checkpoint ' + state_path if checkpoint else 'scratch'}")
+        rows_processed = 0
+        chunks_processed = 0
+        input_states = {}
+        with open_output_for_append(request.output_file, output_size) as f:
+            if not output_size and layout == "stream":
+                f.write(STREAM_MAGIC)
+            for path in paths:
+                state = checkpoint["inputs"][path] if checkpoint else {"offset": 0, "last_timestamp": None}
+                header, tail, end = read_csv_tail(path, state["offset"])
+                last_timestamp = state["last_timestamp"]
+                if tail:
+                    columns = pd.read_csv(io.BytesIO(header)).columns
+                    for chunk in pd.read_csv(io.BytesIO(tail), header=None, names=columns, chunksize=chunk_rows):
+                        last_timestamp = str(chunk['timestamp'].iloc[-1])
+                        df = analyze_frame(select_partition(chunk, parameters), detector)
+                        if layout == "stream":
+                            f.write(encode_report_chunk(df, report_format))
+                        else:
+                            f.write(serialize_report(df, ROW_FORMAT))
+                        rows_processed += len(df)
+                        chunks_processed += 1
+                        yield energy_pb2.ExecuteProgress(rows_processed=rows_processed, chunks_processed=chunks_processed)
+                input_states[path] = {"offset": end, "header": header.decode(), "last_timestamp": last_timestamp,
+                                      "digest": consumed_digest(path, end)}
+            f.flush()
+            os.fsync(f.fileno())
+            new_size = f.tell()
+        # The checkpoint is only advanced once the appended output is on disk
+        save_checkpoint(state_path, settings, input_states, new_size,
+                        detector.to_bytes() if detector is not None else None)
+
+        last_timestamps = ", ".join(str(state["last_timestamp"]) for state in input_states.values())
+        message = (f"Incrementally analyzed {rows_processed} new records and "
+                   f"{'appended them to' if output_size else 'saved them to'} {request.output_file} "
+                   f"(inputs read up to {last_timestamps})")
+        log.info(message)
+        yield energy_pb2.ExecuteProgress(
+            rows_processed=rows_processed, chunks_processed=chunks_processed,
+            done=True, success=True, message=message)
@@ -0,0 +1,162 @@
+# energy_analyzer/windows.py
+# Streaming per-household window aggregation for the analyzer.
+#
+# Every analyzed chunk is reduced once, with one vectorized group-by, to sums
+# per household and "pane": the widest time slot that tiles every configured
+# window. Panes are additive, so partial results from different chunks are
+# folded together and each tumbling or sliding window is rolled up from them
+# at the end. Memory grows with the number of (household, pane) pairs, not
+# with the number of input rows.
+
+import math
+import re
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from generated import energy_pb2
+from src.common.report_codec import parse_timestamps
+
+DURATION_UNITS = {"ms": 1, "s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+_DURATION = re.compile(r"^\s*(\d+)\s*(ms|s|m|h|d)\s*$")
+
+# Buffered partial pane rows that trigger folding them together
+COMPACT_ROWS = 1_000_000
+
+_KEYS = ['household', 'pane']
+_SUMS = ['power_sum', 'efficiency_sum', 'efficiency_count', 'record_count', 'anomaly_count']
+
+
+def parse_duration(text: str) -> int:
+    """Parses a duration such as '500ms', '30s', '15m', '1h' or '1d' into milliseconds."""
+    match = _DURATION.match(text)
+    if match is None:
+        raise ValueError(f"Invalid window duration '{text}'. Use a number and one of {tuple(DURATION_UNITS)}, e.g. 1h")
+    value = int(match.group(1)) * DURATION_UNITS[match.group(2)]
+    if value <= 0:
+        raise ValueError(f"Window durations must be positive, got '{text}'")
+    return value
+
+
+def format_duration(ms: int) -> str:
+    for unit in ("d", "h", "m", "s"):
+        if ms % DURATION_UNITS[unit] == 0:
+            return f"{ms // DURATION_UNITS[unit]}{unit}"
+    return f"{ms}ms"
+
+
+class Window:
+    """A tumbling (slide == size) or sliding window definition."""
+
+    def __init__(self, size_ms: int, slide_ms: int = None):
+        self.size_ms = size_ms
+        self.slide_ms = slide_ms or size_ms
+        if self.size_ms % self.slide_ms:
+            raise ValueError(f"A window's size must be a multiple of its slide, got "
+                             f"{format_duration(self.size_ms)}/{format_duration(self.slide_ms)}")
+        self.name = format_duration(self.size_ms)
+        if self.slide_ms != self.size_ms:
+            self.name += "/" + format_duration(self.slide_ms)
+
+
+def parse_windows(text: str):
+    """
+    Parses the 'aggregate_windows' parameter: comma-separated windows, each a
+    tumbling 'size' (e.g. '1h') or a sliding 'size/slide' (e.g. '1d/1h').
+    """
+    windows = {}
+    for spec in text.split(","):
+        if not spec.strip():
+            continue
+        size, _, slide = spec.partition("/")
+        window = Window(parse_duration(size), parse_duration(slide) if slide else None)
+        windows.setdefault(window.name, window)
+    if not windows:
+        raise ValueError("'aggregate_windows' needs at least one window, e.g. '1h,1d'")
+    return list(windows.values())
+
+
+class WindowAggregator:
+    """
+    Accumulates per-household sums of power, finite efficiencies, records and
+    anomalies over analyzed chunks, and builds the AggregateReport of every
+    window from them.
+    """
+
+    def __init__(self, windows):
+        self.windows = windows
+        self.pane_ms = reduce(math.gcd, [window.slide_ms for window in windows])
+        self.rows = 0
+        self._households = {}
+        self._partials = []
+        self._buffered = 0
+        self._compact_limit = COMPACT_ROWS
+
+    def update(self, df):
+        """Adds an analyzed DataFrame (the analyzer's columns) to the running sums."""
+        if not len(df):
+            return
+        codes, households = pd.factorize(df['household_id'].astype(str))
+        # Chunk-local household codes -> codes in the report's household table
+        remap = np.fromiter((self._households.setdefault(h, len(self._households)) for h in households),
+                            dtype=np.int64, count=len(households))
+        efficiency = df['efficiency'].to_numpy(dtype=float)
+        finite = np.isfinite(efficiency)
+        rows = pd.DataFrame({
+            'household': remap[codes],
+            'pane': parse_timestamps(df['timestamp']) // self.pane_ms,
+            'power_sum': df['power_consumption'].to_numpy(dtype=float),
+            'efficiency_sum': np.where(finite, efficiency, 0.0),
+            'efficiency_count': finite.astype(np.int64),
+            'record_count': np.ones(len(df), dtype=np.int64),
+            'anomaly_count': df['anomaly_detected'].to_numpy(dtype=bool).astype(np.int64),
+        })
+        partial = rows.groupby(_KEYS, sort=False).sum()
+        self._partials.append(partial)
+        self._buffered += len(partial)
+        self.rows += len(df)
+        if self._buffered > self._compact_limit:
+            self._compact()
+
+    def _compact(self):
+        # Folds the buffered partial sums into one frame. The limit doubles with
+        # the folded size, so a run with many distinct panes is not folded after every chunk.
+        if len(self._partials) > 1:
+            self._partials = [pd.concat(self._partials).groupby(level=_KEYS, sort=False).sum()]
+        self._buffered = len(self._partials[0]) if self._partials else 0
+        self._compact_limit = max(COMPACT_ROWS, 2 * self._buffered)
+
+    def _window_sums(self, panes: pd.DataFrame, window: Window) -> pd.DataFrame:
+        # Roll the panes up to the window's slide; window w covers slides w .. w + k - 1
+        slides = panes.assign(pane=panes['pane'] // (window.slide_ms // self.pane_ms))
+        sums = slides.groupby(_KEYS, sort=False)[_SUMS].sum().reset_index()
+        k = window.size_ms // window.slide_ms
+        if k > 1:
+            # Each slide counts towards the k windows starting in the k slides up to and including it
+            sums = sums.loc[sums.index.repeat(k)]
+            sums['pane'] = sums['pane'].to_numpy() - np.tile(np.arange(k), len(sums) // k)
+            sums = sums.groupby(_KEYS, sort=False)[_SUMS].sum().reset_index()
+        return sums.sort_values(_KEYS, kind='stable')
+
+    def report(self) -> energy_pb2.AggregateReport:
+        self._compact()
+        if self._partials:
+            panes = self._partials[0].reset_index()
+        else:
+            panes = pd.DataFrame({column: np.empty(0, dtype=np.int64) for column in _KEYS + _SUMS})
+        report_data = energy_pb2.AggregateReport()
+        report_data.households.extend(self._households)
+        for window in self.windows:
+            sums = self._window_sums(panes, window)
+            count = sums['efficiency_count'].to_numpy()
+            efficiency_mean = np.full(len(sums), np.nan)
+            np.divide(sums['efficiency_sum'].to_numpy(), count, out=efficiency_mean, where=count > 0)
+            aggregates = report_data.windows.add(name=window.name, size_ms=window.size_ms, slide_ms=window.slide_ms)
+            aggregates.household_index.extend(sums['household'].tolist())
+            aggregates.window_start_ms.extend((sums['pane'] * window.slide_ms).tolist())
+            aggregates.power_sum.extend(sums['power_sum'].tolist())
+            aggregates.efficiency_mean.extend(efficiency_mean.tolist())
+            aggregates.record_count.extend(sums['record_count'].tolist())
+            aggregates.anomaly_count.extend(sums['anomaly_count'].tolist())
+        return report_data
@@ -1,68 +1,56 @@
 # Corrected server.py for the Energy Generator Service
 
-import os
-import time
 import logging
 import grpc
-import pandas as pd
 from concurrent import futures
 
-# Correctly import from the 'generated' and placeholder 'src' packages
-from generated import energy_pb2, energy_pb2_grpc
-from src.common.grpc_logging import ServerLoggingInterceptor # This will import our placeholder
-from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+# Correctly import from the 'generated' and placeholder 'src' packages. Only the
+# server, health and metrics are imported here; the stage code comes from stage.py
+from generated import energy_pb2_grpc
+from src.common.grpc_logging import ServerLoggingInterceptor
+from src.common.grpc_options import GRPC_SERVER_OPTIONS, server_compression
+from src.common.stage_metrics import StageMetrics, resolve_metrics_port, start_metrics_server
+from src.common.startup import StageLoader, StageServicer
+from grpc_health.v1 import health, health_pb2_grpc
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - [%(name)s] - %(message)s")
 log = logging.getLogger(__name__)
 
-# The class name MUST match the one from the shared .proto contract
-class ContainerExecutorServicer(energy_pb2_grpc.ContainerExecutorServicer):
+def load_stage():
+    # Imported by the StageLoader, before the server listens or (STARTUP_MODE=lazy) after
+    from energy_generator.stage import ContainerExecutorServicer
+    return ContainerExecutorServicer()
 
-    # The method name MUST match the one from the shared .proto contract
-    def Execute(self, request, context):
-        log_prefix = "[Generator]"
-        log.info(f"{log_prefix} Received request. Will generate to '{request.output_file}'")
-        try:
-            # Correctly construct the full path inside the container
-            output_path = request.output_file
-            
-            # Create the directory if it doesn't exist
-            os.makedirs(os.path.dirname(request.output_file), exist_ok=True)
+def build_server(port: int = 50051):
+    # Creates and starts the server and returns (server, bound port); port 0
+    # picks a free port, e.g. for the benchmark harness
 
-            data = {
-                'timestamp': [f"2025-01-01T00:00:{i:02d}Z" for i in range(10)],
-                'household_id': [f"HH-{i%3}" for i in range(10)],
-                'power_consumption': [120.5 + i for i in range(10)],
-                'voltage': [230.0] * 10,
-                'current': [5.1 + (i*0.1) for i in range(10)],
-            }
-            df = pd.DataFrame(data)
-            df.to_csv(output_path, index=False)
-            message = f"Successfully generated synthetic data to {request.output_file}"
-            log.info(message)
-            return energy_pb2.ExecuteResponse(success=True, message=message)
-        except Exception as e:
-            error_message = f"{log_prefix} Failed to execute: {e}"
-            log.error(error_message, exc_info=True)
-            return energy_pb2.ExecuteResponse(success=False, message=error_message)
+    # Every stage RPC is timed and measured; the numbers are served as Prometheus
+    # text on the metrics port and sent back to the orchestrator as trailing metadata
+    metrics = StageMetrics("generator")
+    # Responses are compressed with GRPC_COMPRESSION when the client accepts it
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=GRPC_SERVER_OPTIONS,
+                         interceptors=[ServerLoggingInterceptor(metrics)], compression=server_compression())
 
-def serve(port: int = 50051):
-    # We remove the interceptor as the code for it is missing
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    # Health check setup remains the same; it reports SERVING once the stage is loaded
+    health_serv = health.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(health_serv, server)
 
     # Register our CORRECTED service
-    energy_pb2_grpc.add_ContainerExecutorServicer_to_server(ContainerExecutorServicer(), server)
+    stage = StageLoader("Generator", load_stage, health_serv)
+    energy_pb2_grpc.add_ContainerExecutorServicer_to_server(StageServicer(stage), server)
+    stage.start()
 
-    # Health check setup remains the same
-    health_serv = health.HealthServicer()
-    health_pb2_grpc.add_HealthServicer_to_server(health_serv, server)
-    health_serv.set("", health_pb2.HealthCheckResponse.SERVING)
-    
-    server.add_insecure_port(f"[::]:{port}")
+    port = server.add_insecure_port(f"[::]:{port}")
     server.start()
+    start_metrics_server(resolve_metrics_port(port), metrics)
     log.info(f"Generator gRPC service listening on :{port}")
+    return server, port
+
+def serve(port: int = 50051):
+    server, _ = build_server(port)
     server.wait_for_termination()
 
 if __name__ == "__main__":
-    serve()
\ No newline at end of file
+    serve()
@@ -0,0 +1,96 @@
+# Energy Generator stage: the ContainerExecutor servicer. server.py loads it
+# through a StageLoader, so NumPy is only imported once the server is up.
+
+import logging
+
+from generated import energy_pb2, energy_pb2_grpc
+from src.common.batch_runner import execute_batch
+from src.common.payload_io import PIPE_OUTPUT, OutputSink, describe_output, fail_pipe_output
+from src.common.table_io import CSV_FORMAT, TableWriter, output_format
+from energy_generator.synthetic import (generate_columns, iter_chunk_columns, iter_csv_chunks, parse_settings,
+                                        to_record_batch)
+
+log = logging.getLogger(__name__)
+
+# The class name MUST match the one from the shared .proto contract
+class ContainerExecutorServicer(energy_pb2_grpc.ContainerExecutorServicer):
+
+    # The method name MUST match the one from the shared .proto contract
+    def Execute(self, request, context):
+        log_prefix = "[Generator]"
+        log.info(f"{log_prefix} Received request. Will generate to {describe_output(request)}")
+        try:
+            for progress in self._generate(request):
+                pass
+            return energy_pb2.ExecuteResponse(
+                success=progress.success, message=progress.message, output_payload=progress.output_payload,
+                rows_processed=progress.rows_processed)
+        except Exception as e:
+            error_message = f"{log_prefix} Failed to execute: {e}"
+            log.error(error_message, exc_info=True)
+            fail_pipe_output(request)
+            return energy_pb2.ExecuteResponse(success=False, message=error_message)
+
+    def ExecuteStream(self, request, context):
+        log_prefix = "[Generator]"
+        log.info(f"{log_prefix} Received streaming request. Will generate to {describe_output(request)}")
+        try:
+            yield from self._generate(request)
+        except Exception as e:
+            error_message = f"{log_prefix} Failed to execute: {e}"
+            log.error(error_message, exc_info=True)
+            fail_pipe_output(request)
+            yield energy_pb2.ExecuteProgress(done=True, success=False, message=error_message)
+
+    def ExecuteBatch(self, request, context):
+        # Many Execute jobs in one call, run several at a time; each result is
+        # streamed back as soon as its job finishes
+        log_prefix = "[Generator]"
+        log.info(f"{log_prefix} Received batch request with {len(request.jobs)} jobs")
+        yield from execute_batch(self.Execute, request, context, log_prefix)
+
+    def warm_up(self):
+        # A few rows generated in memory (WARMUP_REQUEST), so the first real call
+        # finds NumPy and the CSV encoder ready
+        response = self.Execute(energy_pb2.ExecuteRequest(parameters={"rows": "10"}, return_payload=True), None)
+        if not response.success:
+            raise RuntimeError(response.message)
+
+    def _generate(self, request):
+        # 'rows', 'households', 'start', 'span_seconds', 'anomaly_rate' and 'seed'
+        # parameters shape the dataset; the same seed always gives the same bytes.
+        # Chunks are generated and written one at a time, so memory stays bounded.
+        # An .arrow / .parquet output (or 'output_format') writes typed columns instead of CSV,
+        # and 'compression' (or a .gz / .zst / .lz4 output) compresses them as they are written
+        parameters = {k: v for k, v in request.parameters.items()
+                      if k not in ("output_format", "compression", "compression_level", PIPE_OUTPUT)}
+        settings = parse_settings(parameters)
+        fmt = output_format(request, default=CSV_FORMAT)
+        rows_processed = 0
+        chunks_processed = 0
+        # The sink creates the output directory if it doesn't exist, or keeps the
+        # CSV in memory when the orchestrator hands it straight to the analyzer
+        sink = OutputSink(request)
+        with sink as f:
+            if fmt == CSV_FORMAT:
+                chunks = iter_csv_chunks(settings)
+            else:
+                writer = TableWriter(f, fmt)
+                chunks = ((len(columns["timestamp_ms"]), to_record_batch(settings, columns))
+                          for columns in iter_chunk_columns(settings))
+            for rows, data in chunks:
+                if fmt == CSV_FORMAT:
+                    f.write(data)
+                else:
+                    writer.write(data)
+                if rows:
+                    rows_processed += rows
+                    chunks_processed += 1
+                    yield energy_pb2.ExecuteProgress(rows_processed=rows_processed, chunks_processed=chunks_processed)
+            if fmt != CSV_FORMAT:
+                writer.close(empty_frame=to_record_batch(settings, generate_columns(settings, 0, 0)))
+        message = f"Successfully generated {rows_processed} rows of synthetic data to {describe_output(request)}"
+        log.info(message)
+        yield energy_pb2.ExecuteProgress(
+            rows_processed=rows_processed, chunks_processed=chunks_processed,
+            done=True, success=True, message=message, output_payload=sink.payload)
@@ -0,0 +1,180 @@
+# energy_generator/synthetic.py
+# Vectorized synthetic meter data. Rows are generated and encoded as CSV in
+# fixed-size chunks with NumPy, so any number of rows fits in bounded memory.
+
+import numpy as np
+# NumPy imports its random module on first use; load it with the stage instead of in the first request
+import numpy.random  # noqa: F401
+
+CSV_HEADER = b"timestamp,household_id,power_consumption,voltage,current\n"
+
+# Rows per generated chunk. Every chunk draws from its own generator seeded with
+# (seed, chunk index), so the output depends on the seed alone.
+GENERATION_CHUNK_ROWS = 1 << 18
+
+DEFAULT_SETTINGS = {
+    "rows": 10,
+    "households": 3,
+    "start": "2025-01-01T00:00:00Z",
+    "span_seconds": None,  # defaults to one reading per second
+    "anomaly_rate": 0.01,
+    "seed": 0,
+}
+
+# Efficiency (power / (voltage * current)) of normal readings and of anomalies;
+# the analyzer flags readings below 0.1
+NORMAL_EFFICIENCY = (0.3, 0.95)
+ANOMALY_EFFICIENCY = (0.01, 0.09)
+
+
+def parse_settings(parameters) -> dict:
+    """Reads generator settings from the request's string parameters."""
+    unknown = set(parameters) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown generator parameters: {sorted(unknown)}")
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(parameters)
+
+    rows = int(settings["rows"])
+    households = int(settings["households"])
+    span_seconds = float(settings["span_seconds"]) if settings["span_seconds"] is not None else float(rows)
+    anomaly_rate = float(settings["anomaly_rate"])
+    if rows < 0:
+        raise ValueError(f"'rows' must not be negative, got {rows}")
+    if households < 1:
+        raise ValueError(f"'households' must be at least 1, got {households}")
+    if span_seconds < 0:
+        raise ValueError(f"'span_seconds' must not be negative, got {span_seconds}")
+    if not 0.0 <= anomaly_rate <= 1.0:
+        raise ValueError(f"'anomaly_rate' must be in [0, 1], got {anomaly_rate}")
+    return {
+        "rows": rows,
+        "households": households,
+        "start_ms": int(np.datetime64(str(settings["start"]).rstrip("Z"), "ms").astype(np.int64)),
+        "span_ms": int(round(span_seconds * 1000)),
+        "anomaly_rate": anomaly_rate,
+        "seed": int(settings["seed"]),
+    }
+
+
+def _digits(values: np.ndarray, width: int, strip_leading_zeros: bool) -> np.ndarray:
+    # ASCII digits of non-negative integers as an (n, width) byte matrix. Stripped
+    # leading zeros become 0 bytes, which are removed when the lines are joined.
+    # 32-bit arithmetic is used whenever the values fit, as it is about twice as fast.
+    dtype = np.int32 if width <= 9 else np.int64
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=dtype)
+    digits = (values.astype(dtype)[:, None] // powers) % 10
+    out = digits.astype(np.uint8) + np.uint8(ord("0"))
+    if strip_leading_zeros:
+        leading = np.cumsum(digits, axis=1) == 0
+        leading[:, -1] = False
+        out[leading] = 0
+    return out
+
+
+def _fixed_point(values: np.ndarray, decimals: int) -> list:
+    # Byte columns of non-negative floats written with a fixed number of decimals
+    scaled = np.round(values * 10 ** decimals).astype(np.int64)
+    integer_part = scaled // 10 ** decimals
+    width = max(len(str(int(integer_part.max()))) if len(scaled) else 1, 1)
+    return [_digits(integer_part, width, True), _constant(len(values), b"."),
+            _digits(scaled % 10 ** decimals, decimals, False)]
+
+
+def _constant(rows: int, text: bytes) -> np.ndarray:
+    return np.tile(np.frombuffer(text, dtype=np.uint8), (rows, 1))
+
+
+def _timestamps(timestamp_ms: np.ndarray, with_milliseconds: bool) -> list:
+    # Byte columns of ISO-8601 timestamps. Dates are formatted once per day in
+    # the chunk and the time of day is built from digits, which is far cheaper
+    # than formatting every datetime.
+    days = timestamp_ms // 86_400_000
+    first_day = int(days.min()) if len(days) else 0
+    day_count = int(days.max()) - first_day + 1 if len(days) else 1
+    day_text = np.datetime_as_string(np.arange(first_day, first_day + day_count).astype("datetime64[D]"))
+    dates = np.frombuffer(day_text.astype("S10").tobytes(), dtype=np.uint8).reshape(-1, 10)[days - first_day]
+
+    ms_of_day = timestamp_ms - days * 86_400_000
+    rows = len(timestamp_ms)
+    columns = [dates, _constant(rows, b"T"), _digits(ms_of_day // 3_600_000, 2, False),
+               _constant(rows, b":"), _digits(ms_of_day // 60_000 % 60, 2, False),
+               _constant(rows, b":"), _digits(ms_of_day // 1000 % 60, 2, False)]
+    if with_milliseconds:
+        columns += [_constant(rows, b"."), _digits(ms_of_day % 1000, 3, False)]
+    return columns
+
+
+def generate_columns(settings: dict, first_row: int, rows: int) -> dict:
+    """Returns rows [first_row, first_row + rows) of the dataset as NumPy columns."""
+    chunk_index = first_row // GENERATION_CHUNK_ROWS
+    rng = np.random.default_rng([settings["seed"], chunk_index])
+    row_numbers = np.arange(first_row, first_row + rows, dtype=np.int64)
+
+    # Readings are spread evenly over the span
+    total_rows = max(settings["rows"], 1)
+    timestamp_ms = settings["start_ms"] + row_numbers * settings["span_ms"] // total_rows
+
+    voltage = np.clip(rng.normal(230.0, 3.0, rows), 200.0, 260.0)
+    current = rng.uniform(0.5, 15.0, rows)
+    anomalous = rng.random(rows) < settings["anomaly_rate"]
+    efficiency = np.where(anomalous, rng.uniform(*ANOMALY_EFFICIENCY, rows), rng.uniform(*NORMAL_EFFICIENCY, rows))
+    # Round the inputs first so the analyzer recomputes the same efficiency band
+    voltage = np.round(voltage, 2)
+    current = np.round(current, 3)
+    return {
+        "timestamp_ms": timestamp_ms,
+        "household_index": row_numbers % settings["households"],
+        "power_consumption": np.round(voltage * current * efficiency, 3),
+        "voltage": voltage,
+        "current": current,
+    }
+
+
+def encode_csv(settings: dict, columns: dict) -> bytes:
+    """Encodes generated columns as CSV lines."""
+    rows = len(columns["timestamp_ms"])
+    # Whole-second steps keep the generator's usual "2025-01-01T00:00:00Z" form
+    whole_seconds = settings["span_ms"] % (max(settings["rows"], 1) * 1000) == 0 and settings["start_ms"] % 1000 == 0
+    parts = [
+        *_timestamps(columns["timestamp_ms"], not whole_seconds), _constant(rows, b"Z,HH-"),
+        _digits(columns["household_index"], len(str(settings["households"] - 1)), True),
+        _constant(rows, b","), *_fixed_point(columns["power_consumption"], 3),
+        _constant(rows, b","), *_fixed_point(columns["voltage"], 2),
+        _constant(rows, b","), *_fixed_point(columns["current"], 3),
+        _constant(rows, b"\n"),
+    ]
+    lines = np.hstack(parts).ravel()
+    return lines[lines != 0].tobytes()
+
+
+def to_record_batch(settings: dict, columns: dict):
+    """
+    Builds an Arrow record batch from generated columns: UTC millisecond
+    timestamps and a dictionary-encoded household column, so nothing has to be
+    parsed from text downstream.
+    """
+    import pyarrow as pa
+
+    households = pa.array([f"HH-{i}" for i in range(settings["households"])], type=pa.string())
+    return pa.RecordBatch.from_arrays([
+        pa.array(columns["timestamp_ms"], type=pa.timestamp("ms", tz="UTC")),
+        pa.DictionaryArray.from_arrays(pa.array(columns["household_index"].astype(np.int32)), households),
+        pa.array(columns["power_consumption"]),
+        pa.array(columns["voltage"]),
+        pa.array(columns["current"]),
+    ], names=["timestamp", "household_id", "power_consumption", "voltage", "current"])
+
+
+def iter_chunk_columns(settings: dict):
+    """Yields the dataset's NumPy columns chunk by chunk."""
+    for first_row in range(0, settings["rows"], GENERATION_CHUNK_ROWS):
+        rows = min(GENERATION_CHUNK_ROWS, settings["rows"] - first_row)
+        yield generate_columns(settings, first_row, rows)
+
+
+def iter_csv_chunks(settings: dict):
+    """Yields (rows, CSV bytes) pairs: the header first, then one pair per chunk."""
+    yield 0, CSV_HEADER
+    for columns in iter_chunk_columns(settings):
+        yield len(columns["timestamp_ms"]), encode_csv(settings, columns)
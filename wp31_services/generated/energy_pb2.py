@@ -24,23 +24,41 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0c\x65nergy.proto\"9\n\x0e\x45xecuteRequest\x12\x12\n\ninput_file\x18\x01 \x01(\t\x12\x13\n\x0boutput_file\x18\x02 \x01(\t\"3\n\x0f\x45xecuteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"u\n\rRawEnergyData\x12\x11\n\ttimestamp\x18\x01 \x01(\t\x12\x14\n\x0chousehold_id\x18\x02 \x01(\t\x12\x19\n\x11power_consumption\x18\x03 \x01(\t\x12\x0f\n\x07voltage\x18\x04 \x01(\t\x12\x0f\n\x07\x63urrent\x18\x05 \x01(\t\"\x8d\x01\n\x15ProcessedEnergyReport\x12\x11\n\ttimestamp\x18\x01 \x01(\t\x12\x14\n\x0chousehold_id\x18\x02 \x01(\t\x12\r\n\x05power\x18\x03 \x01(\x02\x12\x12\n\nefficiency\x18\x04 \x01(\x02\x12\x0e\n\x06status\x18\x05 \x01(\t\x12\x18\n\x10\x61nomaly_detected\x18\x06 \x01(\x08\"V\n\x13ProcessedDataReport\x12)\n\tprocessed\x18\x01 \x03(\x0b\x32\x16.ProcessedEnergyReport\x12\x14\n\x0cskipped_rows\x18\x02 \x01(\x05\x32\x41\n\x11\x43ontainerExecutor\x12,\n\x07\x45xecute\x12\x0f.ExecuteRequest\x1a\x10.ExecuteResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0c\x65nergy.proto\"\xfd\x01\n\x0e\x45xecuteRequest\x12\x12\n\ninput_file\x18\x01 \x01(\t\x12\x13\n\x0boutput_file\x18\x02 \x01(\t\x12\x33\n\nparameters\x18\x03 \x03(\x0b\x32\x1f.ExecuteRequest.ParametersEntry\x12\x15\n\rinput_payload\x18\x04 \x01(\x0c\x12\x16\n\x0ereturn_payload\x18\x05 \x01(\x08\x12\x13\n\x0binput_files\x18\x06 \x03(\t\x12\x16\n\x0einput_payloads\x18\x07 \x03(\x0c\x1a\x31\n\x0fParametersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"c\n\x0f\x45xecuteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x16\n\x0eoutput_payload\x18\x03 \x01(\x0c\x12\x16\n\x0erows_processed\x18\x04 \x01(\x03\"\x8b\x01\n\x0f\x45xecuteProgress\x12\x16\n\x0erows_processed\x18\x01 \x01(\x03\x12\x18\n\x10\x63hunks_processed\x18\x02 \x01(\x05\x12\x0c\n\x04\x64one\x18\x03 \x01(\x08\x12\x0f\n\x07success\x18\x04 \x01(\x08\x12\x0f\n\x07message\x18\x05 \x01(\t\x12\x16\n\x0eoutput_payload\x18\x06 \x01(\x0c\"J\n\x13\x45xecuteBatchRequest\x12\x1d\n\x04jobs\x18\x01 \x03(\x0b\x32\x0f.ExecuteRequest\x12\x14\n\x0cmax_parallel\x18\x02 \x01(\x05\"G\n\x12\x45xecuteBatchResult\x12\r\n\x05index\x18\x01 \x01(\x05\x12\"\n\x08response\x18\x02 \x01(\x0b\x32\x10.ExecuteResponse\"u\n\rRawEnergyData\x12\x11\n\ttimestamp\x18\x01 \x01(\t\x12\x14\n\x0chousehold_id\x18\x02 \x01(\t\x12\x19\n\x11power_consumption\x18\x03 \x01(\t\x12\x0f\n\x07voltage\x18\x04 \x01(\t\x12\x0f\n\x07\x63urrent\x18\x05 \x01(\t\"\x8d\x01\n\x15ProcessedEnergyReport\x12\x11\n\ttimestamp\x18\x01 \x01(\t\x12\x14\n\x0chousehold_id\x18\x02 \x01(\t\x12\r\n\x05power\x18\x03 \x01(\x02\x12\x12\n\nefficiency\x18\x04 \x01(\x02\x12\x0e\n\x06status\x18\x05 \x01(\t\x12\x18\n\x10\x61nomaly_detected\x18\x06 \x01(\x08\"V\n\x13ProcessedDataReport\x12)\n\tprocessed\x18\x01 \x03(\x0b\x32\x16.ProcessedEnergyReport\x12\x14\n\x0cskipped_rows\x18\x02 \x01(\x05\"\xaa\x01\n\x12\x43olumnarDataReport\x12\x12\n\nhouseholds\x18\x01 \x03(\t\x12\x17\n\x0fhousehold_index\x18\x02 \x03(\x05\x12\x14\n\x0ctimestamp_ms\x18\x03 \x03(\x03\x12\r\n\x05power\x18\x04 \x03(\x02\x12\x12\n\nefficiency\x18\x05 \x03(\x02\x12\x18\n\x10\x61nomaly_detected\x18\x06 \x03(\x08\x12\x14\n\x0cskipped_rows\x18\x07 \x01(\x05\"c\n\x0bReportChunk\x12$\n\x04rows\x18\x01 \x01(\x0b\x32\x14.ProcessedDataReportH\x00\x12&\n\x07\x63olumns\x18\x02 \x01(\x0b\x32\x13.ColumnarDataReportH\x00\x42\x06\n\x04\x62ody\"I\n\x0f\x41ggregateReport\x12\x12\n\nhouseholds\x18\x01 \x03(\t\x12\"\n\x07windows\x18\x02 \x03(\x0b\x32\x11.WindowAggregates\"\xce\x01\n\x10WindowAggregates\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0f\n\x07size_ms\x18\x02 \x01(\x03\x12\x10\n\x08slide_ms\x18\x03 \x01(\x03\x12\x17\n\x0fhousehold_index\x18\x04 \x03(\x05\x12\x17\n\x0fwindow_start_ms\x18\x05 \x03(\x03\x12\x11\n\tpower_sum\x18\x06 \x03(\x01\x12\x17\n\x0f\x65\x66\x66iciency_mean\x18\x07 \x03(\x01\x12\x14\n\x0crecord_count\x18\x08 \x03(\x03\x12\x15\n\ranomaly_count\x18\t \x03(\x03\x32\xb4\x01\n\x11\x43ontainerExecutor\x12,\n\x07\x45xecute\x12\x0f.ExecuteRequest\x1a\x10.ExecuteResponse\x12\x34\n\rExecuteStream\x12\x0f.ExecuteRequest\x1a\x10.ExecuteProgress0\x01\x12;\n\x0c\x45xecuteBatch\x12\x14.ExecuteBatchRequest\x1a\x13.ExecuteBatchResult0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'energy_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_EXECUTEREQUEST']._serialized_start=16
-  _globals['_EXECUTEREQUEST']._serialized_end=73
-  _globals['_EXECUTERESPONSE']._serialized_start=75
-  _globals['_EXECUTERESPONSE']._serialized_end=126
-  _globals['_RAWENERGYDATA']._serialized_start=128
-  _globals['_RAWENERGYDATA']._serialized_end=245
-  _globals['_PROCESSEDENERGYREPORT']._serialized_start=248
-  _globals['_PROCESSEDENERGYREPORT']._serialized_end=389
-  _globals['_PROCESSEDDATAREPORT']._serialized_start=391
-  _globals['_PROCESSEDDATAREPORT']._serialized_end=477
-  _globals['_CONTAINEREXECUTOR']._serialized_start=479
-  _globals['_CONTAINEREXECUTOR']._serialized_end=544
+  _globals['_EXECUTEREQUEST_PARAMETERSENTRY']._loaded_options = None
+  _globals['_EXECUTEREQUEST_PARAMETERSENTRY']._serialized_options = b'8\001'
+  _globals['_EXECUTEREQUEST']._serialized_start=17
+  _globals['_EXECUTEREQUEST']._serialized_end=270
+  _globals['_EXECUTEREQUEST_PARAMETERSENTRY']._serialized_start=221
+  _globals['_EXECUTEREQUEST_PARAMETERSENTRY']._serialized_end=270
+  _globals['_EXECUTERESPONSE']._serialized_start=272
+  _globals['_EXECUTERESPONSE']._serialized_end=371
+  _globals['_EXECUTEPROGRESS']._serialized_start=374
+  _globals['_EXECUTEPROGRESS']._serialized_end=513
+  _globals['_EXECUTEBATCHREQUEST']._serialized_start=515
+  _globals['_EXECUTEBATCHREQUEST']._serialized_end=589
+  _globals['_EXECUTEBATCHRESULT']._serialized_start=591
+  _globals['_EXECUTEBATCHRESULT']._serialized_end=662
+  _globals['_RAWENERGYDATA']._serialized_start=664
+  _globals['_RAWENERGYDATA']._serialized_end=781
+  _globals['_PROCESSEDENERGYREPORT']._serialized_start=784
+  _globals['_PROCESSEDENERGYREPORT']._serialized_end=925
+  _globals['_PROCESSEDDATAREPORT']._serialized_start=927
+  _globals['_PROCESSEDDATAREPORT']._serialized_end=1013
+  _globals['_COLUMNARDATAREPORT']._serialized_start=1016
+  _globals['_COLUMNARDATAREPORT']._serialized_end=1186
+  _globals['_REPORTCHUNK']._serialized_start=1188
+  _globals['_REPORTCHUNK']._serialized_end=1287
+  _globals['_AGGREGATEREPORT']._serialized_start=1289
+  _globals['_AGGREGATEREPORT']._serialized_end=1362
+  _globals['_WINDOWAGGREGATES']._serialized_start=1365
+  _globals['_WINDOWAGGREGATES']._serialized_end=1571
+  _globals['_CONTAINEREXECUTOR']._serialized_start=1574
+  _globals['_CONTAINEREXECUTOR']._serialized_end=1754
 # @@protoc_insertion_point(module_scope)
@@ -40,6 +40,16 @@ class ContainerExecutorStub(object):
                 request_serializer=energy__pb2.ExecuteRequest.SerializeToString,
                 response_deserializer=energy__pb2.ExecuteResponse.FromString,
                 _registered_method=True)
+        self.ExecuteStream = channel.unary_stream(
+                '/ContainerExecutor/ExecuteStream',
+                request_serializer=energy__pb2.ExecuteRequest.SerializeToString,
+                response_deserializer=energy__pb2.ExecuteProgress.FromString,
+                _registered_method=True)
+        self.ExecuteBatch = channel.unary_stream(
+                '/ContainerExecutor/ExecuteBatch',
+                request_serializer=energy__pb2.ExecuteBatchRequest.SerializeToString,
+                response_deserializer=energy__pb2.ExecuteBatchResult.FromString,
+                _registered_method=True)
 
 
 class ContainerExecutorServicer(object):
@@ -52,6 +62,22 @@ class ContainerExecutorServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ExecuteStream(self, request, context):
+        """Chunked execution: the service processes its input in bounded-size chunks
+        and reports progress after every chunk
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ExecuteBatch(self, request, context):
+        """Batch execution: runs many jobs in one call, several at a time inside the
+        service, and streams back each job's result as soon as it finishes
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ContainerExecutorServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -60,6 +86,16 @@ def add_ContainerExecutorServicer_to_server(servicer, server):
                     request_deserializer=energy__pb2.ExecuteRequest.FromString,
                     response_serializer=energy__pb2.ExecuteResponse.SerializeToString,
             ),
+            'ExecuteStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ExecuteStream,
+                    request_deserializer=energy__pb2.ExecuteRequest.FromString,
+                    response_serializer=energy__pb2.ExecuteProgress.SerializeToString,
+            ),
+            'ExecuteBatch': grpc.unary_stream_rpc_method_handler(
+                    servicer.ExecuteBatch,
+                    request_deserializer=energy__pb2.ExecuteBatchRequest.FromString,
+                    response_serializer=energy__pb2.ExecuteBatchResult.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'ContainerExecutor', rpc_method_handlers)
@@ -98,3 +134,57 @@ class ContainerExecutor(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def ExecuteStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/ContainerExecutor/ExecuteStream',
+            energy__pb2.ExecuteRequest.SerializeToString,
+            energy__pb2.ExecuteProgress.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ExecuteBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/ContainerExecutor/ExecuteBatch',
+            energy__pb2.ExecuteBatchRequest.SerializeToString,
+            energy__pb2.ExecuteBatchResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
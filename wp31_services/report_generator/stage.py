@@ -0,0 +1,217 @@
+# Report Generator stage: the ContainerExecutor servicer. server.py loads it
+# through a StageLoader, so pandas, NumPy and pyarrow are only imported once the
+# server is up.
+
+import os
+import logging
+import pandas as pd
+
+from generated import energy_pb2, energy_pb2_grpc
+from src.common.batch_runner import execute_batch
+from src.common.checkpoint import (checkpoint_path, consumed_digest, input_paths, is_incremental, load_checkpoint,
+                                   open_output_for_append, output_is_intact, require_files, save_checkpoint)
+from src.common.compression import detect_compression, output_compression
+from src.common.payload_io import (PIPE_INPUT, OutputSink, describe_input, describe_output, is_piped, map_input,
+                                   open_inputs)
+from src.common.report_codec import (AGGREGATE_COLUMNS, AGGREGATE_MAGIC, COLUMNAR_MAGIC, REPORT_COLUMNS,
+                                     STREAM_MAGIC, iter_report_pipe, iter_report_stream, iter_row_batches,
+                                     iter_stream_batches, timestamp_strings)
+from src.common.table_io import (CSV_FORMAT, TableWriter, detect_input_format, iter_table_frames, output_format,
+                                 table_column_names)
+
+log = logging.getLogger(__name__)
+
+# Rows per batch when reading Arrow or Parquet inputs
+TABLE_BATCH_ROWS = 100_000
+
+def iter_input_reports(source):
+    # Analyzer output as DataFrames: protobuf reports (rows, columnar or chunked)
+    # or an Arrow / Parquet table read with only the report columns projected.
+    # A piped input is decoded frame by frame while the analyzer still writes it,
+    # also when it is compressed.
+    if detect_input_format(source) != CSV_FORMAT:
+        # Window rollup tables (analyzer 'aggregate_windows') have their own columns
+        columns = AGGREGATE_COLUMNS if "window" in table_column_names(source) else REPORT_COLUMNS
+        return iter_table_frames(source, columns, TABLE_BATCH_ROWS)
+    if is_piped(source):
+        return iter_report_pipe(source)
+    return iter_report_stream(source)
+
+# The class name MUST match the one from the shared .proto contract
+class ContainerExecutorServicer(energy_pb2_grpc.ContainerExecutorServicer):
+
+    # The method name MUST match the one from the shared .proto contract
+    def Execute(self, request, context):
+        log_prefix = "[Reporter]"
+        log.info(f"{log_prefix} Received request: input='{request.input_file}', output='{request.output_file}'")
+        
+        try:
+            # Chunked (EPS1) input is consumed one frame at a time; the final
+            # progress update carries the overall result
+            for progress in self._progress_steps(request):
+                pass
+            return energy_pb2.ExecuteResponse(
+                success=progress.success, message=progress.message, output_payload=progress.output_payload,
+                rows_processed=progress.rows_processed)
+
+        except Exception as e:
+            error_message = f"{log_prefix} Failed to execute: {e}"
+            log.error(error_message, exc_info=True)
+            return energy_pb2.ExecuteResponse(success=False, message=error_message)
+
+    def warm_up(self):
+        # A two-record report turned into CSV in memory (WARMUP_REQUEST), so the
+        # first real call finds the report decoder and the CSV writer ready
+        report = energy_pb2.ProcessedDataReport(processed=[
+            energy_pb2.ProcessedEnergyReport(timestamp="2025-01-01T00:00:00Z", household_id="H1", power=120.5,
+                                             efficiency=0.437, anomaly_detected=False),
+            energy_pb2.ProcessedEnergyReport(timestamp="2025-01-01T00:00:01Z", household_id="H2", power=3.0,
+                                             efficiency=0.024, anomaly_detected=True)])
+        response = self.Execute(energy_pb2.ExecuteRequest(input_payload=report.SerializeToString(),
+                                                          return_payload=True), None)
+        if not response.success:
+            raise RuntimeError(response.message)
+
+    def ExecuteStream(self, request, context):
+        log_prefix = "[Reporter]"
+        log.info(f"{log_prefix} Received streaming request: input='{request.input_file}', output='{request.output_file}'")
+
+        try:
+            yield from self._progress_steps(request)
+        except Exception as e:
+            error_message = f"{log_prefix} Failed to execute: {e}"
+            log.error(error_message, exc_info=True)
+            yield energy_pb2.ExecuteProgress(done=True, success=False, message=error_message)
+
+    def ExecuteBatch(self, request, context):
+        # Many Execute jobs in one call, run several at a time; each result is
+        # streamed back as soon as its job finishes
+        log_prefix = "[Reporter]"
+        log.info(f"{log_prefix} Received batch request with {len(request.jobs)} jobs")
+        yield from execute_batch(self.Execute, request, context, log_prefix)
+
+    def _progress_steps(self, request):
+        # "incremental": "true" only converts records appended since the last run
+        if is_incremental(request):
+            return self._execute_incremental(request)
+        return self._execute_chunked(request)
+
+    def _execute_chunked(self, request):
+        log_prefix = "[Reporter]"
+
+        # The reporter reads the binary protobuf data from the analyzer step
+        log.info(f"{log_prefix} Reading protobuf data from {describe_input(request)}...")
+
+        # Write CSV rows (or Arrow / Parquet batches) as each decoded batch arrives
+        # instead of building one big DataFrame
+        table_format = output_format(request, default=CSV_FORMAT)
+        rows_processed = 0
+        chunks_processed = 0
+        sink = OutputSink(request)
+        with open_inputs(request) as sources, sink as f:
+            writer = TableWriter(f, table_format) if table_format != CSV_FORMAT else None
+            for source in sources:
+                for df in iter_input_reports(source):
+                    if writer is not None:
+                        writer.write(df)
+                    else:
+                        # Window rollups (AGGREGATE_COLUMNS) already carry formatted window bounds
+                        if 'timestamp' in df:
+                            df['timestamp'] = timestamp_strings(df['timestamp'])
+                        f.write(df.to_csv(index=False, header=(chunks_processed == 0)).encode())
+                    rows_processed += len(df)
+                    chunks_processed += 1
+                    yield energy_pb2.ExecuteProgress(rows_processed=rows_processed, chunks_processed=chunks_processed)
+            if writer is not None:
+                writer.close(empty_frame=pd.DataFrame(columns=REPORT_COLUMNS))
+            elif chunks_processed == 0:
+                f.write((",".join(REPORT_COLUMNS) + "\n").encode())
+
+        log.info(f"{log_prefix} Successfully generated final report at {describe_output(request)}")
+        message = f"Successfully generated report with {rows_processed} records to {describe_output(request)}"
+        yield energy_pb2.ExecuteProgress(
+            rows_processed=rows_processed, chunks_processed=chunks_processed,
+            done=True, success=True, message=message, output_payload=sink.payload)
+
+    def _execute_incremental(self, request):
+        # Decodes only the analyzer records appended since the checkpoint and
+        # appends them to the existing CSV report
+        log_prefix = "[Reporter]"
+        require_files(request)
+        if output_format(request, default=CSV_FORMAT) != CSV_FORMAT:
+            raise ValueError("Arrow and Parquet files cannot be appended to; incremental mode writes CSV")
+        if PIPE_INPUT in request.parameters:
+            raise ValueError("Incremental mode reads whole files; it cannot be combined with pipe hand-off")
+        if output_compression(request):
+            raise ValueError("Compressed files cannot be appended to; incremental mode writes uncompressed CSV")
+        paths = input_paths(request)
+        settings = {"inputs": paths}
+        state_path = checkpoint_path(request)
+        checkpoint = load_checkpoint(state_path, settings)
+        if checkpoint is not None and not output_is_intact(request.output_file, checkpoint["output_size"]):
+            checkpoint = None
+
+        layouts = {}
+        for path in paths:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Input file not found: {path}")
+            with open(path, "rb") as f:
+                compressed = detect_compression(f) is not None
+                table_input = detect_input_format(f) != CSV_FORMAT
+                magic = f.read(len(STREAM_MAGIC))
+            if compressed:
+                raise ValueError(f"'{path}' is compressed and cannot be read incrementally")
+            if table_input:
+                raise ValueError(f"'{path}' is an Arrow or Parquet file and cannot be read incrementally")
+            if magic == COLUMNAR_MAGIC:
+                raise ValueError(f"'{path}' is a single columnar message and cannot be read incrementally; "
+                                 "run the analyzer in incremental or chunked mode")
+            if magic == AGGREGATE_MAGIC:
+                raise ValueError(f"'{path}' holds window rollups, which are rewritten as a whole; "
+                                 "run the reporter without incremental mode")
+            layouts[path] = "stream" if magic == STREAM_MAGIC else "rows"
+            state = checkpoint["inputs"].get(path) if checkpoint else None
+            # A shrunken or re-laid-out input, or one whose consumed bytes changed,
+            # was rewritten, not appended to
+            if state is not None and (os.path.getsize(path) < state["offset"] or layouts[path] != state["layout"]
+                                      or consumed_digest(path, state["offset"]) != state.get("digest")):
+                log.info(f"{log_prefix} '{path}' was rewritten since the last run; rebuilding the report")
+                checkpoint = None
+
+        output_size = checkpoint["output_size"] if checkpoint else 0
+        log.info(f"{log_prefix} Incremental run from {'checkpoint ' + state_path if checkpoint else 'scratch'}")
+        rows_processed = 0
+        chunks_processed = 0
+        input_states = {}
+        with open_output_for_append(request.output_file, output_size) as f:
+            if not output_size:
+                f.write((",".join(REPORT_COLUMNS) + "\n").encode())
+            for path in paths:
+                layout = layouts[path]
+                offset = checkpoint["inputs"][path]["offset"] if checkpoint else 0
+                with open(path, "rb") as source:
+                    buffer = map_input(source)
+                    if layout == "stream":
+                        frames = iter_stream_batches(buffer, max(offset, len(STREAM_MAGIC)))
+                    else:
+                        # Appended ProcessedDataReport bytes form a valid message of their own
+                        frames = iter_row_batches(buffer, offset, len(buffer))
+                    for df in frames:
+                        f.write(df.to_csv(index=False, header=False).encode())
+                        rows_processed += len(df)
+                        chunks_processed += 1
+                        yield energy_pb2.ExecuteProgress(rows_processed=rows_processed, chunks_processed=chunks_processed)
+                    input_states[path] = {"offset": len(buffer), "layout": layout,
+                                          "digest": consumed_digest(path, len(buffer))}
+            f.flush()
+            os.fsync(f.fileno())
+            new_size = f.tell()
+        save_checkpoint(state_path, settings, input_states, new_size)
+
+        message = (f"Incrementally appended {rows_processed} new records to {request.output_file}"
+                   if output_size else
+                   f"Successfully generated report with {rows_processed} records to {request.output_file}")
+        log.info(f"{log_prefix} {message}")
+        yield energy_pb2.ExecuteProgress(
+            rows_processed=rows_processed, chunks_processed=chunks_processed,
+            done=True, success=True, message=message)
@@ -0,0 +1,80 @@
+# src/common/batch_runner.py
+# Runs the jobs of an ExecuteBatch call inside a service. Every job goes through
+# the servicer's own Execute on a small thread pool, so a batch behaves exactly
+# like the same requests sent one by one, minus a round trip per job.
+
+import logging
+import os
+from concurrent import futures
+
+from generated import energy_pb2
+from src.common.payload_io import PIPE_INPUT, PIPE_OUTPUT
+
+log = logging.getLogger(__name__)
+
+# Jobs of one batch that run at once when the request leaves max_parallel at 0
+# (BATCH_PARALLELISM overrides it); requests cannot ask for more than the maximum
+DEFAULT_BATCH_PARALLELISM = 4
+MAX_BATCH_PARALLELISM = 32
+
+
+def batch_parallelism(requested: int = 0) -> int:
+    """Threads for one batch: the request's max_parallel, else BATCH_PARALLELISM."""
+    if requested > 0:
+        return min(requested, MAX_BATCH_PARALLELISM)
+    value = int(os.environ.get("BATCH_PARALLELISM", str(DEFAULT_BATCH_PARALLELISM)))
+    if value < 1:
+        raise ValueError(f"BATCH_PARALLELISM must be at least 1, got {value}")
+    return min(value, MAX_BATCH_PARALLELISM)
+
+
+def check_batch(batch):
+    # Jobs run at the same time, so two of them must never write the same file,
+    # and a pipe would block a thread waiting on a producer outside the batch
+    outputs = set()
+    for index, job in enumerate(batch.jobs):
+        if PIPE_INPUT in job.parameters or PIPE_OUTPUT in job.parameters:
+            raise ValueError(f"Batch job {index} uses a pipe hand-off, which cannot be batched")
+        if job.output_file and not job.return_payload:
+            if job.output_file in outputs:
+                raise ValueError(f"Several batch jobs write '{job.output_file}'")
+            outputs.add(job.output_file)
+
+
+def execute_batch(execute, batch, context, log_prefix: str = ""):
+    """
+    Yields an ExecuteBatchResult for every job of 'batch' as soon as it
+    finishes, so results arrive in completion order. 'execute' is the
+    servicer's Execute(request, context); a failed job only fails its own
+    result. When the client cancels the call, jobs that have not started yet
+    are dropped.
+    """
+    try:
+        check_batch(batch)
+    except ValueError as e:
+        error_message = f"{log_prefix} Rejected batch: {e}"
+        log.error(error_message)
+        for index in range(len(batch.jobs)):
+            yield energy_pb2.ExecuteBatchResult(
+                index=index, response=energy_pb2.ExecuteResponse(success=False, message=error_message))
+        return
+    if not batch.jobs:
+        return
+
+    workers = min(batch_parallelism(batch.max_parallel), len(batch.jobs))
+    log.info(f"{log_prefix} Running {len(batch.jobs)} batch jobs, {workers} at a time")
+    with futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        pending = {pool.submit(execute, job, context): index for index, job in enumerate(batch.jobs)}
+        try:
+            for future in futures.as_completed(pending):
+                try:
+                    response = future.result()
+                except Exception as e:
+                    # Execute reports its own failures; this only catches the unexpected
+                    log.error(f"{log_prefix} Batch job {pending[future]} failed: {e}", exc_info=True)
+                    response = energy_pb2.ExecuteResponse(success=False, message=f"{log_prefix} Failed to execute: {e}")
+                yield energy_pb2.ExecuteBatchResult(index=pending[future], response=response)
+        finally:
+            # Reached early when the client went away: skip the jobs still queued
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,99 @@
+# src/common/checkpoint.py
+# Checkpoints for incremental runs: how far each input has been consumed and
+# how much of the output belongs to completed runs.
+
+import base64
+import hashlib
+import json
+import os
+
+CHECKPOINT_VERSION = 1
+
+# Bytes just before an input's checkpointed offset whose digest is stored with
+# it; a rewrite that keeps the size and the layout still changes them
+CONSUMED_TAIL_BYTES = 1 << 16
+
+
+def is_incremental(request) -> bool:
+    return request.parameters.get("incremental", "false").lower() == "true"
+
+
+def checkpoint_path(request) -> str:
+    # Stored next to the output unless the node names its own 'checkpoint_file'
+    return request.parameters.get("checkpoint_file") or f"{request.output_file}.checkpoint.json"
+
+
+def require_files(request):
+    # Incremental runs resume files on the shared volume, not in-memory payloads
+    if request.input_payload or request.input_payloads or request.return_payload:
+        raise ValueError("Incremental mode needs input_file(s) and an output_file, not in-memory payloads")
+    if not request.output_file:
+        raise ValueError("Incremental mode needs an output_file")
+
+
+def input_paths(request):
+    return list(request.input_files) if request.input_files else [request.input_file]
+
+
+def load_checkpoint(path: str, settings: dict):
+    """
+    Returns the checkpoint at 'path', or None when there is none or it was
+    written with different settings (a full rebuild is needed then).
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint.get("settings") != settings:
+        return None
+    return checkpoint
+
+
+def save_checkpoint(path: str, settings: dict, inputs: dict, output_size: int, state: bytes = None):
+    # Written to a temporary file and renamed, so a crash never leaves half a checkpoint.
+    # 'state' is opaque stage state (e.g. anomaly detector state) that must advance
+    # together with the offsets.
+    checkpoint = {"version": CHECKPOINT_VERSION, "settings": settings, "inputs": inputs, "output_size": output_size}
+    if state is not None:
+        checkpoint["state"] = base64.b64encode(state).decode("ascii")
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def consumed_digest(path: str, offset: int) -> str:
+    """SHA-256 of the last CONSUMED_TAIL_BYTES of 'path' before 'offset'."""
+    start = max(0, offset - CONSUMED_TAIL_BYTES)
+    with open(path, "rb") as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def checkpoint_state(checkpoint):
+    """Returns the state bytes stored with a checkpoint, or None."""
+    state = checkpoint.get("state") if checkpoint else None
+    return base64.b64decode(state) if state is not None else None
+
+
+def open_output_for_append(path: str, output_size: int):
+    """
+    Opens the output positioned at the end of the last completed run.
+
+    Anything past 'output_size' was written by a run that did not finish its
+    checkpoint and is cut off, so it is not appended twice.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if not output_size:
+        return open(path, "wb")
+    f = open(path, "r+b")
+    f.truncate(output_size)
+    f.seek(output_size)
+    return f
+
+
+def output_is_intact(path: str, output_size: int) -> bool:
+    # The output must still hold everything the checkpoint says was written
+    return os.path.exists(path) and os.path.getsize(path) >= output_size
@@ -0,0 +1,274 @@
+# src/common/compression.py
+# Optional compression of stage outputs: gzip (standard library), zstd or lz4
+# frames. A node asks for it with the 'compression' parameter or an output
+# file ending in .gz / .zst / .lz4; readers recognise compressed inputs by their
+# magic bytes and decompress them while reading, so the uncompressed data never
+# exists on the shared volume or as a whole in memory. zstandard and lz4 are
+# only imported when a stage actually uses them.
+
+import io
+import os
+import zlib
+
+GZIP = "gzip"
+ZSTD = "zstd"
+LZ4 = "lz4"
+CODECS = (GZIP, ZSTD, LZ4)
+NO_COMPRESSION = "none"
+
+# zstd level 1 compressed the generator CSV better and twice as fast as level 3
+# (benchmarks/bench_compression.py)
+DEFAULT_LEVELS = {GZIP: 6, ZSTD: 1, LZ4: 0}
+LEVEL_RANGES = {GZIP: (0, 9), ZSTD: (1, 22), LZ4: (0, 16)}
+
+# Every frame (gzip member) starts with its format's magic
+MAGICS = {
+    GZIP: b"\x1f\x8b",
+    ZSTD: b"\x28\xb5\x2f\xfd",
+    LZ4: b"\x04\x22\x4d\x18",
+}
+
+_EXTENSIONS = {
+    ".gz": GZIP,
+    ".zst": ZSTD,
+    ".lz4": LZ4,
+}
+
+# Compressed bytes read from the source at a time
+READ_BYTES = 1 << 16
+
+# gzip header and trailer around the deflate stream
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd compression needs the optional 'zstandard' package") from e
+    return zstandard
+
+
+def _lz4_frame():
+    try:
+        import lz4.frame
+    except ImportError as e:
+        raise ImportError("lz4 compression needs the optional 'lz4' package") from e
+    return lz4.frame
+
+
+def compression_for_path(path: str):
+    """Returns the codec a file name's extension asks for, or None."""
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def strip_compression_extension(path: str) -> str:
+    # "report.parquet.zst" -> "report.parquet", so the table format is still recognised
+    root, extension = os.path.splitext(path)
+    return root if extension.lower() in _EXTENSIONS else path
+
+
+def output_compression(request):
+    """
+    Returns (codec, level) for a stage's output, or None to write it as is:
+    the 'compression' parameter ("none" turns it off), else the output file's
+    extension. 'compression_level' overrides the codec's default level.
+    """
+    codec = request.parameters.get("compression")
+    if codec is None and not request.return_payload:
+        codec = compression_for_path(request.output_file)
+    if codec is None or codec == NO_COMPRESSION:
+        return None
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression '{codec}'. Expected one of {CODECS + (NO_COMPRESSION,)}")
+    level = int(request.parameters.get("compression_level", DEFAULT_LEVELS[codec]))
+    low, high = LEVEL_RANGES[codec]
+    if not low <= level <= high:
+        raise ValueError(f"'compression_level' for {codec} must be in [{low}, {high}], got {level}")
+    return codec, level
+
+
+def detect_compression(source):
+    """Tells from its first bytes which codec compressed a binary input, or None; rewinds the source."""
+    position = source.tell()
+    head = source.read(max(len(magic) for magic in MAGICS.values()))
+    source.seek(position)
+    for codec, magic in MAGICS.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+class _Compressor:
+    # One incremental compressor per output. With 'flush_writes' every write is
+    # flushed to the end of a block, so a reader of a piped output can decode
+    # it before the frame is finished.
+
+    def __init__(self, codec: str, level: int, flush_writes: bool):
+        self.codec = codec
+        self.flush_writes = flush_writes
+        if codec == GZIP:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+        elif codec == ZSTD:
+            self._zstd = _zstandard()
+            self._obj = self._zstd.ZstdCompressor(level=level).compressobj()
+        elif codec == LZ4:
+            self._obj = _lz4_frame().LZ4FrameCompressor(compression_level=level, auto_flush=flush_writes)
+        else:
+            raise ValueError(f"Unknown compression '{codec}'. Expected one of {CODECS}")
+
+    def begin(self) -> bytes:
+        return self._obj.begin() if self.codec == LZ4 else b""
+
+    def compress(self, data) -> bytes:
+        output = self._obj.compress(data)
+        if not self.flush_writes or self.codec == LZ4:
+            return output
+        if self.codec == GZIP:
+            return output + self._obj.flush(zlib.Z_SYNC_FLUSH)
+        return output + self._obj.flush(self._zstd.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def _decompressor(codec: str):
+    # zlib, zstandard and lz4 decompression objects all expose decompress(),
+    # eof and unused_data; each one decodes a single frame (gzip member)
+    if codec == GZIP:
+        return zlib.decompressobj(_GZIP_WBITS)
+    if codec == ZSTD:
+        return _zstandard().ZstdDecompressor().decompressobj()
+    if codec == LZ4:
+        return _lz4_frame().LZ4FrameDecompressor()
+    raise ValueError(f"Unknown compression '{codec}'. Expected one of {CODECS}")
+
+
+class CompressingWriter(io.BufferedIOBase):
+    """
+    Binary file object that compresses everything written to it into 'target'.
+
+    Closing it writes the end of the frame but leaves 'target' open, so the
+    caller still owns the file or buffer. tell() counts uncompressed bytes.
+    """
+
+    def __init__(self, target, codec: str, level: int = None, flush_writes: bool = False):
+        super().__init__()
+        self.codec = codec
+        self._target = target
+        self._compressor = _Compressor(codec, DEFAULT_LEVELS[codec] if level is None else level, flush_writes)
+        self._position = 0
+        header = self._compressor.begin()
+        if header:
+            target.write(header)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to a closed CompressingWriter")
+        size = memoryview(data).nbytes
+        output = self._compressor.compress(data)
+        if output:
+            self._target.write(output)
+        self._position += size
+        return size
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._target.write(self._compressor.finish())
+        super().close()
+
+
+class _DecompressedStream(io.RawIOBase):
+    # Decompressed view of a compressed binary source, frame after frame. It can
+    # seek, which restarts decompression from the first frame when going back.
+
+    def __init__(self, source, codec: str):
+        super().__init__()
+        self._source = source
+        self._codec = codec
+        self._start = source.tell()
+        self._rewind()
+
+    def _rewind(self):
+        self._decompressor = _decompressor(self._codec)
+        self._in_frame = False
+        self._unused = b""
+        self._pending = b""
+        self._pending_offset = 0
+        self._position = 0
+        self._eof = False
+
+    def _fill(self):
+        data = self._unused or self._source.read(READ_BYTES)
+        self._unused = b""
+        if not data:
+            if self._in_frame:
+                raise EOFError(f"Compressed ({self._codec}) input ended in the middle of a frame")
+            self._eof = True
+            return
+        if self._decompressor.eof:
+            # Concatenated frames, e.g. appended by several writers
+            self._decompressor = _decompressor(self._codec)
+        self._in_frame = True
+        self._pending = self._decompressor.decompress(data)
+        self._pending_offset = 0
+        if self._decompressor.eof:
+            self._in_frame = False
+            self._unused = self._decompressor.unused_data
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._pending_offset == len(self._pending) and not self._eof:
+            self._fill()
+        size = min(len(buffer), len(self._pending) - self._pending_offset)
+        buffer[:size] = self._pending[self._pending_offset:self._pending_offset + size]
+        self._pending_offset += size
+        self._position += size
+        return size
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("Compressed inputs can only seek from the start or the current position")
+        if offset < self._position:
+            self._source.seek(self._start)
+            self._rewind()
+        while self._position < offset:
+            if not self.read(min(offset - self._position, READ_BYTES)):
+                break
+        return self._position
+
+
+class DecompressingReader(io.BufferedReader):
+    """
+    Buffered binary file object that reads 'source' decompressed.
+
+    It has no file descriptor or name, so consumers that memory-map files read
+    it like an in-memory stream instead. 'compressed' is the wrapped source.
+    """
+
+    def __init__(self, source, codec: str):
+        super().__init__(_DecompressedStream(source, codec), READ_BYTES)
+        self.codec = codec
+        self.compressed = source
+
+
+def decompressed(source):
+    """Returns 'source' itself, or a DecompressingReader when its bytes are compressed."""
+    codec = detect_compression(source)
+    return source if codec is None else DecompressingReader(source, codec)
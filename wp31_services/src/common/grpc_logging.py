@@ -1 +1,152 @@
-class ServerLoggingInterceptor: pass
+# src/common/grpc_logging.py
+# Server interceptor that logs and measures every stage RPC: duration, rows,
+# bytes read and written, and the peak RSS while it ran. The numbers go to the
+# service's StageMetrics and back to the caller as trailing metadata.
+
+import logging
+import os
+import time
+
+import grpc
+
+log = logging.getLogger(__name__)
+
+# Trailing metadata keys carrying the per-call metrics to the orchestrator
+METADATA_PREFIX = "x-stage-"
+DURATION_KEY = METADATA_PREFIX + "duration-ms"
+ROWS_KEY = METADATA_PREFIX + "rows"
+BYTES_READ_KEY = METADATA_PREFIX + "bytes-read"
+BYTES_WRITTEN_KEY = METADATA_PREFIX + "bytes-written"
+PEAK_RSS_KEY = METADATA_PREFIX + "peak-rss-bytes"
+
+# Health checks and other infrastructure RPCs are passed through untouched
+_UNMEASURED_PREFIXES = ("/grpc.health.", "/grpc.reflection.")
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def input_bytes(request) -> int:
+    """Bytes a stage reads: in-memory payloads plus the size of its input files."""
+    total = len(request.input_payload) + sum(len(payload) for payload in request.input_payloads)
+    total += _file_size(request.input_file) + sum(_file_size(path) for path in request.input_files)
+    return total
+
+
+def output_bytes(request, payload: bytes, success: bool) -> int:
+    """Bytes a stage wrote: the returned payload or the output file."""
+    if not success:
+        return 0
+    return len(payload) if request.return_payload else _file_size(request.output_file)
+
+
+class ServerLoggingInterceptor(grpc.ServerInterceptor):
+    """
+    Wraps the unary and server-streaming stage RPCs of a service.
+
+    Rows come from the response's rows_processed (the final ExecuteProgress for
+    streaming calls, the sum over all jobs for ExecuteBatch), so the servicers
+    need no extra bookkeeping.
+    """
+
+    def __init__(self, metrics):
+        self._metrics = metrics
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        method = handler_call_details.method
+        if handler is None or method.startswith(_UNMEASURED_PREFIXES):
+            return handler
+        name = method.rsplit("/", 1)[-1]
+        if handler.unary_unary is not None:
+            return grpc.unary_unary_rpc_method_handler(
+                self._wrap_unary(handler.unary_unary, name),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer)
+        if handler.unary_stream is not None:
+            wrap = self._wrap_batch if name == "ExecuteBatch" else self._wrap_stream
+            return grpc.unary_stream_rpc_method_handler(
+                wrap(handler.unary_stream, name),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer)
+        return handler
+
+    def _wrap_unary(self, behavior, name):
+        def wrapper(request, context):
+            call = self._begin()
+            response = None
+            try:
+                response = behavior(request, context)
+                return response
+            finally:
+                self._finish(call, name, request, response, context)
+        return wrapper
+
+    def _wrap_stream(self, behavior, name):
+        def wrapper(request, context):
+            call = self._begin()
+            last = None
+            try:
+                for message in behavior(request, context):
+                    last = message
+                    yield message
+            finally:
+                self._finish(call, name, request, last, context)
+        return wrapper
+
+    def _wrap_batch(self, behavior, name):
+        # An ExecuteBatch call is measured as a whole: the rows and bytes of all
+        # of its jobs, and successful only when every job succeeded
+        def wrapper(request, context):
+            call = self._begin()
+            succeeded = rows = bytes_written = 0
+            try:
+                for result in behavior(request, context):
+                    response = result.response
+                    succeeded += response.success
+                    rows += response.rows_processed
+                    bytes_written += output_bytes(request.jobs[result.index], response.output_payload,
+                                                  response.success)
+                    yield result
+            finally:
+                self._record(call, name, succeeded == len(request.jobs), rows,
+                             sum(input_bytes(job) for job in request.jobs), bytes_written, context)
+        return wrapper
+
+    def _begin(self):
+        self._metrics.call_started()
+        return time.perf_counter(), self._metrics.rss.begin()
+
+    def _finish(self, call, name, request, response, context):
+        success = bool(getattr(response, "success", False))
+        # A stream cut short (client gone, exception) never sent its final message
+        if response is not None and hasattr(response, "done") and not response.done:
+            success = False
+        rows = getattr(response, "rows_processed", 0) if response is not None else 0
+        bytes_read = input_bytes(request)
+        bytes_written = output_bytes(request, getattr(response, "output_payload", b""), success)
+        self._record(call, name, success, rows, bytes_read, bytes_written, context)
+
+    def _record(self, call, name, success, rows, bytes_read, bytes_written, context):
+        started, token = call
+        duration = time.perf_counter() - started
+        peak_rss = self._metrics.rss.end(token)
+        status = "ok" if success else "error"
+        self._metrics.record(name, status, duration, rows, bytes_read, bytes_written, peak_rss)
+        log.info(f"[Metrics] {name} {status} in {duration:.3f}s: {rows} rows, {bytes_read} bytes read, "
+                 f"{bytes_written} bytes written, peak RSS {peak_rss / 1e6:.1f} MB")
+        try:
+            context.set_trailing_metadata((
+                (DURATION_KEY, f"{duration * 1000:.3f}"),
+                (ROWS_KEY, str(rows)),
+                (BYTES_READ_KEY, str(bytes_read)),
+                (BYTES_WRITTEN_KEY, str(bytes_written)),
+                (PEAK_RSS_KEY, str(peak_rss)),
+            ))
+        except Exception as e:
+            # The RPC may already be over (e.g. cancelled by the client)
+            log.debug(f"Could not attach metrics metadata: {e}")
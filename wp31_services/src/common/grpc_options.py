@@ -0,0 +1,36 @@
+# src/common/grpc_options.py
+# Channel arguments shared by all WP 3.1 gRPC servers.
+
+import os
+
+import grpc
+
+# gRPC's 4 MB default is too small for in-memory hand-off of medium-sized runs
+MAX_MESSAGE_BYTES = 256 * 1024 * 1024
+
+GRPC_SERVER_OPTIONS = [
+    ("grpc.max_send_message_length", MAX_MESSAGE_BYTES),
+    ("grpc.max_receive_message_length", MAX_MESSAGE_BYTES),
+    # The orchestrator keeps pooled channels alive with pings between runs;
+    # accept them instead of answering with GOAWAY "too_many_pings"
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_ping_interval_without_data_ms", 10_000),
+    ("grpc.http2.max_ping_strikes", 0),
+]
+
+# Compression of the servers' responses (GRPC_COMPRESSION). gRPC only sends a
+# compressed message when the client advertised the algorithm in
+# grpc-accept-encoding, which every gRPC client does for gzip and deflate; the
+# orchestrator compresses its requests with the 'channel_pool' setting instead.
+GRPC_COMPRESSION_ALGORITHMS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+def server_compression():
+    name = os.environ.get("GRPC_COMPRESSION", "none").lower()
+    if name not in GRPC_COMPRESSION_ALGORITHMS:
+        raise ValueError(f"Unknown GRPC_COMPRESSION '{name}'. Expected one of {sorted(GRPC_COMPRESSION_ALGORITHMS)}")
+    return GRPC_COMPRESSION_ALGORITHMS[name]
@@ -0,0 +1,256 @@
+# src/common/payload_io.py
+# Input/output helpers that let a stage work either on files in /data or on
+# payload bytes passed directly through the gRPC request and response.
+# Compressed inputs and outputs (compression.py) are handled here as well.
+
+import io
+import mmap
+import os
+import time
+from contextlib import ExitStack, contextmanager
+
+from src.common.compression import CompressingWriter, decompressed, output_compression
+
+# Request parameters of a "pipe" hand-off: the producer sets 'pipe_output' and
+# the consumer 'pipe_input' to the same run token, and both run at the same
+# time. The producer writes its output file as usual plus a marker next to it
+# ("<token> writing", then "<token> done" or "<token> failed"); the consumer
+# reads the file while it grows and stops at the end the marker confirms.
+PIPE_OUTPUT = "pipe_output"
+PIPE_INPUT = "pipe_input"
+
+# How often a pipe reader checks for new bytes, and how long it waits without
+# any before it gives up on the producer
+PIPE_POLL_SECONDS = 0.02
+PIPE_IDLE_TIMEOUT_SECONDS = 120
+
+
+def pipe_marker_path(path: str) -> str:
+    return f"{path}.pipe"
+
+
+def _read_marker(path: str) -> str:
+    try:
+        with open(pipe_marker_path(path), "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def _write_marker(path: str, text: str):
+    # Replaced atomically, so a reader never sees half a marker
+    temp_path = f"{pipe_marker_path(path)}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(text)
+    os.replace(temp_path, pipe_marker_path(path))
+
+
+def fail_pipe_output(request):
+    """Marks a stage's piped output as failed, e.g. when the stage failed before opening it."""
+    token = request.parameters.get(PIPE_OUTPUT)
+    if token and not request.return_payload and request.output_file:
+        _write_marker(request.output_file, f"{token} failed")
+
+
+class PipeReader:
+    """
+    Reads a file that another stage is still writing ('pipe' hand-off).
+
+    Reads block until the requested bytes have been written or the producer's
+    marker says it is done, like reads from a regular file whose end only
+    exists once the producer has finished. A failed producer, or one that
+    writes nothing for PIPE_IDLE_TIMEOUT_SECONDS, raises an error.
+    """
+
+    def __init__(self, path: str, token: str, idle_timeout: float = PIPE_IDLE_TIMEOUT_SECONDS):
+        self.name = path
+        self.token = token
+        self.idle_timeout = idle_timeout
+        self._last_progress = time.monotonic()
+        # The producer truncates the file before it marks the run as started
+        while not _read_marker(path).startswith(token):
+            self._wait()
+        self._file = open(path, "rb")
+
+    def _wait(self):
+        if time.monotonic() - self._last_progress > self.idle_timeout:
+            raise TimeoutError(f"No data piped into '{self.name}' for {self.idle_timeout}s")
+        time.sleep(PIPE_POLL_SECONDS)
+
+    def read(self, size: int = -1) -> bytes:
+        parts = []
+        remaining = size
+        while remaining:
+            # The marker is read first: once it says done, every byte is already in the file
+            state = _read_marker(self.name)[len(self.token):].strip()
+            if state.startswith("failed"):
+                raise ValueError(f"The stage writing '{self.name}' failed")
+            data = self._file.read(remaining if remaining > 0 else -1)
+            if data:
+                parts.append(data)
+                remaining = max(remaining - len(data), 0) if size >= 0 else -1
+                self._last_progress = time.monotonic()
+                continue
+            if state == "done":
+                break
+            self._wait()
+        return b"".join(parts)
+
+    def readline(self) -> bytes:
+        line = []
+        while not line or line[-1] != b"\n":
+            byte = self.read(1)
+            if not byte:
+                break
+            line.append(byte)
+        return b"".join(line)
+
+    def __iter__(self):
+        # pandas only treats objects it can iterate over as file-like
+        return iter(self.readline, b"")
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def is_piped(source) -> bool:
+    """True for an input another stage is still writing, whether it is compressed or not."""
+    return isinstance(getattr(source, "compressed", source), PipeReader)
+
+
+def _open_file(path: str):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Input file not found: {path}")
+    return open(path, "rb")
+
+
+@contextmanager
+def open_inputs(request):
+    """
+    Opens every stage input as a binary file object, in order.
+
+    Join nodes receive several inputs in input_payloads / input_files. Other
+    nodes get the request's input_payload when the orchestrator forwarded one,
+    otherwise the file at input_file, read while it grows with 'pipe_input'.
+    Compressed inputs are decompressed while they are read.
+    """
+    with ExitStack() as stack:
+        token = request.parameters.get(PIPE_INPUT)
+        if token:
+            if request.input_payload or request.input_payloads or request.input_files:
+                raise ValueError("A piped input must be the single input_file")
+            sources = [stack.enter_context(PipeReader(request.input_file, token))]
+        elif request.input_payloads or request.input_files:
+            sources = [io.BytesIO(payload) for payload in request.input_payloads]
+            sources += [stack.enter_context(_open_file(path)) for path in request.input_files]
+        elif request.input_payload:
+            sources = [io.BytesIO(request.input_payload)]
+        else:
+            sources = [stack.enter_context(_open_file(request.input_file))]
+        yield [decompressed(source) for source in sources]
+
+
+def map_input(source):
+    """
+    Returns a read-only buffer over a binary input without reading it into memory.
+
+    Files are memory-mapped, so the OS pages in only what is decoded and can
+    drop it again afterwards; in-memory payloads are exposed without a copy.
+    """
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer().toreadonly()
+    try:
+        fileno = source.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return source.read()
+    if os.fstat(fileno).st_size == 0:
+        # An empty file cannot be mapped
+        return b""
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
+def describe_input(request) -> str:
+    if request.input_payloads or request.input_files:
+        parts = [f"{len(request.input_payloads)} in-memory payloads"] if request.input_payloads else []
+        parts += [f"'{path}'" for path in request.input_files]
+        return ", ".join(parts)
+    if request.input_payload:
+        return f"in-memory payload ({len(request.input_payload)} bytes)"
+    return f"'{request.input_file}'"
+
+
+def describe_output(request) -> str:
+    return "in-memory payload" if request.return_payload else request.output_file
+
+
+class OutputSink:
+    """
+    Binary destination for a stage's output.
+
+    Writes go to output_file, or to an in-memory buffer whose bytes are sent
+    back in the response when the request sets return_payload. With
+    'pipe_output' the file is written unbuffered and its pipe marker tells
+    the stage reading it when the output is complete. Outputs are compressed
+    as they are written when the request asks for it (output_compression).
+    """
+
+    def __init__(self, request):
+        self.return_payload = request.return_payload
+        self.path = request.output_file
+        self.pipe_token = request.parameters.get(PIPE_OUTPUT)
+        if self.pipe_token and self.return_payload:
+            raise ValueError("A piped output must be written to output_file")
+        self.compression = output_compression(request)
+        self._buffer = io.BytesIO() if self.return_payload else None
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        if self.return_payload:
+            return self._compressing(self._buffer)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Every write of a piped output reaches the reader at once
+        self._file = open(self.path, "wb", buffering=0 if self.pipe_token else -1)
+        if self.pipe_token:
+            _write_marker(self.path, f"{self.pipe_token} writing")
+        return self._compressing(self._file)
+
+    def _compressing(self, target):
+        if self.compression is None:
+            return target
+        # A piped output is flushed block by block, so the reader can decode it as it arrives
+        codec, level = self.compression
+        self._writer = CompressingWriter(target, codec, level, flush_writes=bool(self.pipe_token))
+        return self._writer
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None and exc_type is None:
+            # Ends the last frame; the file or buffer below stays open
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+            if self.pipe_token:
+                _write_marker(self.path, f"{self.pipe_token} {'failed' if exc_type else 'done'}")
+        return False
+
+    @property
+    def payload(self) -> bytes:
+        return self._buffer.getvalue() if self.return_payload else b""
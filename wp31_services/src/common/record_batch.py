@@ -0,0 +1,555 @@
+# src/common/record_batch.py
+# A compact in-memory form of analyzed records, and bulk conversion between it
+# and the protobuf report encodings.
+#
+# ProcessedEnergyReport message objects cost hundreds of bytes per record and
+# are built and read one attribute at a time from Python. A RecordBatch keeps
+# the same records in typed NumPy arrays (about 40 bytes per record with
+# string timestamps, plus one copy of each household ID), and its encoders and
+# decoders work on the wire bytes of whole batches at once.
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Records encoded at a time; bounds the index arrays the vectorized encoder builds
+ENCODE_BATCH_ROWS = 100_000
+
+# A 64-bit varint takes at most ten 7-bit groups
+_MAX_VARINT_BYTES = 10
+
+# Protobuf wire types
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+# Single-byte tags of the ProcessedEnergyReport fields the analyzer writes
+_TIMESTAMP_TAG = 0x0A         # field 1, length-delimited
+_HOUSEHOLD_TAG = 0x12         # field 2, length-delimited
+_POWER_TAG = 0x1D             # field 3, fixed32
+_EFFICIENCY_TAG = 0x25        # field 4, fixed32
+_ANOMALY_FIELD = b"\x30\x01"  # field 6, varint true
+_RECORD_TAG = 0x0A            # ProcessedDataReport.processed, field 1
+
+
+def parse_timestamps(timestamps) -> np.ndarray:
+    """Turns ISO-8601 timestamp strings (or typed Arrow/Parquet timestamps) into UTC epoch milliseconds."""
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.Series(timestamps)
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+        return timestamps.dt.as_unit('ms').astype('int64').to_numpy()
+    timestamps = pd.Series(timestamps, dtype=str)
+    if timestamps.str.endswith('Z').all():
+        # Fast path for the generator's 'Z' timestamps: numpy parses them in C
+        return timestamps.str.removesuffix('Z').to_numpy().astype('datetime64[ms]').astype(np.int64)
+    parsed = pd.to_datetime(timestamps, utc=True, format='ISO8601')
+    return parsed.dt.as_unit('ms').astype('int64').to_numpy()
+
+
+def format_timestamps(timestamp_ms, unit: str = None) -> np.ndarray:
+    """
+    Turns epoch milliseconds back into the ISO-8601 strings the generator
+    writes. Without a 'unit' ('s' or 'ms'), milliseconds are only written when
+    some timestamp has them.
+    """
+    timestamp_ms = np.asarray(timestamp_ms, dtype=np.int64)
+    unit = unit or timestamp_unit(timestamp_ms)
+    characters = _iso_characters(timestamp_ms, unit, np.dtype('<u4'))
+    if characters is not None:
+        return characters.view(f"<U{characters.shape[1]}").ravel()
+    text = np.datetime_as_string(timestamp_ms.astype('datetime64[ms]'), unit=unit)
+    return np.char.add(text, 'Z')
+
+
+def _iso_characters(timestamp_ms: np.ndarray, unit: str, dtype):
+    # The 'YYYY-MM-DDTHH:MM:SS[.mmm]Z' strings of 'timestamp_ms' as an (n, width)
+    # array of character codes. numpy's datetime_as_string costs ~0.4 us per
+    # value; here only the distinct days are formatted by numpy and the time of
+    # day is written digit by digit. Returns None for years outside 0000-9999,
+    # or when the timestamps span more days than there are timestamps.
+    if not len(timestamp_ms):
+        return None
+    days = timestamp_ms // 86_400_000
+    first_day = int(days.min())
+    span = int(days.max()) - first_day + 1
+    if span > len(timestamp_ms):
+        return None
+    dates = np.datetime_as_string(np.arange(first_day, first_day + span).astype('datetime64[D]'))
+    if not np.all(np.char.str_len(dates) == 10):
+        return None
+    out = np.empty((len(timestamp_ms), 24 if unit == 'ms' else 20), dtype=dtype)
+    out[:, :10] = dates.astype('<U10').view('<u4').reshape(span, 10)[days - first_day]
+    time_of_day = (timestamp_ms - days * 86_400_000).astype(np.int32)
+
+    def digits(column: int, value, count: int):
+        for i in range(count - 1, -1, -1):
+            out[:, column + i] = ord('0') + value % 10
+            value = value // 10
+
+    seconds = time_of_day // 1000
+    out[:, 10] = ord('T')
+    digits(11, seconds // 3600, 2)
+    out[:, 13] = ord(':')
+    digits(14, seconds // 60 % 60, 2)
+    out[:, 16] = ord(':')
+    digits(17, seconds % 60, 2)
+    if unit == 'ms':
+        out[:, 19] = ord('.')
+        digits(20, time_of_day % 1000, 3)
+    out[:, -1] = ord('Z')
+    return out
+
+
+def timestamp_unit(timestamp_ms) -> str:
+    return 'ms' if len(timestamp_ms) and np.any(timestamp_ms % 1000) else 's'
+
+
+def encode_strings(strings) -> np.ndarray:
+    """Turns strings into a NumPy bytes ('S') array of their UTF-8 encodings."""
+    try:
+        # numpy converts ASCII in C; other text needs the per-string codec
+        return np.asarray(strings, dtype=object).astype('S')
+    except UnicodeEncodeError:
+        return np.char.encode(np.asarray(strings, dtype=str), 'utf-8')
+
+
+def decode_strings(strings: np.ndarray) -> np.ndarray:
+    """The inverse of encode_strings()."""
+    try:
+        return strings.astype(str)
+    except UnicodeDecodeError:
+        return np.char.decode(strings, 'utf-8')
+
+
+def encode_varints(values):
+    """
+    Encodes integers as protobuf varints (negative ones in ten bytes, like
+    int64 fields). Returns the bytes as an (n, width) uint8 array and the
+    length of each varint.
+    """
+    # The cast turns negative numbers into their two's complement
+    remaining = np.asarray(values, dtype=np.int64).astype(np.uint64)
+    out = np.zeros((len(remaining), _MAX_VARINT_BYTES), dtype=np.uint8)
+    lengths = np.ones(len(remaining), dtype=np.int64)
+    for i in range(_MAX_VARINT_BYTES):
+        out[:, i] = remaining & np.uint64(0x7F)
+        remaining >>= np.uint64(7)
+        more = remaining != 0
+        if not more.any():
+            return out[:, :i + 1], lengths
+        out[more, i] |= 0x80
+        lengths += more
+    return out, lengths
+
+
+def packed_varints(values) -> np.ndarray:
+    """Encodes integers as the concatenated varints of a packed repeated field."""
+    encoded, lengths = encode_varints(values)
+    return encoded[np.arange(encoded.shape[1]) < lengths[:, None]]
+
+
+def read_varints(data: np.ndarray, positions: np.ndarray):
+    """Decodes the varint at each of 'positions' in 'data'; returns (values, positions after them)."""
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) and positions.max() >= len(data):
+        raise ValueError("Truncated varint in report")
+    first_byte = data[positions]
+    values = (first_byte & 0x7F).astype(np.int64)
+    after = positions + 1
+    # Nearly all tags and lengths fit in one byte; the rest take the general path
+    longer = np.flatnonzero(first_byte >= 0x80)
+    if len(longer):
+        values[longer], after[longer] = _read_long_varints(data, positions[longer])
+    return values, after
+
+
+def _read_long_varints(data: np.ndarray, positions: np.ndarray):
+    values = np.zeros(len(positions), dtype=np.uint64)
+    after = positions.copy()
+    active = np.arange(len(after))
+    for i in range(_MAX_VARINT_BYTES):
+        if after[active].max() >= len(data):
+            raise ValueError("Truncated varint in report")
+        byte = data[after[active]]
+        values[active] |= (byte & 0x7F).astype(np.uint64) << np.uint64(7 * i)
+        after[active] += 1
+        active = active[byte >= 0x80]
+        if not len(active):
+            return values.astype(np.int64), after
+    raise ValueError("Malformed varint in report")
+
+
+def _timestamp_bytes(timestamp_ms, unit: str):
+    # The strings of format_timestamps() as a zero-padded (n, width) uint8 array plus their lengths
+    characters = _iso_characters(timestamp_ms, unit, np.uint8)
+    if characters is not None:
+        return characters, np.full(len(characters), characters.shape[1], dtype=np.int64)
+    return _padded_strings(np.char.encode(format_timestamps(timestamp_ms, unit), 'ascii'))
+
+
+def _padded_strings(strings):
+    # A bytes ('S') array as a zero-padded (n, width) uint8 array plus the string lengths
+    if strings is None or not len(strings):
+        return np.zeros((0, 1), dtype=np.uint8), np.zeros(0, dtype=np.int64)
+    padded = strings.view(np.uint8).reshape(len(strings), -1)
+    return padded, np.char.str_len(strings).astype(np.int64)
+
+
+def _ragged_indices(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # starts[i], starts[i] + 1, ..., starts[i] + lengths[i] - 1 for every i, concatenated
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(int(lengths.sum())) + np.repeat(starts - offsets, lengths)
+
+
+def _padded_bytes(data: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # data[starts[i]:starts[i] + lengths[i]] as the rows of a zero-padded (n, width) uint8 array
+    width = max(int(lengths.max(initial=0)), 1)
+    padded = np.zeros((len(starts), width), dtype=np.uint8)
+    # Rows are copied whole through a view with one row per byte offset of 'data';
+    # the few strings too close to its end for that are copied byte by byte
+    near_end = starts > len(data) - width
+    if not near_end.all():
+        windows = np.lib.stride_tricks.as_strided(data, shape=(len(data) - width + 1, width),
+                                                  strides=(data.strides[0], data.strides[0]), writeable=False)
+        padded[~near_end] = windows[starts[~near_end]]
+        if np.any(lengths < width):
+            padded[np.arange(width) >= lengths[:, None]] = 0
+    if near_end.any():
+        rows = padded[near_end]
+        rows[np.arange(width) < lengths[near_end, None]] = data[_ragged_indices(starts[near_end], lengths[near_end])]
+        padded[near_end] = rows
+    return padded
+
+
+def _fixed32_at(data: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    # The little-endian floats at 'positions' in 'data'
+    if len(positions) and positions.max() + 4 > len(data):
+        raise ValueError("Truncated record in ProcessedDataReport")
+    windows = np.lib.stride_tricks.as_strided(data, shape=(max(len(data) - 3, 0), 4),
+                                              strides=(data.strides[0], data.strides[0]), writeable=False)
+    return windows[positions].view('<f4').ravel()
+
+
+def _factorize_rows(padded: np.ndarray):
+    # Like pd.factorize() for the rows of a zero-padded uint8 array: returns
+    # (codes, index of each distinct row's first occurrence)
+    words = np.zeros((len(padded), -(-padded.shape[1] // 8) * 8), dtype=np.uint8)
+    words[:, :padded.shape[1]] = padded
+    words = words.view('<u8')
+    # Rows of up to 8 bytes are their own key; longer ones are hashed and checked
+    key = words[:, 0].copy()
+    for column in words.T[1:]:
+        key = key * np.uint64(0x100000001B3) + column
+    codes, uniques = pd.factorize(key)
+    first = np.empty(len(uniques), dtype=np.int64)
+    first[codes[::-1]] = np.arange(len(codes))[::-1]
+    if words.shape[1] > 1 and not np.array_equal(words[first[codes]], words):
+        _, first, codes = np.unique(words, axis=0, return_index=True, return_inverse=True)
+    return codes.ravel(), first
+
+
+class RecordBatch:
+    """
+    Analyzed records as typed arrays:
+
+    - timestamp_text: the timestamp strings as given, UTF-8 encoded in a
+      bytes ('S') array, or None for typed timestamps
+    - timestamp_ms: int64 UTC epoch milliseconds; parsed from timestamp_text
+      on first use when the batch was built from strings
+    - households / household_index: the distinct household IDs and each
+      record's int32 index into them
+    - power, efficiency: float32, the precision of the report messages
+    - anomaly_bits: the anomaly flags, eight to a byte (np.packbits)
+
+    Row reports carry the timestamp strings as given, so they are kept and
+    written back byte for byte; only columnar reports store milliseconds.
+    """
+
+    def __init__(self, timestamp_ms, households, household_index, power, efficiency, anomaly_bits, rows: int,
+                 timestamp_text=None):
+        self._timestamp_ms = timestamp_ms
+        self.timestamp_text = timestamp_text
+        self.households = households
+        self.household_index = household_index
+        self.power = power
+        self.efficiency = efficiency
+        self.anomaly_bits = anomaly_bits
+        self.rows = rows
+
+    @classmethod
+    def from_columns(cls, timestamp_ms, households, household_index, power, efficiency, anomaly_detected,
+                     timestamp_text=None):
+        """
+        Builds a batch from per-record columns, copying them into the batch's
+        types. With 'timestamp_text' (a bytes array), 'timestamp_ms' may be None.
+        """
+        rows = len(timestamp_text) if timestamp_text is not None else len(timestamp_ms)
+        return cls(
+            timestamp_ms=None if timestamp_ms is None else np.array(timestamp_ms, dtype=np.int64),
+            households=np.asarray(households, dtype=object),
+            household_index=np.array(household_index, dtype=np.int32),
+            power=np.array(power, dtype=np.float32),
+            efficiency=np.array(efficiency, dtype=np.float32),
+            anomaly_bits=np.packbits(np.asarray(anomaly_detected, dtype=bool)),
+            rows=rows,
+            timestamp_text=None if timestamp_text is None else np.asarray(timestamp_text, dtype=np.bytes_),
+        )
+
+    @classmethod
+    def from_frame(cls, df):
+        """Builds a batch from an analyzed DataFrame (the analyzer's column names)."""
+        codes, households = pd.factorize(df['household_id'].astype(str))
+        timestamps = df['timestamp']
+        if pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamp_ms, timestamp_text = parse_timestamps(timestamps), None
+        else:
+            timestamp_ms, timestamp_text = None, encode_strings(timestamps.to_numpy(dtype=object))
+        return cls.from_columns(
+            timestamp_ms, households, codes,
+            df['power_consumption'].to_numpy(dtype=float), df['efficiency'].to_numpy(dtype=float),
+            df['anomaly_detected'].to_numpy(dtype=bool), timestamp_text)
+
+    @classmethod
+    def concat(cls, batches):
+        """Joins batches in order, merging their household tables."""
+        households = {}
+        codes = []
+        for batch in batches:
+            # Map each batch's household indexes to positions in the merged table
+            remap = np.fromiter((households.setdefault(h, len(households)) for h in batch.households),
+                                dtype=np.int32, count=len(batch.households))
+            codes.append(remap[batch.household_index] if len(remap) else batch.household_index)
+
+        def joined(column, dtype):
+            return np.concatenate(column) if column else np.empty(0, dtype)
+
+        # The strings are kept when every batch has them
+        if batches and all(batch.timestamp_text is not None for batch in batches):
+            timestamp_ms, timestamp_text = None, joined([batch.timestamp_text for batch in batches], np.bytes_)
+        else:
+            timestamp_ms, timestamp_text = joined([batch.timestamp_ms for batch in batches], np.int64), None
+        return cls.from_columns(
+            timestamp_ms, list(households),
+            joined(codes, np.int32),
+            joined([batch.power for batch in batches], np.float32),
+            joined([batch.efficiency for batch in batches], np.float32),
+            joined([batch.anomaly_detected for batch in batches], bool),
+            timestamp_text)
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def timestamp_ms(self) -> np.ndarray:
+        # Only columnar reports need milliseconds; strings that are not
+        # ISO-8601 raise ValueError here
+        if self._timestamp_ms is None:
+            self._timestamp_ms = parse_timestamps(decode_strings(self.timestamp_text))
+        return self._timestamp_ms
+
+    @property
+    def anomaly_detected(self) -> np.ndarray:
+        return np.unpackbits(self.anomaly_bits, count=self.rows).astype(bool)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the batch, including the household ID strings."""
+        arrays = (self._timestamp_ms, self.timestamp_text, self.households, self.household_index, self.power,
+                  self.efficiency, self.anomaly_bits)
+        return (sum(array.nbytes for array in arrays if array is not None)
+                + sum(sys.getsizeof(h) for h in self.households))
+
+    def to_frame(self) -> pd.DataFrame:
+        """The reporter's DataFrame (timestamp, household_id, power, efficiency, anomaly_detected)."""
+        if self.timestamp_text is not None:
+            timestamps = decode_strings(self.timestamp_text)
+        else:
+            timestamps = format_timestamps(self.timestamp_ms)
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'household_id': self.households[self.household_index] if self.rows else np.empty(0, dtype=object),
+            'power': self.power,
+            'efficiency': self.efficiency,
+            'anomaly_detected': self.anomaly_detected,
+        })
+
+    def processed_report_bytes(self) -> bytes:
+        """
+        Encodes the batch as a serialized ProcessedDataReport: the bytes
+        protobuf writes for the same records, assembled with array operations.
+        """
+        unit = timestamp_unit(self.timestamp_ms) if self.timestamp_text is None else None
+        household_bytes = np.char.encode(self.households.astype(str), 'utf-8') if len(self.households) else None
+        table, table_lengths = _padded_strings(household_bytes)
+        anomaly_detected = self.anomaly_detected
+        return b"".join(
+            self._encode_records(first, min(first + ENCODE_BATCH_ROWS, self.rows), unit,
+                                 table, table_lengths, anomaly_detected)
+            for first in range(0, self.rows, ENCODE_BATCH_ROWS))
+
+    def _encode_records(self, first, last, unit, table, table_lengths, anomaly_detected) -> bytes:
+        # Every record is a sequence of parts, each given as (its length per
+        # record, a function returning the part's bytes for records 'rows' as a
+        # (len(rows), length) array). A length of 0 leaves the part out, as
+        # proto3 does for empty strings, zero floats and false booleans.
+        count = last - first
+
+        def constant(value: bytes, present):
+            return present * len(value), lambda rows, width: np.frombuffer(value, dtype=np.uint8)
+
+        def varints(values, present):
+            encoded, lengths = encode_varints(values)
+            return lengths * present, lambda rows, width: encoded[rows, :width]
+
+        def string_field(tag, lengths, source):
+            present = (lengths > 0).astype(np.int64)
+            return [constant(bytes([tag]), present), varints(lengths, present), (lengths, source)]
+
+        def float_field(tag, raw, present):
+            return [constant(bytes([tag]), present), (present * 4, lambda rows, width: raw[rows])]
+
+        def float_bytes(values):
+            # Only floats whose bits are all zero are left out (0.0, but not -0.0)
+            raw = values.astype('<f4').view(np.uint8).reshape(-1, 4)
+            return raw, raw.any(axis=1).astype(np.int64)
+
+        if self.timestamp_text is not None:
+            timestamps, timestamp_lengths = _padded_strings(self.timestamp_text[first:last])
+        else:
+            timestamps, timestamp_lengths = _timestamp_bytes(self.timestamp_ms[first:last], unit)
+        codes = self.household_index[first:last]
+        household_lengths = table_lengths[codes]
+        anomaly = anomaly_detected[first:last].astype(np.int64)
+        power, power_present = float_bytes(self.power[first:last])
+        efficiency, efficiency_present = float_bytes(self.efficiency[first:last])
+        body = (
+            string_field(_TIMESTAMP_TAG, timestamp_lengths, lambda rows, width: timestamps[rows, :width])
+            + string_field(_HOUSEHOLD_TAG, household_lengths, lambda rows, width: table[codes[rows], :width])
+            + float_field(_POWER_TAG, power, power_present)
+            + float_field(_EFFICIENCY_TAG, efficiency, efficiency_present)
+            + [constant(_ANOMALY_FIELD, anomaly)]
+        )
+        everywhere = np.ones(count, dtype=np.int64)
+        body_lengths = sum(lengths for lengths, _ in body)
+        parts = [constant(bytes([_RECORD_TAG]), everywhere), varints(body_lengths, everywhere)] + body
+        record_lengths = sum(lengths for lengths, _ in parts)
+        # One zero-padded row per record; the padding is dropped at the end
+        records = np.empty((count, int(record_lengths.max(initial=0))), dtype=np.uint8)
+
+        # The string lengths and the present optional fields fix the lengths of
+        # all parts. Records with the same ones share a layout, so each layout's
+        # records are filled one column block per part.
+        layout_key = timestamp_lengths * (int(household_lengths.max(initial=0)) + 1) + household_lengths
+        for present in (power_present, efficiency_present, anomaly):
+            layout_key = layout_key * 2 + present
+        _, first_rows, layouts = np.unique(layout_key, return_index=True, return_inverse=True)
+        order = np.argsort(layouts, kind='stable')
+        bounds = np.searchsorted(layouts[order], np.arange(len(first_rows) + 1))
+        for layout, example in enumerate(first_rows.tolist()):
+            rows = order[bounds[layout]:bounds[layout + 1]]
+            widths = [int(lengths[example]) for lengths, _ in parts]
+            matrix = np.empty((len(rows), sum(widths)), dtype=np.uint8)
+            column = 0
+            for width, (_, source) in zip(widths, parts):
+                if width:
+                    matrix[:, column:column + width] = source(rows, width)
+                    column += width
+            records[rows, :column] = matrix
+        return records[np.arange(records.shape[1]) < record_lengths[:, None]].tobytes()
+
+    def columnar_report_bytes(self) -> bytes:
+        """Encodes the batch as a serialized ColumnarDataReport (without the EPC1 magic)."""
+        out = [b"".join(b"\x0a" + encode_varint(len(data)) + data
+                        for data in (household.encode() for household in self.households.tolist()))]
+        packed = (
+            (2, packed_varints(self.household_index)),
+            (3, packed_varints(self.timestamp_ms)),
+            (4, self.power.astype('<f4').view(np.uint8)),
+            (5, self.efficiency.astype('<f4').view(np.uint8)),
+            # Packed bools are one 0/1 byte each
+            (6, self.anomaly_detected.view(np.uint8)),
+        )
+        for field, data in packed:
+            # Empty repeated fields are left out
+            if len(data):
+                out += [bytes([field << 3 | 2]), encode_varint(len(data)), data.tobytes()]
+        return b"".join(out)
+
+    @classmethod
+    def from_processed_records(cls, buffer, body_starts: np.ndarray, body_ends: np.ndarray):
+        """
+        Decodes ProcessedEnergyReport records from their encoded bodies at
+        buffer[body_starts[i]:body_ends[i]].
+
+        All records are parsed together: each step reads the next field of
+        every record that has one left, so the number of steps is the number
+        of fields in a record rather than the number of records.
+        """
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        rows = len(body_starts)
+        position = np.array(body_starts, dtype=np.int64)
+        body_ends = np.asarray(body_ends, dtype=np.int64)
+        if rows and body_ends.max() > len(data):
+            raise ValueError("Truncated record in ProcessedDataReport")
+        strings = {1: [np.zeros(rows, np.int64), np.zeros(rows, np.int64)],
+                   2: [np.zeros(rows, np.int64), np.zeros(rows, np.int64)]}
+        floats = {3: np.zeros(rows, np.float32), 4: np.zeros(rows, np.float32)}
+        anomaly_detected = np.zeros(rows, dtype=bool)
+
+        active = np.flatnonzero(position < body_ends)
+        while len(active):
+            tags, after = read_varints(data, position[active])
+            fields, wire_types = tags >> 3, tags & 7
+            for wire_type in np.flatnonzero(np.bincount(wire_types, minlength=8)).tolist():
+                chosen = np.flatnonzero(wire_types == wire_type)
+                records, field, value_at = active[chosen], fields[chosen], after[chosen]
+                # Later occurrences of a field replace earlier ones, as in protobuf
+                if wire_type == _LENGTH_DELIMITED:
+                    lengths, value_at = read_varints(data, value_at)
+                    for number, (starts, string_lengths) in strings.items():
+                        mine = field == number
+                        starts[records[mine]] = value_at[mine]
+                        string_lengths[records[mine]] = lengths[mine]
+                    after[chosen] = value_at + lengths
+                elif wire_type == _FIXED32:
+                    values = _fixed32_at(data, value_at)
+                    for number, column in floats.items():
+                        mine = field == number
+                        column[records[mine]] = values[mine]
+                    after[chosen] = value_at + 4
+                elif wire_type == _VARINT:
+                    values, after[chosen] = read_varints(data, value_at)
+                    mine = field == 6
+                    anomaly_detected[records[mine]] = values[mine] != 0
+                elif wire_type == _FIXED64:
+                    after[chosen] = value_at + 8
+                else:
+                    raise ValueError(f"Unsupported protobuf wire type {wire_type} in ProcessedDataReport")
+            position[active] = after
+            active = active[after < body_ends[active]]
+        if np.any(position != body_ends):
+            raise ValueError("Truncated record in ProcessedDataReport")
+
+        # The timestamp strings are kept as they are, not parsed
+        timestamps = _padded_bytes(data, *strings[1])
+        timestamp_text = timestamps.view(f"S{timestamps.shape[1]}").ravel()
+        households = _padded_bytes(data, *strings[2])
+        codes, first = _factorize_rows(households)
+        table = [bytes(row[:length]).decode() for row, length in zip(households[first], strings[2][1][first])]
+        return cls.from_columns(None, table, codes, floats[3], floats[4], anomaly_detected, timestamp_text)
+
+
+def encode_varint(value: int) -> bytes:
+    """Encodes a non-negative integer as a protobuf base-128 varint."""
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
@@ -0,0 +1,458 @@
+# src/common/report_codec.py
+# Shared helpers for turning analyzed DataFrames into protobuf report messages
+# and back again.
+
+import numpy as np
+import pandas as pd
+
+from generated import energy_pb2
+from src.common.compression import DecompressingReader, decompressed
+from src.common.payload_io import map_input
+from src.common.record_batch import RecordBatch, encode_varint, format_timestamps, parse_timestamps, read_varints
+
+# Supported on-disk layouts for the analyzer -> reporter hand-off
+ROW_FORMAT = "rows"
+COLUMNAR_FORMAT = "columnar"
+REPORT_FORMATS = (ROW_FORMAT, COLUMNAR_FORMAT)
+
+# Files holding a ColumnarDataReport start with this magic. A serialized
+# ProcessedDataReport can never start with it (it would be field 8, which the
+# message does not have), so readers can detect the format from the content.
+COLUMNAR_MAGIC = b"EPC1"
+
+# Chunked outputs start with this magic, followed by varint length-delimited
+# ReportChunk frames that can be decoded one at a time in bounded memory.
+STREAM_MAGIC = b"EPS1"
+
+# Window rollups (an AggregateReport) start with this magic; like EPC1 it can
+# never begin a ProcessedDataReport
+AGGREGATE_MAGIC = b"EPA1"
+
+REPORT_COLUMNS = ['timestamp', 'household_id', 'power', 'efficiency', 'anomaly_detected']
+
+AGGREGATE_COLUMNS = ['household_id', 'window', 'window_start', 'window_end', 'power_sum', 'efficiency_mean',
+                     'record_count', 'anomaly_count']
+
+# Records decoded at a time when a report is read lazily from a mapped buffer
+REPORT_BATCH_ROWS = 100_000
+
+# Protobuf wire types
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+
+def build_processed_report(df) -> energy_pb2.ProcessedDataReport:
+    """Builds a ProcessedDataReport message from an analyzed DataFrame."""
+    return energy_pb2.ProcessedDataReport.FromString(RecordBatch.from_frame(df).processed_report_bytes())
+
+
+def build_columnar_report(df) -> energy_pb2.ColumnarDataReport:
+    """
+    Builds a ColumnarDataReport: packed numeric columns, epoch-millisecond
+    timestamps and a dictionary-encoded household table.
+    """
+    return energy_pb2.ColumnarDataReport.FromString(RecordBatch.from_frame(df).columnar_report_bytes())
+
+
+def timestamp_strings(timestamps):
+    """Returns the timestamps as the generator's ISO-8601 strings, formatting typed ones."""
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        return pd.Series(format_timestamps(parse_timestamps(timestamps)), index=timestamps.index)
+    return timestamps.astype(str)
+
+
+def to_report_frame(df) -> pd.DataFrame:
+    """Selects the analyzed columns in the reporter's layout, e.g. for Arrow or Parquet outputs."""
+    return pd.DataFrame({
+        'timestamp': df['timestamp'],
+        'household_id': df['household_id'],
+        'power': df['power_consumption'].astype(float),
+        'efficiency': df['efficiency'].astype(float),
+        'anomaly_detected': df['anomaly_detected'].astype(bool),
+    }, columns=REPORT_COLUMNS)
+
+
+def processed_report_to_frame(report_data: energy_pb2.ProcessedDataReport) -> pd.DataFrame:
+    """Converts a row-oriented ProcessedDataReport into the reporter's DataFrame."""
+    # Decoding the wire bytes in bulk is much faster than reading every field
+    # of every record through the message objects
+    return parse_report(report_data.SerializeToString())
+
+
+def columnar_report_to_frame(report_data: energy_pb2.ColumnarDataReport) -> pd.DataFrame:
+    """Converts a ColumnarDataReport into the reporter's DataFrame."""
+    rows = len(report_data.timestamp_ms)
+    return RecordBatch.from_columns(
+        np.fromiter(report_data.timestamp_ms, dtype=np.int64, count=rows), list(report_data.households),
+        np.fromiter(report_data.household_index, dtype=np.int64, count=rows),
+        np.fromiter(report_data.power, dtype=np.float32, count=rows),
+        np.fromiter(report_data.efficiency, dtype=np.float32, count=rows),
+        np.fromiter(report_data.anomaly_detected, dtype=bool, count=rows),
+    ).to_frame()
+
+
+def iter_aggregate_batches(report_data: energy_pb2.AggregateReport, batch_rows: int = REPORT_BATCH_ROWS):
+    """
+    Yields an AggregateReport as DataFrames of AGGREGATE_COLUMNS, one row per
+    household and window, at most 'batch_rows' rows at a time. A report
+    without windows yields one empty DataFrame.
+    """
+    households = np.asarray(list(report_data.households), dtype=object)
+    yielded = False
+    for window in report_data.windows:
+        rows = len(window.window_start_ms)
+        columns = {
+            'household_index': np.fromiter(window.household_index, dtype=np.int64, count=rows),
+            'window_start_ms': np.fromiter(window.window_start_ms, dtype=np.int64, count=rows),
+            'power_sum': np.fromiter(window.power_sum, dtype=np.float64, count=rows),
+            'efficiency_mean': np.fromiter(window.efficiency_mean, dtype=np.float64, count=rows),
+            'record_count': np.fromiter(window.record_count, dtype=np.int64, count=rows),
+            'anomaly_count': np.fromiter(window.anomaly_count, dtype=np.int64, count=rows),
+        }
+        # Window bounds are formatted per batch, so only one batch of strings exists at a time
+        for first in range(0, rows, batch_rows):
+            batch = {field: values[first:first + batch_rows] for field, values in columns.items()}
+            starts = batch['window_start_ms']
+            yield pd.DataFrame({
+                'household_id': households[batch['household_index']],
+                'window': window.name,
+                'window_start': format_timestamps(starts),
+                'window_end': format_timestamps(starts + window.size_ms),
+                'power_sum': batch['power_sum'],
+                'efficiency_mean': batch['efficiency_mean'],
+                'record_count': batch['record_count'],
+                'anomaly_count': batch['anomaly_count'],
+            }, columns=AGGREGATE_COLUMNS)
+            yielded = True
+    if not yielded:
+        yield pd.DataFrame(columns=AGGREGATE_COLUMNS)
+
+
+def aggregate_report_to_frame(report_data: energy_pb2.AggregateReport) -> pd.DataFrame:
+    """Converts a whole AggregateReport into one DataFrame of AGGREGATE_COLUMNS."""
+    rows = sum(len(window.window_start_ms) for window in report_data.windows)
+    return pd.concat(iter_aggregate_batches(report_data, max(rows, 1)), ignore_index=True)
+
+
+def serialize_report(df, report_format: str = ROW_FORMAT) -> bytes:
+    """Encodes an analyzed DataFrame in the requested report format."""
+    if report_format == ROW_FORMAT:
+        return RecordBatch.from_frame(df).processed_report_bytes()
+    if report_format == COLUMNAR_FORMAT:
+        return COLUMNAR_MAGIC + RecordBatch.from_frame(df).columnar_report_bytes()
+    raise ValueError(f"Unknown report_format '{report_format}'. Expected one of {REPORT_FORMATS}")
+
+
+def detect_report_format(data: bytes) -> str:
+    """Tells which report format a serialized analyzer output uses."""
+    if data[:len(COLUMNAR_MAGIC)] == COLUMNAR_MAGIC:
+        return COLUMNAR_FORMAT
+    return ROW_FORMAT
+
+
+def parse_report(data: bytes) -> pd.DataFrame:
+    """Decodes analyzer output in either format into the reporter's DataFrame."""
+    frames = list(iter_report_buffer(data, max(len(data), 1)))
+    if not frames:
+        return RecordBatch.concat([]).to_frame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def read_varint(stream):
+    """Reads one varint from a binary file object; returns None at a clean EOF."""
+    result = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise ValueError("Truncated varint in report stream")
+            return None
+        result |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            return result
+        shift += 7
+
+
+def encode_report_chunk(df, report_format: str = ROW_FORMAT) -> bytes:
+    """Encodes one analyzed chunk as a length-delimited ReportChunk frame."""
+    if report_format == ROW_FORMAT:
+        # ReportChunk field 1 (rows) or 2 (columns), length-delimited
+        tag, body = b"\x0a", RecordBatch.from_frame(df).processed_report_bytes()
+    elif report_format == COLUMNAR_FORMAT:
+        tag, body = b"\x12", RecordBatch.from_frame(df).columnar_report_bytes()
+    else:
+        raise ValueError(f"Unknown report_format '{report_format}'. Expected one of {REPORT_FORMATS}")
+    payload = tag + encode_varint(len(body)) + body
+    return encode_varint(len(payload)) + payload
+
+
+def report_chunk_to_frame(chunk: energy_pb2.ReportChunk) -> pd.DataFrame:
+    """Converts a decoded ReportChunk frame into the reporter's DataFrame."""
+    if chunk.WhichOneof('body') == 'columns':
+        return columnar_report_to_frame(chunk.columns)
+    return processed_report_to_frame(chunk.rows)
+
+
+def iter_report_frames(stream):
+    """Yields one DataFrame per ReportChunk frame from a stream positioned after STREAM_MAGIC."""
+    while True:
+        size = read_varint(stream)
+        if size is None:
+            return
+        payload = stream.read(size)
+        if len(payload) != size:
+            raise ValueError("Truncated ReportChunk frame in report stream")
+        chunk = energy_pb2.ReportChunk()
+        chunk.ParseFromString(payload)
+        yield report_chunk_to_frame(chunk)
+
+
+def _read_varint_at(buffer, pos: int):
+    # Returns (value, position after the varint) for the varint at buffer[pos]
+    result = 0
+    shift = 0
+    try:
+        while True:
+            byte = buffer[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result, pos
+            shift += 7
+    except IndexError:
+        raise ValueError("Truncated varint in report") from None
+
+
+def _skip_field(buffer, pos: int, wire_type: int) -> int:
+    # Returns the position after the value of a field whose tag ends at 'pos'
+    if wire_type == _VARINT:
+        return _read_varint_at(buffer, pos)[1]
+    if wire_type == _LENGTH_DELIMITED:
+        length, pos = _read_varint_at(buffer, pos)
+        return pos + length
+    if wire_type == _FIXED64:
+        return pos + 8
+    if wire_type == _FIXED32:
+        return pos + 4
+    raise ValueError(f"Unsupported protobuf wire type {wire_type} in report")
+
+
+def _decode_varints(data: np.ndarray) -> np.ndarray:
+    """Decodes packed varint bytes (a uint8 array) into int64 values, vectorized."""
+    ends = np.flatnonzero(data < 0x80)
+    if len(data) and (not len(ends) or ends[-1] != len(data) - 1):
+        raise ValueError("Truncated packed varints in report")
+    if len(ends) == len(data):
+        # Every value fits in one byte
+        return data.astype(np.int64)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    shifts = (np.arange(len(data)) - np.repeat(starts, lengths)).astype(np.uint64) * np.uint64(7)
+    values = (data & 0x7F).astype(np.uint64) << shifts
+    # The 7-bit groups never overlap, so adding them up is the same as or-ing them;
+    # negative numbers come out of the uint64 -> int64 cast in two's complement
+    return np.add.reduceat(values, starts).astype(np.int64)
+
+
+def iter_row_batches(buffer, start: int, end: int, batch_rows: int = REPORT_BATCH_ROWS):
+    """Yields the ProcessedDataReport stored in buffer[start:end] as DataFrames of at most 'batch_rows' records."""
+    for batch in iter_row_record_batches(buffer, start, end, batch_rows):
+        yield batch.to_frame()
+
+
+def iter_row_record_batches(buffer, start: int, end: int, batch_rows: int = REPORT_BATCH_ROWS):
+    """
+    Yields the ProcessedDataReport stored in buffer[start:end] as RecordBatches
+    of at most 'batch_rows' records.
+
+    Only record boundaries are scanned here; the records of each batch are then
+    decoded together by RecordBatch.from_processed_records(), so no message
+    objects are created and only one batch of decoded records exists at a time.
+    """
+    pos = start
+    record_starts = []
+    append = record_starts.append
+    while pos < end:
+        # Records are field 1 with a one-byte tag (0x0A) and, being small, almost
+        # always a one-byte length
+        if buffer[pos] == 0x0A and pos + 1 < end and buffer[pos + 1] < 0x80:
+            append(pos)
+            pos += 2 + buffer[pos + 1]
+        else:
+            tag, pos = _read_varint_at(buffer, pos)
+            if tag == 0x0A:
+                append(pos - 1)
+            pos = _skip_field(buffer, pos, tag & 7)
+        if len(record_starts) == batch_rows:
+            yield _row_record_batch(buffer, record_starts, end)
+            record_starts = []
+            append = record_starts.append
+    if pos > end:
+        raise ValueError("Truncated record in ProcessedDataReport")
+    if record_starts:
+        yield _row_record_batch(buffer, record_starts, end)
+
+
+def _row_record_batch(buffer, record_starts, end: int) -> RecordBatch:
+    # Decodes the records whose 0x0A tags are at 'record_starts'
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    lengths, body_starts = read_varints(data, np.array(record_starts, dtype=np.int64) + 1)
+    body_ends = body_starts + lengths
+    if body_ends[-1] > end:
+        raise ValueError("Truncated record in ProcessedDataReport")
+    return RecordBatch.from_processed_records(data, body_starts, body_ends)
+
+
+def iter_columnar_batches(buffer, start: int, end: int, batch_rows: int = REPORT_BATCH_ROWS):
+    """
+    Yields the ColumnarDataReport stored in buffer[start:end] as DataFrames of
+    at most 'batch_rows' rows.
+
+    The packed columns are decoded with NumPy straight from the buffer, batch
+    by batch, instead of materializing the message first.
+    """
+    households = []
+    segments = {2: [], 3: [], 4: [], 5: [], 6: []}
+    pos = start
+    while pos < end:
+        tag, pos = _read_varint_at(buffer, pos)
+        field, wire_type = tag >> 3, tag & 7
+        if wire_type != _LENGTH_DELIMITED:
+            if field in segments:
+                # Unpacked repeated values are valid protobuf but never written
+                # by the analyzer; leave them to the protobuf parser
+                yield columnar_report_to_frame(_parse_columnar(buffer[start:end]))
+                return
+            pos = _skip_field(buffer, pos, wire_type)
+            continue
+        length, pos = _read_varint_at(buffer, pos)
+        if field == 1:
+            households.append(bytes(buffer[pos:pos + length]).decode())
+        elif field in segments:
+            segments[field].append((pos, length))
+        pos += length
+    if pos > end:
+        raise ValueError("Truncated ColumnarDataReport")
+
+    columns = {}
+    for field, parts in segments.items():
+        views = [np.frombuffer(buffer, dtype=np.uint8, count=length, offset=offset) for offset, length in parts]
+        columns[field] = views[0] if len(views) == 1 else np.concatenate(views) if views else np.empty(0, np.uint8)
+    timestamp_bytes, index_bytes = columns[3], columns[2]
+    timestamp_ends = np.flatnonzero(timestamp_bytes < 0x80)
+    index_ends = np.flatnonzero(index_bytes < 0x80)
+    power = columns[4].view('<f4')
+    efficiency = columns[5].view('<f4')
+    # Packed bools are always one 0/1 byte each
+    anomaly_detected = columns[6]
+    rows = len(timestamp_ends)
+    if not rows == len(index_ends) == len(power) == len(efficiency) == len(anomaly_detected):
+        raise ValueError("ColumnarDataReport columns have different lengths")
+
+    for first in range(0, rows, batch_rows):
+        last = min(first + batch_rows, rows)
+        yield RecordBatch.from_columns(
+            _decode_varints(_varint_slice(timestamp_bytes, timestamp_ends, first, last)), households,
+            _decode_varints(_varint_slice(index_bytes, index_ends, first, last)),
+            power[first:last], efficiency[first:last], anomaly_detected[first:last]).to_frame()
+
+
+def _varint_slice(data: np.ndarray, ends: np.ndarray, first: int, last: int) -> np.ndarray:
+    # Bytes of the packed varints with indices [first, last)
+    return data[ends[first - 1] + 1 if first else 0:ends[last - 1] + 1]
+
+
+def _parse_columnar(data) -> energy_pb2.ColumnarDataReport:
+    report_data = energy_pb2.ColumnarDataReport()
+    report_data.ParseFromString(data)
+    return report_data
+
+
+def iter_stream_batches(buffer, start: int, batch_rows: int = REPORT_BATCH_ROWS):
+    """
+    Yields the ReportChunk frames of a chunked (EPS1) report as DataFrames,
+    starting at the frame at buffer[start] (after STREAM_MAGIC).
+    """
+    end = len(buffer)
+    pos = start
+    while pos < end:
+        size, pos = _read_varint_at(buffer, pos)
+        frame_end = pos + size
+        if frame_end > end:
+            raise ValueError("Truncated ReportChunk frame in report stream")
+        # The frame holds one field: 1 for row-layout bodies, 2 for columnar ones
+        while pos < frame_end:
+            tag, pos = _read_varint_at(buffer, pos)
+            if tag & 7 != _LENGTH_DELIMITED:
+                pos = _skip_field(buffer, pos, tag & 7)
+                continue
+            length, pos = _read_varint_at(buffer, pos)
+            if tag >> 3 == 1:
+                yield from iter_row_batches(buffer, pos, pos + length, batch_rows)
+            elif tag >> 3 == 2:
+                yield from iter_columnar_batches(buffer, pos, pos + length, batch_rows)
+            pos += length
+        pos = frame_end
+
+
+def iter_report_buffer(buffer, batch_rows: int = REPORT_BATCH_ROWS):
+    """
+    Yields a serialized analyzer output of any layout as DataFrames of at most
+    'batch_rows' rows. Window rollups come back as DataFrames of AGGREGATE_COLUMNS.
+    """
+    head = bytes(buffer[:len(STREAM_MAGIC)])
+    if head == AGGREGATE_MAGIC:
+        report_data = energy_pb2.AggregateReport()
+        report_data.ParseFromString(buffer[len(AGGREGATE_MAGIC):])
+        return iter_aggregate_batches(report_data, batch_rows)
+    if head == STREAM_MAGIC:
+        return iter_stream_batches(buffer, len(STREAM_MAGIC), batch_rows)
+    if head == COLUMNAR_MAGIC:
+        return iter_columnar_batches(buffer, len(COLUMNAR_MAGIC), len(buffer), batch_rows)
+    return iter_row_batches(buffer, 0, len(buffer), batch_rows)
+
+
+def iter_report_stream(stream):
+    """
+    Yields the analyzer output read from a binary file object as DataFrames.
+
+    Files are memory-mapped and decoded lazily in batches of REPORT_BATCH_ROWS
+    records, whatever their layout, so the raw bytes are never copied into
+    memory as a whole and only one batch of decoded rows exists at a time.
+    Compressed files cannot be mapped and are read like a pipe instead.
+    """
+    if isinstance(stream, DecompressingReader):
+        yield from iter_report_pipe(stream)
+        return
+    yield from iter_report_buffer(map_input(stream))
+
+
+def iter_report_pipe(stream):
+    """
+    Yields the analyzer output read front to back from a stream that cannot
+    be mapped: a file that is still being written (payload_io.PipeReader) or
+    a compressed one (compression.DecompressingReader). Chunked (EPS1)
+    reports are decoded frame by frame as they arrive; other layouts are one
+    message and are decoded once complete.
+    """
+    head = stream.read(len(STREAM_MAGIC))
+    if head != STREAM_MAGIC:
+        yield from iter_report_buffer(head + stream.read())
+        return
+    while True:
+        size = read_varint(stream)
+        if size is None:
+            return
+        frame = stream.read(size)
+        if len(frame) != size:
+            raise ValueError("Truncated ReportChunk frame in report stream")
+        yield from iter_stream_batches(encode_varint(size) + frame, 0)
+
+
+def iter_report_file(path: str):
+    """Yields the analyzer output stored at 'path', compressed or not, as DataFrames."""
+    with open(path, "rb") as f:
+        yield from iter_report_stream(decompressed(f))
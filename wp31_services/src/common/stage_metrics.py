@@ -0,0 +1,213 @@
+# src/common/stage_metrics.py
+# Per-RPC stage metrics (duration, rows, bytes, peak RSS), kept in memory and
+# exposed as Prometheus text on a small HTTP endpoint next to the gRPC port.
+
+import logging
+import os
+import resource
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+# The metrics endpoint listens on the gRPC port + this offset unless METRICS_PORT
+# is set ("0" turns it off)
+METRICS_PORT_OFFSET = 1000
+
+# Upper bounds (seconds) of the RPC duration histogram buckets
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# How often the process RSS is sampled while RPCs are running
+RSS_SAMPLE_SECONDS = 0.02
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def current_rss() -> int:
+    """Returns the process's resident set size in bytes."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # No /proc (e.g. macOS): fall back to the lifetime peak, which ru_maxrss
+        # reports in kilobytes on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class RssSampler:
+    """
+    Tracks the peak RSS of the process while each call is in flight.
+
+    RSS is per process, so concurrent calls see each other's memory; with the
+    usual one-request-at-a-time pipeline the peak is the call's own.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._active = {}
+        self._next_token = 0
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def begin(self) -> int:
+        rss = current_rss()
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._active[token] = rss
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return token
+
+    def end(self, token: int) -> int:
+        rss = current_rss()
+        with self._lock:
+            return max(self._active.pop(token), rss)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                idle = not self._active
+            if idle:
+                # Sleep until the next call starts instead of polling forever
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            rss = current_rss()
+            with self._lock:
+                for token, peak in self._active.items():
+                    if rss > peak:
+                        self._active[token] = rss
+            time.sleep(self._interval)
+
+
+class StageMetrics:
+    """Thread-safe counters of one service's RPCs, rendered as Prometheus text."""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.rss = RssSampler()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._calls = {}
+
+    def call_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def record(self, method: str, status: str, duration: float, rows: int,
+               bytes_read: int, bytes_written: int, peak_rss: int):
+        """Adds one finished RPC."""
+        with self._lock:
+            self._in_flight -= 1
+            key = (method, status)
+            totals = self._calls.get(key)
+            if totals is None:
+                totals = self._calls[key] = {
+                    "count": 0, "duration_sum": 0.0, "buckets": [0] * len(DURATION_BUCKETS),
+                    "rows": 0, "bytes_read": 0, "bytes_written": 0, "peak_rss": 0, "last_peak_rss": 0,
+                }
+            totals["count"] += 1
+            totals["duration_sum"] += duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    totals["buckets"][i] += 1
+            totals["rows"] += rows
+            totals["bytes_read"] += bytes_read
+            totals["bytes_written"] += bytes_written
+            totals["peak_rss"] = max(totals["peak_rss"], peak_rss)
+            totals["last_peak_rss"] = peak_rss
+
+    def snapshot(self) -> dict:
+        """Returns {(method, status): totals} and the number of RPCs in flight."""
+        with self._lock:
+            calls = {key: dict(totals, buckets=list(totals["buckets"])) for key, totals in self._calls.items()}
+            return {"calls": calls, "in_flight": self._in_flight}
+
+    def render(self) -> str:
+        """Formats the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(method, status, **extra):
+            pairs = [("service", self.service), ("method", method), ("status", status)] + list(extra.items())
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        calls = sorted(snapshot["calls"].items())
+        family("stage_rpc_duration_seconds", "histogram", "Duration of stage RPCs.")
+        for (method, status), totals in calls:
+            for bound, count in zip(DURATION_BUCKETS, totals["buckets"]):
+                lines.append(f"stage_rpc_duration_seconds_bucket{labels(method, status, le=bound)} {count}")
+            lines.append(f"stage_rpc_duration_seconds_bucket{labels(method, status, le='+Inf')} {totals['count']}")
+            lines.append(f"stage_rpc_duration_seconds_sum{labels(method, status)} {totals['duration_sum']:.6f}")
+            lines.append(f"stage_rpc_duration_seconds_count{labels(method, status)} {totals['count']}")
+        for name, field, help_text in (
+                ("stage_rows_processed_total", "rows", "Rows produced by stage RPCs."),
+                ("stage_bytes_read_total", "bytes_read", "Input bytes (files and payloads) of stage RPCs."),
+                ("stage_bytes_written_total", "bytes_written", "Output bytes (files and payloads) of stage RPCs.")):
+            family(name, "counter", help_text)
+            for (method, status), totals in calls:
+                lines.append(f"{name}{labels(method, status)} {totals[field]}")
+        for name, field, help_text in (
+                ("stage_rpc_peak_rss_bytes", "peak_rss", "Highest process RSS seen during any stage RPC."),
+                ("stage_rpc_last_peak_rss_bytes", "last_peak_rss", "Process RSS peak during the latest stage RPC.")):
+            family(name, "gauge", help_text)
+            for (method, status), totals in calls:
+                lines.append(f"{name}{labels(method, status)} {totals[field]}")
+        family("stage_rpc_in_flight", "gauge", "Stage RPCs currently running.")
+        lines.append(f'stage_rpc_in_flight{{service="{self.service}"}} {snapshot["in_flight"]}')
+        family("process_resident_memory_bytes", "gauge", "Resident memory size in bytes.")
+        lines.append(f'process_resident_memory_bytes{{service="{self.service}"}} {current_rss()}')
+        return "\n".join(lines) + "\n"
+
+
+def resolve_metrics_port(grpc_port: int) -> int:
+    """Returns the metrics port for a service on 'grpc_port'; 0 means disabled."""
+    value = os.environ.get("METRICS_PORT")
+    if value is None:
+        return grpc_port + METRICS_PORT_OFFSET
+    return int(value)
+
+
+def start_metrics_server(port: int, metrics: StageMetrics):
+    """Serves GET /metrics on 'port' from a daemon thread; returns the server, or None when disabled."""
+    if not port:
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes are frequent; keep them out of the service log
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("", port), MetricsHandler)
+    except OSError as e:
+        log.warning(f"Metrics endpoint disabled: cannot listen on :{port} ({e})")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    log.info(f"Prometheus metrics for {metrics.service} on :{port}/metrics")
+    return server
@@ -0,0 +1,106 @@
+# src/common/startup.py
+# Cold start of the stage services. The gRPC server, health service and
+# metrics endpoint only need grpc and protobuf. The stage code (pandas, NumPy,
+# pyarrow, the codecs) takes most of a service's start-up time, so each
+# server.py loads it through a StageLoader: before the server starts listening
+# (STARTUP_MODE=eager, the default) or in a warm-up thread afterwards
+# (STARTUP_MODE=lazy). Health reports NOT_SERVING until the stage is loaded;
+# calls that arrive earlier wait for it instead of failing.
+
+import logging
+import os
+import threading
+import time
+
+import grpc
+from generated import energy_pb2_grpc
+from grpc_health.v1 import health_pb2
+
+log = logging.getLogger(__name__)
+
+EAGER_STARTUP = "eager"
+LAZY_STARTUP = "lazy"
+STARTUP_MODES = (EAGER_STARTUP, LAZY_STARTUP)
+
+
+def startup_mode() -> str:
+    """When a service loads its stage: STARTUP_MODE, 'eager' (default) or 'lazy'."""
+    mode = os.environ.get("STARTUP_MODE", EAGER_STARTUP)
+    if mode not in STARTUP_MODES:
+        raise ValueError(f"STARTUP_MODE must be one of {STARTUP_MODES}, got '{mode}'")
+    return mode
+
+
+def warmup_enabled() -> bool:
+    """Whether a tiny request runs through the stage before it reports SERVING (WARMUP_REQUEST)."""
+    return os.environ.get("WARMUP_REQUEST", "").lower() in ("1", "true", "yes")
+
+
+class StageLoader:
+    """
+    Loads a service's stage once and reports it on the health service.
+
+    'load' imports the stage module and returns its servicer. With
+    WARMUP_REQUEST set, the servicer's warm_up() then runs a tiny in-memory
+    request, so the first real call does not pay for first-use setup either.
+    """
+
+    def __init__(self, name: str, load, health_servicer):
+        self.name = name
+        self._load = load
+        self._health = health_servicer
+        self._ready = threading.Event()
+        self._servicer = None
+        self._error = None
+        self.load_seconds = None
+
+    def start(self):
+        """Loads the stage now (eager) or in a background thread (lazy)."""
+        self._health.set("", health_pb2.HealthCheckResponse.NOT_SERVING)
+        if startup_mode() == LAZY_STARTUP:
+            threading.Thread(target=self._run, name="stage-warmup", daemon=True).start()
+        else:
+            self._run()
+            if self._error is not None:
+                raise self._error
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            servicer = self._load()
+            if warmup_enabled():
+                servicer.warm_up()
+        except Exception as e:
+            log.error(f"[{self.name}] Failed to load the stage: {e}", exc_info=True)
+            self._error = e
+            self._ready.set()
+            return
+        self.load_seconds = time.perf_counter() - started
+        self._servicer = servicer
+        self._ready.set()
+        self._health.set("", health_pb2.HealthCheckResponse.SERVING)
+        log.info(f"[{self.name}] Stage loaded in {self.load_seconds:.3f}s"
+                 f"{' including the warm-up request' if warmup_enabled() else ''}; serving")
+
+    def servicer(self, context):
+        """Returns the loaded servicer, waiting for it if the stage is still loading."""
+        self._ready.wait()
+        if self._servicer is None:
+            context.abort(grpc.StatusCode.UNAVAILABLE, f"{self.name} stage failed to load: {self._error}")
+        return self._servicer
+
+
+class StageServicer(energy_pb2_grpc.ContainerExecutorServicer):
+    """Registered in place of a service's servicer; forwards every call to the loaded stage."""
+
+    def __init__(self, stage: StageLoader):
+        self._stage = stage
+
+    def Execute(self, request, context):
+        return self._stage.servicer(context).Execute(request, context)
+
+    def ExecuteStream(self, request, context):
+        return self._stage.servicer(context).ExecuteStream(request, context)
+
+    def ExecuteBatch(self, request, context):
+        return self._stage.servicer(context).ExecuteBatch(request, context)
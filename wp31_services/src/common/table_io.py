@@ -0,0 +1,196 @@
+# src/common/table_io.py
+# Optional Apache Arrow IPC and Parquet inputs/outputs for the stages. CSV and
+# the protobuf reports stay the defaults; pyarrow is only imported when a
+# stage actually reads or writes one of these formats, and pandas when it
+# parses a CSV input, so the generator never imports either for a CSV output.
+
+import io
+import os
+
+from src.common.compression import strip_compression_extension
+from src.common.payload_io import is_piped
+
+CSV_FORMAT = "csv"
+ARROW_FORMAT = "arrow"
+PARQUET_FORMAT = "parquet"
+TABLE_FORMATS = (CSV_FORMAT, ARROW_FORMAT, PARQUET_FORMAT)
+
+# Arrow IPC files start with "ARROW1", Parquet files with "PAR1"
+ARROW_MAGIC = b"ARROW1"
+PARQUET_MAGIC = b"PAR1"
+
+_EXTENSIONS = {
+    ".csv": CSV_FORMAT,
+    ".arrow": ARROW_FORMAT,
+    ".feather": ARROW_FORMAT,
+    ".ipc": ARROW_FORMAT,
+    ".parquet": PARQUET_FORMAT,
+    ".pq": PARQUET_FORMAT,
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Arrow and Parquet stage formats need the optional 'pyarrow' package") from e
+    return pyarrow
+
+
+def output_format(request, default=None):
+    """
+    Returns the output format of a stage: the 'output_format' parameter, else
+    the output file's extension (before any .gz / .zst / .lz4), else 'default'.
+    """
+    fmt = request.parameters.get("output_format")
+    if fmt is None and not request.return_payload:
+        path = strip_compression_extension(request.output_file)
+        fmt = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    fmt = fmt or default
+    if fmt is not None and fmt not in TABLE_FORMATS:
+        raise ValueError(f"Unknown output_format '{fmt}'. Expected one of {TABLE_FORMATS}")
+    return fmt
+
+
+def detect_input_format(source) -> str:
+    """Tells from its first bytes whether a binary input is Arrow IPC, Parquet or something else (CSV)."""
+    position = source.tell()
+    head = source.read(len(ARROW_MAGIC))
+    source.seek(position)
+    if head == ARROW_MAGIC:
+        return ARROW_FORMAT
+    if head[:len(PARQUET_MAGIC)] == PARQUET_MAGIC:
+        return PARQUET_FORMAT
+    return CSV_FORMAT
+
+
+def _native_input(source):
+    # Files on disk are memory-mapped and in-memory payloads wrapped without a
+    # copy, so only the pages of the projected columns are ever touched. A piped
+    # input has no footer until its producer is done, so it is read whole (the
+    # read blocks until the marker says done) instead of mapped while it grows.
+    pa = _pyarrow()
+    if isinstance(source, io.BytesIO):
+        return pa.BufferReader(pa.py_buffer(source.getbuffer()))
+    name = getattr(source, "name", None)
+    if isinstance(name, str) and os.path.isfile(name) and not is_piped(source):
+        return pa.memory_map(name, "r")
+    return pa.BufferReader(source.read())
+
+
+def iter_table_frames(source, columns=None, chunk_rows=None):
+    """
+    Yields an Arrow IPC or Parquet input as DataFrames holding only 'columns'.
+
+    Arrow files are read record batch by record batch (sliced to 'chunk_rows'
+    when given); Parquet files by row groups of at most 'chunk_rows' rows.
+    Without 'chunk_rows' the whole table is yielded at once.
+    """
+    pa = _pyarrow()
+    fmt = detect_input_format(source)
+    native = _native_input(source)
+    if fmt == PARQUET_FORMAT:
+        parquet_file = pa.parquet.ParquetFile(native)
+        if chunk_rows is None:
+            yield parquet_file.read(columns=columns).to_pandas()
+            return
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+    if fmt != ARROW_FORMAT:
+        raise ValueError("Input is neither an Arrow IPC file nor a Parquet file")
+
+    reader = pa.ipc.open_file(native)
+    if chunk_rows is None:
+        table = reader.read_all()
+        yield (table.select(columns) if columns else table).to_pandas()
+        return
+    for index in range(reader.num_record_batches):
+        batch = reader.get_batch(index)
+        if columns:
+            batch = batch.select(columns)
+        for offset in range(0, batch.num_rows, chunk_rows):
+            yield batch.slice(offset, chunk_rows).to_pandas()
+
+
+def table_column_names(source):
+    """Returns the column names of an Arrow IPC or Parquet input and rewinds the source."""
+    pa = _pyarrow()
+    fmt = detect_input_format(source)
+    position = source.tell()
+    try:
+        native = _native_input(source)
+        if fmt == PARQUET_FORMAT:
+            return pa.parquet.ParquetFile(native).schema_arrow.names
+        return pa.ipc.open_file(native).schema.names
+    finally:
+        source.seek(position)
+
+
+def iter_input_frames(source, columns=None, chunk_rows=None):
+    """
+    Yields a stage input as DataFrames, whatever its format: CSV is parsed with
+    pd.read_csv (in chunks of 'chunk_rows' when given), Arrow IPC and Parquet
+    are read with only 'columns' projected.
+    """
+    import pandas as pd
+
+    if detect_input_format(source) != CSV_FORMAT:
+        yield from iter_table_frames(source, columns, chunk_rows)
+    elif chunk_rows is None:
+        yield pd.read_csv(source)
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_rows)
+
+
+def count_table_rows(source) -> int:
+    """Returns the number of rows of an Arrow IPC or Parquet input from its metadata."""
+    pa = _pyarrow()
+    fmt = detect_input_format(source)
+    native = _native_input(source)
+    if fmt == PARQUET_FORMAT:
+        return pa.parquet.ParquetFile(native).metadata.num_rows
+    reader = pa.ipc.open_file(native)
+    return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+class TableWriter:
+    """
+    Writes DataFrames or record batches one after the other as a single Arrow
+    IPC file (one record batch each) or Parquet file (one row group each).
+    The schema is taken from the first write.
+    """
+
+    def __init__(self, sink, fmt: str):
+        if fmt not in (ARROW_FORMAT, PARQUET_FORMAT):
+            raise ValueError(f"TableWriter writes '{ARROW_FORMAT}' or '{PARQUET_FORMAT}', not '{fmt}'")
+        self._pa = _pyarrow()
+        self._sink = sink
+        self._fmt = fmt
+        self._writer = None
+        self._schema = None
+
+    def write(self, data):
+        pa = self._pa
+        if isinstance(data, pa.RecordBatch):
+            table = pa.Table.from_batches([data])
+        else:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self._fmt == ARROW_FORMAT:
+                self._writer = pa.ipc.new_file(self._sink, table.schema)
+            else:
+                self._writer = pa.parquet.ParquetWriter(self._sink, table.schema)
+        else:
+            table = table.cast(self._schema)
+        self._writer.write_table(table)
+
+    def close(self, empty_frame=None):
+        # A stage that produced no rows still writes a valid, empty file
+        if self._writer is None and empty_frame is not None:
+            self.write(empty_frame)
+        if self._writer is not None:
+            self._writer.close()
@@ -0,0 +1,11 @@
+# tests/conftest.py
+# The services import 'generated' and 'src' from wp31_services, and the
+# generated gRPC module imports energy_pb2 as a top-level module, like the
+# servers do with PYTHONPATH=.:generated.
+
+import os
+import sys
+
+SERVICES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(SERVICES_DIR, "generated"))
+sys.path.insert(0, SERVICES_DIR)
@@ -0,0 +1,72 @@
+# tests/test_grpc_logging.py
+
+from concurrent import futures
+
+import grpc
+import pytest
+
+from generated import energy_pb2, energy_pb2_grpc
+from report_generator.stage import ContainerExecutorServicer
+from src.common.grpc_logging import (BYTES_READ_KEY, BYTES_WRITTEN_KEY, DURATION_KEY, PEAK_RSS_KEY, ROWS_KEY,
+                                     ServerLoggingInterceptor)
+from src.common.stage_metrics import StageMetrics
+from test_report_generator import report_bytes
+
+RECORDS = [("2025-01-01T00:00:00Z", "H1", 10.0), ("2025-01-01T00:00:01Z", "H2", 20.0)]
+
+
+@pytest.fixture
+def reporter():
+    # The reporter stage behind the interceptor, on a free local port
+    metrics = StageMetrics("reporter")
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2), interceptors=[ServerLoggingInterceptor(metrics)])
+    energy_pb2_grpc.add_ContainerExecutorServicer_to_server(ContainerExecutorServicer(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    yield energy_pb2_grpc.ContainerExecutorStub(channel), metrics
+    channel.close()
+    server.stop(None)
+
+
+def test_unary_call_carries_its_metrics_as_trailing_metadata(tmp_path, reporter):
+    stub, metrics = reporter
+    input_path, output_path = tmp_path / "analysis.pb", tmp_path / "report.csv"
+    input_path.write_bytes(report_bytes(RECORDS))
+    request = energy_pb2.ExecuteRequest(input_file=str(input_path), output_file=str(output_path))
+
+    response, call = stub.Execute.with_call(request, timeout=30)
+    metadata = dict(call.trailing_metadata())
+
+    assert response.success, response.message
+    assert metadata[ROWS_KEY] == "2"
+    assert metadata[BYTES_READ_KEY] == str(input_path.stat().st_size)
+    assert metadata[BYTES_WRITTEN_KEY] == str(output_path.stat().st_size)
+    assert float(metadata[DURATION_KEY]) > 0
+    assert int(metadata[PEAK_RSS_KEY]) > 0
+    assert metrics.snapshot()["calls"][("Execute", "ok")]["rows"] == 2
+
+
+def test_streaming_call_is_measured_by_its_final_message(reporter):
+    stub, _ = reporter
+    request = energy_pb2.ExecuteRequest(input_payload=report_bytes(RECORDS), return_payload=True)
+
+    call = stub.ExecuteStream(request, timeout=30)
+    steps = list(call)
+    metadata = dict(call.trailing_metadata())
+
+    assert steps[-1].done and steps[-1].success, steps[-1].message
+    assert metadata[ROWS_KEY] == "2"
+    assert metadata[BYTES_READ_KEY] == str(len(request.input_payload))
+    assert metadata[BYTES_WRITTEN_KEY] == str(len(steps[-1].output_payload))
+
+
+def test_failed_call_reports_no_bytes_written(tmp_path, reporter):
+    stub, metrics = reporter
+    request = energy_pb2.ExecuteRequest(input_file=str(tmp_path / "missing.pb"), output_file=str(tmp_path / "r.csv"))
+
+    response, call = stub.Execute.with_call(request, timeout=30)
+
+    assert not response.success
+    assert dict(call.trailing_metadata())[BYTES_WRITTEN_KEY] == "0"
+    assert ("Execute", "error") in metrics.snapshot()["calls"]
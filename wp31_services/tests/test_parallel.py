@@ -0,0 +1,47 @@
+# tests/test_parallel.py
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.parallel import AnalysisPool, csv_byte_ranges
+from energy_analyzer.stage import analyze_frame
+from generated import energy_pb2
+from src.common.report_codec import COLUMNAR_FORMAT, ROW_FORMAT, parse_report, serialize_report
+from test_report_generator import meter_csv
+
+ROWS = [(second % 60, f"H{second:03d}", 100.0 + second) for second in range(200)]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = AnalysisPool(2)
+    yield pool
+    pool.shutdown()
+
+
+def test_byte_ranges_split_the_csv_at_line_ends(tmp_path):
+    path = tmp_path / "energy.csv"
+    path.write_bytes(meter_csv(ROWS))
+    header, ranges = csv_byte_ranges(str(path), 4)
+    data = path.read_bytes()
+
+    assert data.startswith(header) and header.endswith(b"\n")
+    assert len(ranges) == 4
+    assert ranges[0][0] == len(header) and ranges[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in ranges)
+
+
+@pytest.mark.parametrize("report_format", [ROW_FORMAT, COLUMNAR_FORMAT])
+def test_parts_are_merged_in_input_order(tmp_path, pool, report_format):
+    path = tmp_path / "energy.csv"
+    path.write_bytes(meter_csv(ROWS))
+    request = energy_pb2.ExecuteRequest(input_file=str(path), output_file=str(tmp_path / "analysis.pb"),
+                                        parameters={"report_format": report_format})
+
+    rows, report = pool.analyze(request)
+
+    expected = serialize_report(analyze_frame(pd.read_csv(path)), report_format)
+    assert rows == len(ROWS)
+    assert report == expected
+    assert list(parse_report(report)["household_id"]) == [household for _, household, _ in ROWS]
@@ -0,0 +1,121 @@
+# tests/test_payload_io.py
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from energy_analyzer.stage import ContainerExecutorServicer as AnalyzerServicer
+from generated import energy_pb2
+from report_generator.stage import ContainerExecutorServicer as ReporterServicer
+from src.common.payload_io import PipeReader, pipe_marker_path
+
+METER_CSV = (b"timestamp,household_id,power_consumption,voltage,current\n"
+             b"2025-01-01T00:00:00Z,H1,100.0,230.0,0.43\n"
+             b"2025-01-01T00:00:01Z,H2,200.0,230.0,0.87\n")
+
+
+def write_marker(path, text):
+    with open(pipe_marker_path(str(path)), "w") as f:
+        f.write(text)
+
+
+def append_later(path, parts, final_marker, delay=0.05):
+    # Appends each part after 'delay' seconds, then writes the final marker, like a producing stage
+    def produce():
+        for part in parts:
+            time.sleep(delay)
+            with open(path, "ab") as f:
+                f.write(part)
+        time.sleep(delay)
+        write_marker(path, final_marker)
+    thread = threading.Thread(target=produce)
+    thread.start()
+    return thread
+
+
+def test_pipe_reader_blocks_until_the_producer_is_done(tmp_path):
+    path = tmp_path / "energy.csv"
+    path.write_bytes(b"")
+    write_marker(path, "run-1 writing")
+    producer = append_later(path, [b"a,b\n", b"1,2\n", b"3,4\n"], "run-1 done")
+
+    with PipeReader(str(path), "run-1") as reader:
+        assert reader.readline() == b"a,b\n"
+        assert reader.read() == b"1,2\n3,4\n"
+        assert reader.read() == b""
+    producer.join()
+
+
+def test_pipe_reader_waits_for_its_own_run(tmp_path):
+    path = tmp_path / "energy.csv"
+    path.write_bytes(b"stale output")
+    # A marker left by an earlier run is not this run's
+    write_marker(path, "run-0 done")
+
+    def run():
+        time.sleep(0.05)
+        path.write_bytes(b"")
+        write_marker(path, "run-1 writing")
+        append_later(path, [b"fresh"], "run-1 done").join()
+    producer = threading.Thread(target=run)
+    producer.start()
+
+    with PipeReader(str(path), "run-1") as reader:
+        assert reader.read() == b"fresh"
+    producer.join()
+
+
+def test_pipe_reader_fails_with_its_producer(tmp_path):
+    path = tmp_path / "energy.csv"
+    path.write_bytes(b"")
+    write_marker(path, "run-1 writing")
+    producer = append_later(path, [b"partial"], "run-1 failed")
+
+    with PipeReader(str(path), "run-1") as reader:
+        with pytest.raises(ValueError, match="failed"):
+            reader.read()
+    producer.join()
+
+
+def test_pipe_reader_times_out_on_an_idle_producer(tmp_path):
+    path = tmp_path / "energy.csv"
+    path.write_bytes(b"")
+    write_marker(path, "run-1 writing")
+
+    with PipeReader(str(path), "run-1", idle_timeout=0.1) as reader:
+        with pytest.raises(TimeoutError):
+            reader.read()
+
+
+def analyzed_table(tmp_path, suffix):
+    input_path, output_path = tmp_path / "energy.csv", tmp_path / f"analysis{suffix}"
+    input_path.write_bytes(METER_CSV)
+    request = energy_pb2.ExecuteRequest(input_file=str(input_path), output_file=str(output_path))
+    response = AnalyzerServicer().Execute(request, None)
+    assert response.success, response.message
+    return output_path.read_bytes()
+
+
+@pytest.mark.parametrize("suffix", [".arrow", ".parquet"])
+def test_piped_table_input_is_opened_once_the_producer_is_done(tmp_path, suffix):
+    table = analyzed_table(tmp_path, suffix)
+    piped_path, report_path = tmp_path / f"piped{suffix}", tmp_path / "report.csv"
+    request = energy_pb2.ExecuteRequest(input_file=str(piped_path), output_file=str(report_path),
+                                        parameters={"pipe_input": "run-1"})
+
+    # Half the table is on disk (no footer yet) when the reporter opens its input
+    piped_path.write_bytes(table[:len(table) // 2])
+    write_marker(piped_path, "run-1 writing")
+    responses = []
+    reporter = threading.Thread(target=lambda: responses.append(ReporterServicer().Execute(request, None)))
+    reporter.start()
+    time.sleep(0.2)
+    with open(piped_path, "ab") as f:
+        f.write(table[len(table) // 2:])
+    write_marker(piped_path, "run-1 done")
+    reporter.join(timeout=30)
+
+    assert responses[0].success, responses[0].message
+    assert list(pd.read_csv(report_path)["household_id"]) == ["H1", "H2"]
@@ -0,0 +1,172 @@
+# tests/test_report_codec.py
+
+import io
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from generated import energy_pb2
+from src.common.compression import CompressingWriter, decompressed
+from src.common.payload_io import map_input
+from src.common.report_codec import (COLUMNAR_FORMAT, ROW_FORMAT, STREAM_MAGIC, build_processed_report,
+                                     encode_report_chunk, iter_report_buffer, iter_report_file, iter_report_stream,
+                                     parse_report, serialize_report)
+
+# Timestamps the row layout must carry through unchanged
+TIMESTAMPS = [
+    "2025-01-01T00:00:00Z",
+    "2025-01-01 00:00:01",
+    "2025-01-01T02:00:02+02:00",
+    "2025-01-01T00:00:03.123456Z",
+    "2025-01-01T00:00:04.500Z",
+    "not a timestamp",
+    "2025-01-01T00:00:06Z ünïcode",
+]
+
+
+def analyzed_frame(timestamps=TIMESTAMPS):
+    rows = len(timestamps)
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "household_id": [f"H{i % 3}" for i in range(rows)],
+        "power_consumption": [float(i) for i in range(rows)],
+        "efficiency": [i / 10 for i in range(rows)],
+        "anomaly_detected": [i % 2 == 0 for i in range(rows)],
+    })
+
+
+def test_row_report_matches_protobuf_encoding():
+    df = analyzed_frame()
+    expected = energy_pb2.ProcessedDataReport(processed=[
+        energy_pb2.ProcessedEnergyReport(timestamp=row.timestamp, household_id=row.household_id,
+                                         power=row.power_consumption, efficiency=row.efficiency,
+                                         anomaly_detected=row.anomaly_detected)
+        for row in df.itertuples()])
+    assert serialize_report(df, ROW_FORMAT) == expected.SerializeToString()
+    assert [record.timestamp for record in build_processed_report(df).processed] == TIMESTAMPS
+
+
+def iterrows_report(df):
+    # The analyzer's encoding before it built reports from whole columns
+    report_data = energy_pb2.ProcessedDataReport()
+    for _, row in df.iterrows():
+        processed_item = report_data.processed.add()
+        processed_item.timestamp = row['timestamp']
+        processed_item.household_id = row['household_id']
+        processed_item.power = float(row['power_consumption'])
+        processed_item.efficiency = float(row['efficiency'])
+        processed_item.anomaly_detected = bool(row['anomaly_detected'])
+    return report_data
+
+
+def analyzer_dtypes_frame():
+    # Integer power, computed float efficiency and numpy bools, as the analyzer produces them
+    df = analyzed_frame([f"2025-01-01T00:00:{i:02d}Z" for i in range(50)])
+    df["power_consumption"] = np.arange(50, dtype=np.int64) * 37
+    df["efficiency"] = df["power_consumption"] / 1850
+    df["anomaly_detected"] = df["efficiency"].to_numpy() > 0.5
+    return df
+
+
+def test_column_wise_row_report_matches_iterrows_encoding():
+    df = analyzer_dtypes_frame()
+    expected = iterrows_report(df)
+    assert build_processed_report(df) == expected
+    assert serialize_report(df, ROW_FORMAT) == expected.SerializeToString()
+    assert encode_report_chunk(df, ROW_FORMAT).endswith(expected.SerializeToString())
+
+
+def test_columnar_report_decodes_to_the_iterrows_records():
+    df = analyzer_dtypes_frame()
+    expected = parse_report(iterrows_report(df).SerializeToString())
+    pd.testing.assert_frame_equal(parse_report(serialize_report(df, COLUMNAR_FORMAT)), expected)
+
+
+def test_row_report_round_trip_keeps_timestamp_strings():
+    df = analyzed_frame()
+    report = parse_report(serialize_report(df, ROW_FORMAT))
+    assert list(report["timestamp"]) == TIMESTAMPS
+    assert list(report["household_id"]) == list(df["household_id"])
+    assert list(report["anomaly_detected"]) == list(df["anomaly_detected"])
+    assert report["power"].tolist() == pytest.approx(df["power_consumption"].tolist())
+
+
+def test_row_report_read_in_batches_keeps_timestamp_strings():
+    data = serialize_report(analyzed_frame(), ROW_FORMAT)
+    frames = list(iter_report_buffer(data, batch_rows=2))
+    assert [len(frame) for frame in frames] == [2, 2, 2, 1]
+    assert list(pd.concat(frames)["timestamp"]) == TIMESTAMPS
+
+
+def test_chunked_report_keeps_timestamp_strings():
+    data = STREAM_MAGIC + b"".join(encode_report_chunk(analyzed_frame(TIMESTAMPS[i:i + 3]), ROW_FORMAT)
+                                   for i in range(0, len(TIMESTAMPS), 3))
+    assert list(parse_report(data)["timestamp"]) == TIMESTAMPS
+
+
+def test_columnar_report_stores_utc_milliseconds():
+    df = analyzed_frame(["2025-01-01T02:00:00+02:00", "2025-01-01T00:00:01.250Z"])
+    report = parse_report(serialize_report(df, COLUMNAR_FORMAT))
+    assert list(report["timestamp"]) == ["2025-01-01T00:00:00.000Z", "2025-01-01T00:00:01.250Z"]
+
+
+def test_columnar_report_rejects_non_iso_timestamps():
+    with pytest.raises(ValueError):
+        serialize_report(analyzed_frame(["not a timestamp"]), COLUMNAR_FORMAT)
+
+
+def test_compressed_chunked_report_is_decoded_frame_by_frame(tmp_path):
+    rng = np.random.default_rng(0)
+    chunks = []
+    for chunk in range(4):
+        df = analyzed_frame([f"2025-01-0{chunk + 1}T00:00:{i % 60:02d}Z" for i in range(20_000)])
+        df["power_consumption"] = rng.random(len(df))
+        chunks.append(df)
+    path = tmp_path / "analysis.pb.gz"
+    with open(path, "wb") as f, CompressingWriter(f, "gzip") as writer:
+        writer.write(STREAM_MAGIC + b"".join(encode_report_chunk(df, ROW_FORMAT) for df in chunks))
+
+    with open(path, "rb") as f:
+        frames = iter_report_stream(decompressed(f))
+        first = next(frames)
+        # Only the start of the compressed file has been read for the first frame
+        assert f.tell() < os.path.getsize(path) / 2
+        rest = list(frames)
+    assert list(first["timestamp"]) == list(chunks[0]["timestamp"])
+    assert sum(len(frame) for frame in rest) == 60_000
+    assert list(pd.concat(list(iter_report_file(str(path))))["timestamp"]) == \
+        list(pd.concat(chunks)["timestamp"])
+
+
+@pytest.mark.parametrize("report_format", [ROW_FORMAT, COLUMNAR_FORMAT])
+def test_mapped_report_is_decoded_in_batches(tmp_path, report_format):
+    df = analyzed_frame([f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}Z" for i in range(250)])
+    path = tmp_path / "analysis.pb"
+    path.write_bytes(serialize_report(df, report_format))
+
+    with open(path, "rb") as f:
+        buffer = map_input(f)
+        assert isinstance(buffer, mmap.mmap)
+        frames = list(iter_report_buffer(buffer, batch_rows=100))
+        buffer.close()
+    assert [len(frame) for frame in frames] == [100, 100, 50]
+    pd.testing.assert_frame_equal(pd.concat(frames, ignore_index=True),
+                                  parse_report(serialize_report(df, report_format)))
+
+
+def test_in_memory_payload_is_mapped_without_a_copy():
+    payload = io.BytesIO(serialize_report(analyzed_frame(), ROW_FORMAT))
+    buffer = map_input(payload)
+    assert isinstance(buffer, memoryview) and buffer.readonly
+    assert list(pd.concat(iter_report_buffer(buffer, batch_rows=3))["timestamp"]) == TIMESTAMPS
+
+
+def test_empty_report_file_is_not_mapped(tmp_path):
+    path = tmp_path / "analysis.pb"
+    path.write_bytes(b"")
+    with open(path, "rb") as f:
+        assert map_input(f) == b""
+    assert sum(len(frame) for frame in iter_report_file(str(path))) == 0
@@ -0,0 +1,115 @@
+# tests/test_report_generator.py
+
+import json
+
+import pandas as pd
+
+from energy_analyzer.stage import ContainerExecutorServicer as AnalyzerServicer
+from generated import energy_pb2
+from report_generator.stage import ContainerExecutorServicer
+from src.common.report_codec import STREAM_MAGIC, iter_report_file, parse_report
+
+
+def report_bytes(records):
+    return energy_pb2.ProcessedDataReport(processed=[
+        energy_pb2.ProcessedEnergyReport(timestamp=timestamp, household_id=household, power=power,
+                                         efficiency=power / 100, anomaly_detected=False)
+        for timestamp, household, power in records]).SerializeToString()
+
+
+def run_incremental(input_path, output_path):
+    request = energy_pb2.ExecuteRequest(input_file=str(input_path), output_file=str(output_path),
+                                        parameters={"incremental": "true"})
+    response = ContainerExecutorServicer().Execute(request, None)
+    assert response.success, response.message
+    return response
+
+
+def test_incremental_run_appends_only_new_records(tmp_path):
+    input_path, output_path = tmp_path / "analysis.pb", tmp_path / "report.csv"
+    input_path.write_bytes(report_bytes([("2025-01-01T00:00:00Z", "H1", 10.0)]))
+    run_incremental(input_path, output_path)
+
+    with open(input_path, "ab") as f:
+        f.write(report_bytes([("2025-01-01T00:00:01Z", "H2", 20.0)]))
+    response = run_incremental(input_path, output_path)
+
+    assert response.rows_processed == 1
+    assert list(pd.read_csv(output_path)["household_id"]) == ["H1", "H2"]
+    checkpoint = json.loads((tmp_path / "report.csv.checkpoint.json").read_text())
+    assert checkpoint["inputs"][str(input_path)]["digest"]
+
+
+def test_rewritten_input_of_the_same_size_rebuilds_the_report(tmp_path):
+    input_path, output_path = tmp_path / "analysis.pb", tmp_path / "report.csv"
+    input_path.write_bytes(report_bytes([("2025-01-01T00:00:00Z", "H1", 10.0)]))
+    run_incremental(input_path, output_path)
+
+    # Same size and layout, different records
+    input_path.write_bytes(report_bytes([("2025-01-01T00:00:00Z", "H9", 90.0)]))
+    response = run_incremental(input_path, output_path)
+
+    assert response.rows_processed == 1
+    assert list(pd.read_csv(output_path)["household_id"]) == ["H9"]
+
+
+def meter_csv(rows):
+    lines = ["timestamp,household_id,power_consumption,voltage,current"]
+    lines += [f"2025-01-01T00:00:{second:02d}Z,{household},{power},230.0,{power / 230.0}"
+              for second, household, power in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def run_analyzer_incremental(input_path, output_path):
+    request = energy_pb2.ExecuteRequest(input_file=str(input_path), output_file=str(output_path),
+                                        parameters={"incremental": "true"})
+    response = AnalyzerServicer().Execute(request, None)
+    assert response.success, response.message
+    return response
+
+
+def test_analyzer_incremental_run_appends_only_new_rows(tmp_path):
+    input_path, output_path = tmp_path / "energy.csv", tmp_path / "analysis.pb"
+    input_path.write_bytes(meter_csv([(0, "H1", 100.0)]))
+    run_analyzer_incremental(input_path, output_path)
+
+    with open(input_path, "ab") as f:
+        f.write(b"2025-01-01T00:00:01Z,H2,200.0,230.0,0.87\n")
+    response = run_analyzer_incremental(input_path, output_path)
+
+    assert response.rows_processed == 1
+    assert list(parse_report(output_path.read_bytes())["household_id"]) == ["H1", "H2"]
+
+
+def test_analyzer_rebuilds_a_regenerated_input_of_a_larger_size(tmp_path):
+    input_path, output_path = tmp_path / "energy.csv", tmp_path / "analysis.pb"
+    input_path.write_bytes(meter_csv([(0, "H1", 100.0)]))
+    run_analyzer_incremental(input_path, output_path)
+
+    # Regenerated with the same header: different first row, one more row
+    input_path.write_bytes(meter_csv([(0, "H8", 800.0), (1, "H9", 900.0)]))
+    response = run_analyzer_incremental(input_path, output_path)
+
+    assert response.rows_processed == 2
+    assert list(parse_report(output_path.read_bytes())["household_id"]) == ["H8", "H9"]
+
+
+def test_streamed_runs_report_progress_per_chunk(tmp_path):
+    input_path, analysis_path, report_path = tmp_path / "energy.csv", tmp_path / "analysis.pb", tmp_path / "report.csv"
+    input_path.write_bytes(meter_csv([(second, f"H{second}", 100.0 + second) for second in range(5)]))
+
+    request = energy_pb2.ExecuteRequest(input_file=str(input_path), output_file=str(analysis_path),
+                                        parameters={"chunk_rows": "2"})
+    steps = list(AnalyzerServicer().ExecuteStream(request, None))
+    assert [(step.chunks_processed, step.rows_processed, step.done) for step in steps] == \
+        [(1, 2, False), (2, 4, False), (3, 5, False), (3, 5, True)]
+    assert steps[-1].success, steps[-1].message
+    # One EPS1 frame per chunk
+    assert analysis_path.read_bytes().startswith(STREAM_MAGIC)
+    assert [len(frame) for frame in iter_report_file(str(analysis_path))] == [2, 2, 1]
+
+    request = energy_pb2.ExecuteRequest(input_file=str(analysis_path), output_file=str(report_path))
+    steps = list(ContainerExecutorServicer().ExecuteStream(request, None))
+    assert [step.rows_processed for step in steps] == [2, 4, 5, 5]
+    assert steps[-1].done and steps[-1].success, steps[-1].message
+    assert list(pd.read_csv(report_path)["household_id"]) == [f"H{second}" for second in range(5)]
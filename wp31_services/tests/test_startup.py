@@ -0,0 +1,98 @@
+# tests/test_startup.py
+
+import threading
+
+import grpc
+import pytest
+from grpc_health.v1 import health, health_pb2
+
+from generated import energy_pb2
+from src.common.startup import StageLoader, StageServicer
+
+SERVING = health_pb2.HealthCheckResponse.SERVING
+NOT_SERVING = health_pb2.HealthCheckResponse.NOT_SERVING
+
+
+class FakeStage:
+    def __init__(self):
+        self.warmed_up = False
+
+    def Execute(self, request, context):
+        return energy_pb2.ExecuteResponse(success=True, message="ok")
+
+    def warm_up(self):
+        self.warmed_up = True
+
+
+class AbortContext:
+    def abort(self, code, details):
+        raise RuntimeError(code, details)
+
+
+def health_status(servicer):
+    return servicer.Check(health_pb2.HealthCheckRequest(service=""), None).status
+
+
+@pytest.fixture
+def lazy(monkeypatch):
+    monkeypatch.setenv("STARTUP_MODE", "lazy")
+
+
+def test_lazy_stage_reports_not_serving_until_it_is_loaded(lazy):
+    release = threading.Event()
+    stage = FakeStage()
+
+    def load():
+        release.wait(5)
+        return stage
+    health_servicer = health.HealthServicer()
+    loader = StageLoader("Test", load, health_servicer)
+    loader.start()
+    assert health_status(health_servicer) == NOT_SERVING
+
+    # An early call waits for the stage instead of failing
+    responses = []
+    call = threading.Thread(target=lambda: responses.append(StageServicer(loader).Execute(None, AbortContext())))
+    call.start()
+    call.join(0.1)
+    assert call.is_alive() and not responses
+
+    release.set()
+    call.join(5)
+    assert responses[0].success
+    assert health_status(health_servicer) == SERVING
+    assert loader.load_seconds is not None
+
+
+def test_warm_up_request_runs_before_serving(lazy, monkeypatch):
+    monkeypatch.setenv("WARMUP_REQUEST", "true")
+    stage = FakeStage()
+    health_servicer = health.HealthServicer()
+    loader = StageLoader("Test", lambda: stage, health_servicer)
+    loader.start()
+
+    assert loader.servicer(AbortContext()) is stage
+    assert stage.warmed_up
+    assert health_status(health_servicer) == SERVING
+
+
+def test_stage_that_fails_to_load_stays_not_serving(lazy):
+    def load():
+        raise ImportError("no pandas")
+    health_servicer = health.HealthServicer()
+    loader = StageLoader("Test", load, health_servicer)
+    loader.start()
+
+    with pytest.raises(RuntimeError) as error:
+        loader.servicer(AbortContext())
+    assert error.value.args[0] == grpc.StatusCode.UNAVAILABLE
+    assert health_status(health_servicer) == NOT_SERVING
+
+
+def test_eager_stage_fails_the_start(monkeypatch):
+    monkeypatch.setenv("STARTUP_MODE", "eager")
+
+    def load():
+        raise ImportError("no pandas")
+    with pytest.raises(ImportError):
+        StageLoader("Test", load, health.HealthServicer()).start()
@@ -0,0 +1,80 @@
+# tests/test_windows.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_analyzer import windows
+from energy_analyzer.windows import WindowAggregator, parse_duration, parse_windows
+
+HOUR_MS = 3_600_000
+
+
+def analyzed(rows):
+    # (minutes after midnight, household, power, efficiency, anomaly)
+    return pd.DataFrame({
+        "timestamp": [f"2025-01-01T{minute // 60:02d}:{minute % 60:02d}:00Z" for minute, *_ in rows],
+        "household_id": [household for _, household, *_ in rows],
+        "power_consumption": [power for _, _, power, _, _ in rows],
+        "efficiency": [efficiency for *_, efficiency, _ in rows],
+        "anomaly_detected": [anomaly for *_, anomaly in rows],
+    })
+
+
+CHUNKS = [
+    analyzed([(10, "H1", 1.0, 0.5, False), (70, "H1", 2.0, 0.25, True), (20, "H2", 4.0, np.nan, False)]),
+    analyzed([(50, "H1", 8.0, 1.0, False), (130, "H2", 16.0, 0.75, True)]),
+]
+
+
+def window_rows(report, name):
+    # {(household, window start ms): (power sum, efficiency mean, records, anomalies)}
+    window = next(window for window in report.windows if window.name == name)
+    return {(report.households[h], start): (power, efficiency, records, anomalies)
+            for h, start, power, efficiency, records, anomalies in zip(
+                window.household_index, window.window_start_ms, window.power_sum, window.efficiency_mean,
+                window.record_count, window.anomaly_count)}
+
+
+def aggregate(chunks, spec):
+    aggregator = WindowAggregator(parse_windows(spec))
+    for chunk in chunks:
+        aggregator.update(chunk)
+    return aggregator.report()
+
+
+def test_tumbling_windows_sum_each_household_over_all_chunks():
+    start = int(pd.Timestamp("2025-01-01T00:00:00Z").value // 1_000_000)
+    rows = window_rows(aggregate(CHUNKS, "1h"), "1h")
+
+    assert set(rows) == {("H1", start), ("H1", start + HOUR_MS), ("H2", start), ("H2", start + 2 * HOUR_MS)}
+    assert rows[("H1", start)] == (9.0, 0.75, 2, 0)
+    assert rows[("H1", start + HOUR_MS)] == (2.0, 0.25, 1, 1)
+    # Missing efficiencies are left out of the mean; a window without any has none
+    assert np.isnan(rows[("H2", start)][1])
+    assert rows[("H2", start + 2 * HOUR_MS)] == (16.0, 0.75, 1, 1)
+
+
+def test_sliding_windows_count_rows_in_every_window_they_fall_in():
+    start = int(pd.Timestamp("2025-01-01T00:00:00Z").value // 1_000_000)
+    rows = window_rows(aggregate(CHUNKS, "2h/1h"), "2h/1h")
+
+    # The 01:10 reading of H1 is in the windows starting at 00:00 and 01:00
+    assert rows[("H1", start - HOUR_MS)][0] == 9.0
+    assert rows[("H1", start)][0] == 11.0
+    assert rows[("H1", start + HOUR_MS)][0] == 2.0
+    assert sum(records for (household, _), (_, _, records, _) in rows.items() if household == "H2") == 4
+
+
+def test_compacted_partials_give_the_same_report(monkeypatch):
+    expected = aggregate(CHUNKS, "1h,1d")
+    monkeypatch.setattr(windows, "COMPACT_ROWS", 1)
+    assert aggregate(CHUNKS, "1h,1d") == expected
+
+
+def test_window_specs_are_validated():
+    assert parse_duration("15m") == 15 * 60_000
+    assert [window.name for window in parse_windows("1h, 1d/1h,1h")] == ["1h", "1d/1h"]
+    for spec in ("", "1w", "0s", "1h/25m"):
+        with pytest.raises(ValueError):
+            parse_windows(spec)